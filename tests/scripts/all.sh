@@ -1054,7 +1054,9 @@ msg "Lint: Python scripts"
 tests/scripts/check-python-files.sh
 
 msg "uint test: generate_test_code.py"
-./tests/scripts/test_generate_test_code.py
+for test_script in tests/scripts/test_generate_test_code*.py; do
+    ./$test_script
+done
 
 ################################################################
 #### Termination
@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+# Benchmarks for generate_test_code.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Benchmarks for generate_test_code.py
+
+scaling:
+    Stress benchmark that times gen_from_test_data() on synthetic data
+    files of increasing size. Every test case uses a dependency and an
+    expression not seen before, that is the worst case for tracking
+    unique dependencies and expressions. Time per test case should stay
+    flat as the number of test cases grows. The benchmark fails if the
+    time per test case of the biggest file exceeds that of the smallest
+    by more than the given ratio.
+
+suites:
+    Times generate_code() on the biggest test suites in the suites dir
+    and measures the peak memory allocated while generating each of
+    them. Memory is measured in a separate run with tracemalloc, that
+    is not available with Python 2.
+
+throughput:
+    Times parse_functions(), parse_test_data(), gen_from_test_data()
+    and generate_code() on every test suite in the suites dir, and on
+    data files made by repeating the biggest data files 10 and 100
+    times. Results can be saved as JSON with --output and compared
+    with saved results with --baseline. The comparison fails if the
+    total time of a function at a scale exceeds the baseline by more
+    than the given ratio. Totals shorter than --min-time are not
+    compared, as they are dominated by timer noise. Only compare results
+    measured on the same machine.
+
+Benchmarks run against generate_test_code.py next to this script by
+default. Option --generator selects another version of the script, for
+comparing results before and after a change.
+"""
+
+
+import os
+import sys
+import glob
+import json
+import time
+import platform
+import shutil
+import argparse
+import tempfile
+import importlib
+try:
+    # Python 2
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+
+# Version of the throughput results file format.
+RESULTS_VERSION = 1
+
+# Functions timed by the throughput benchmark.
+THROUGHPUT_FUNCTIONS = ['parse_functions', 'parse_test_data',
+                        'gen_from_test_data', 'generate_code']
+
+# Function arguments of the synthetic test function.
+SYNTHETIC_FUNC_INFO = {'test_synthetic': (0, ('int', 'int', 'hex', 'char*'))}
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def load_generator(file_name):
+    """
+    Loads generate_test_code.py module from a file. Its dir is put
+    first in the module search path, so that the module and the modules
+    it imports are loaded from it.
+
+    :param file_name: Path to generate_test_code.py
+    :return: Module object
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(file_name)))
+    return importlib.import_module(
+        os.path.splitext(os.path.basename(file_name))[0])
+
+
+def write_synthetic_data_file(file_name, test_count, distinct_count):
+    """
+    Writes a data file with synthetic test cases for the test function
+    in SYNTHETIC_FUNC_INFO. Test cases cycle through distinct_count
+    dependencies and expressions.
+
+    :param file_name: Data file name
+    :param test_count: Number of test cases
+    :param distinct_count: Number of distinct dependencies and expressions
+    :return:
+    """
+    with open(file_name, 'w') as data_f:
+        for i in range(test_count):
+            unique = i % distinct_count
+            data_f.write('Synthetic test #%d\n'
+                         'depends_on:MBEDTLS_SYNTHETIC_C:SYNTHETIC_DEP_%d\n'
+                         'synthetic:SYNTHETIC_EXP_%d:%d:"%08x":"test %d"\n'
+                         '\n' % (i, unique, unique, i, i, i))
+
+
+def time_gen_from_test_data(generator, data_file, repeat):
+    """
+    Times gen_from_test_data() on a data file.
+
+    :param generator: generate_test_code module
+    :param data_file: Data file name
+    :param repeat: Number of runs
+    :return: Best time in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        with generator.FileWrapper(data_file) as data_f:
+            out_data_f = StringIO()
+            start = timer()
+            generator.gen_from_test_data(data_f, out_data_f,
+                                         SYNTHETIC_FUNC_INFO, [])
+            elapsed = timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run_scaling(generator, args):
+    """
+    Runs the scaling benchmark and prints results.
+
+    :param generator: generate_test_code module
+    :param args: Parsed command line arguments
+    :return: True if time per test case stays within args.max_ratio.
+    """
+    tmp_dir = tempfile.mkdtemp()
+    per_case = []
+    try:
+        print('%10s %10s %12s' % ('tests', 'seconds', 'us/test'))
+        for size in sorted(args.sizes):
+            data_file = os.path.join(tmp_dir, 'test_suite_synthetic.data')
+            write_synthetic_data_file(data_file, size,
+                                      args.distinct or size)
+            elapsed = time_gen_from_test_data(generator, data_file,
+                                              args.repeat)
+            per_case.append(elapsed / size)
+            print('%10d %10.3f %12.2f' % (size, elapsed,
+                                           1e6 * elapsed / size))
+    finally:
+        shutil.rmtree(tmp_dir)
+    ratio = per_case[-1] / per_case[0]
+    print('Time per test case ratio, biggest/smallest: %.2f '
+          '(max %.2f)' % (ratio, args.max_ratio))
+    return ratio <= args.max_ratio
+
+
+def find_biggest_suites(suites_dir, count):
+    """
+    Finds the test suites with the biggest data files.
+
+    :param suites_dir: Test suites dir
+    :param count: Number of suites
+    :return: List of data file names, biggest first.
+    """
+    data_files = glob.glob(os.path.join(suites_dir, 'test_suite_*.data'))
+    data_files.sort(key=os.path.getsize, reverse=True)
+    return data_files[:count]
+
+
+def generate_suite(generator, data_file, suites_dir, out_dir,
+                   funcs_file=None):
+    """
+    Generates a test suite with generate_code(). Outputs and memoised
+    results of an earlier run are removed first, so that every run
+    does the full work.
+
+    :param generator: generate_test_code module
+    :param data_file: Data file name
+    :param suites_dir: Test suites dir
+    :param out_dir: Output dir
+    :param funcs_file: Functions file. Derived from the data file name
+           if not given.
+    :return:
+    """
+    data_name = os.path.splitext(os.path.basename(data_file))[0]
+    c_file = os.path.join(out_dir, data_name + '.c')
+    out_data_file = os.path.join(out_dir, data_name + '.datax')
+    for out_file in (c_file, out_data_file):
+        if os.path.exists(out_file):
+            os.remove(out_file)
+    getattr(generator, 'PARSED_FUNCTIONS', {}).clear()
+    generator.generate_code(
+        funcs_file=funcs_file or os.path.join(
+            suites_dir, data_name.split('.')[0] + '.function'),
+        data_file=data_file,
+        template_file=os.path.join(suites_dir, 'main_test.function'),
+        platform_file=os.path.join(suites_dir, 'host_test.function'),
+        helpers_file=os.path.join(suites_dir, 'helpers.function'),
+        suites_dir=suites_dir, c_file=c_file, out_data_file=out_data_file)
+
+
+def run_suites(generator, args):
+    """
+    Runs the suites benchmark and prints results.
+
+    :param generator: generate_test_code module
+    :param args: Parsed command line arguments
+    :return:
+    """
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        print('%-40s %10s %12s' % ('suite', 'seconds', 'peak KiB'))
+        for data_file in find_biggest_suites(args.suites_dir, args.count):
+            best = None
+            for _ in range(args.repeat):
+                start = timer()
+                generate_suite(generator, data_file, args.suites_dir,
+                               tmp_dir)
+                elapsed = timer() - start
+                if best is None or elapsed < best:
+                    best = elapsed
+            peak = '-'
+            if tracemalloc:
+                tracemalloc.start()
+                generate_suite(generator, data_file, args.suites_dir,
+                               tmp_dir)
+                peak = '%d' % (tracemalloc.get_traced_memory()[1] // 1024)
+                tracemalloc.stop()
+            print('%-40s %10.3f %12s' % (os.path.basename(data_file),
+                                         best, peak))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def best_time(func, repeat):
+    """
+    Times a function.
+
+    :param func: Function without arguments
+    :param repeat: Number of runs
+    :return: Best time in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = timer()
+        func()
+        elapsed = timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def time_suite(generator, suite, suites_dir, out_dir, repeat):
+    """
+    Times the generator functions on a test suite.
+
+    :param generator: generate_test_code module
+    :param suite: Functions file name and data file name
+    :param suites_dir: Test suites dir
+    :param out_dir: Output dir
+    :param repeat: Number of runs
+    :return: Dictionary of function name to best time in seconds
+    """
+    funcs_file, data_file = suite
+
+    def parse_functions():
+        with generator.FileWrapper(funcs_file) as funcs_f:
+            return generator.parse_functions(funcs_f)
+
+    def parse_test_data():
+        with generator.FileWrapper(data_file) as data_f:
+            for _ in generator.parse_test_data(data_f):
+                pass
+
+    suite_dependencies, _, _, func_info = parse_functions()
+
+    def gen_from_test_data():
+        with generator.FileWrapper(data_file) as data_f:
+            generator.gen_from_test_data(data_f, StringIO(), func_info,
+                                         suite_dependencies)
+
+    def generate_code():
+        generate_suite(generator, data_file, suites_dir, out_dir,
+                       funcs_file)
+
+    funcs = {'parse_functions': parse_functions,
+             'parse_test_data': parse_test_data,
+             'gen_from_test_data': gen_from_test_data,
+             'generate_code': generate_code}
+    return dict((name, best_time(funcs[name], repeat))
+                for name in THROUGHPUT_FUNCTIONS)
+
+
+def write_scaled_data_file(data_file, scale, out_dir):
+    """
+    Writes a data file repeating the test cases of another one.
+
+    :param data_file: Data file name
+    :param scale: Number of repetitions
+    :param out_dir: Dir to write the scaled data file to
+    :return: Scaled data file name
+    """
+    with open(data_file, 'r') as data_f:
+        data = data_f.read()
+    if not data.endswith('\n\n'):
+        data = data.rstrip('\n') + '\n\n'
+    scaled_file = os.path.join(out_dir, os.path.basename(data_file))
+    with open(scaled_file, 'w') as scaled_f:
+        for _ in range(scale):
+            scaled_f.write(data)
+    return scaled_file
+
+
+def find_all_suites(generator, suites_dir):
+    """
+    Finds all test suites in the suites dir with find_suites() of the
+    generator. Older versions of the generator do not have it, the
+    data files are globbed then.
+
+    :param generator: generate_test_code module
+    :param suites_dir: Test suites dir
+    :return: List of (functions file name, data file name) tuples
+    """
+    if hasattr(generator, 'find_suites'):
+        return generator.find_suites(suites_dir)
+    data_files = glob.glob(os.path.join(suites_dir, 'test_suite_*.data'))
+    return [(os.path.join(suites_dir, os.path.basename(data_file).split(
+        '.')[0] + '.function'), data_file) for data_file in sorted(data_files)]
+
+
+def run_throughput(generator, args):
+    """
+    Runs the throughput benchmark, prints results and optionally saves
+    them and compares them with a baseline.
+
+    :param generator: generate_test_code module
+    :param args: Parsed command line arguments
+    :return: False if slower than the baseline, else True.
+    """
+    suites = find_all_suites(generator, args.suites_dir)
+    scaled = list(find_biggest_suites(args.suites_dir, args.scaled_count))
+    runs = [(funcs_file, data_file, 1) for funcs_file, data_file in suites]
+    for scale in args.scales:
+        runs += [(funcs_file, data_file, scale)
+                 for funcs_file, data_file in suites
+                 if data_file in scaled]
+
+    tmp_dir = tempfile.mkdtemp()
+    results = {}
+    try:
+        print('%-44s' % 'suite' +
+              ''.join('%19s' % name for name in THROUGHPUT_FUNCTIONS))
+        for funcs_file, data_file, scale in runs:
+            name = '%s x%d' % (os.path.basename(data_file), scale)
+            if scale != 1:
+                data_file = write_scaled_data_file(data_file, scale,
+                                                   tmp_dir)
+            times = time_suite(generator, (funcs_file, data_file),
+                               args.suites_dir, tmp_dir, args.repeat)
+            results[name] = dict(times, scale=scale)
+            print('%-44s' % name +
+                  ''.join('%19.4f' % times[func]
+                          for func in THROUGHPUT_FUNCTIONS))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    return report_throughput(results, args)
+
+
+def report_throughput(results, args):
+    """
+    Prints the total times of the throughput benchmark and optionally
+    saves the results and compares them with a baseline.
+
+    :param results: Dictionary of run name to times and scale
+    :param args: Parsed command line arguments
+    :return: False if slower than the baseline, else True.
+    """
+    totals = throughput_totals(results)
+    print_throughput_totals(totals)
+    if args.output:
+        with open(args.output, 'w') as out_f:
+            json.dump({'version': RESULTS_VERSION,
+                       'python': platform.python_version(),
+                       'generator': os.path.abspath(args.generator),
+                       'repeat': args.repeat,
+                       'suites': results,
+                       'totals': totals}, out_f, indent=1, sort_keys=True,
+                      separators=(',', ': '))
+    if args.baseline:
+        with open(args.baseline, 'r') as in_f:
+            baseline = json.load(in_f)
+        if baseline.get('version') != RESULTS_VERSION:
+            sys.exit('Unsupported baseline version in %s' % args.baseline)
+        return compare_throughput(totals, baseline['totals'],
+                                  args.max_slowdown, args.min_time)
+    return True
+
+
+def throughput_totals(results):
+    """
+    Sums times per function and scale.
+
+    :param results: Dictionary of run name to times and scale
+    :return: Dictionary of 'function xscale' to total seconds
+    """
+    totals = {}
+    for times in results.values():
+        for func in THROUGHPUT_FUNCTIONS:
+            key = '%s x%d' % (func, times['scale'])
+            totals[key] = totals.get(key, 0.0) + times[func]
+    return totals
+
+
+def print_throughput_totals(totals):
+    """
+    Prints total times per function and scale.
+
+    :param totals: Totals from throughput_totals()
+    :return:
+    """
+    print('\n%-30s %10s' % ('total', 'seconds'))
+    for key in sorted(totals):
+        print('%-30s %10.3f' % (key, totals[key]))
+
+
+def compare_throughput(totals, baseline, max_slowdown, min_time=0.0):
+    """
+    Compares total times with a baseline and prints the ratios. Totals
+    that take less than min_time both now and in the baseline are
+    dominated by timer noise and are not checked.
+
+    :param totals: Totals from throughput_totals()
+    :param baseline: Totals of the baseline
+    :param max_slowdown: Maximum allowed ratio of time to baseline time
+    :param min_time: Minimum time in seconds of a checked total
+    :return: False if any checked total exceeds max_slowdown, else True.
+    """
+    passed = True
+    print('\n%-30s %10s %10s %8s' % ('total', 'seconds', 'baseline',
+                                     'ratio'))
+    for key in sorted(totals):
+        if not baseline.get(key):
+            print('%-30s %10.3f %10s %8s' % (key, totals[key], '-', '-'))
+            continue
+        ratio = totals[key] / baseline[key]
+        if max(totals[key], baseline[key]) < min_time:
+            note = ' ignored'
+        elif ratio > max_slowdown:
+            note = ' SLOWER'
+            passed = False
+        else:
+            note = ''
+        print('%-30s %10.3f %10.3f %8.2f%s' % (key, totals[key],
+                                               baseline[key], ratio, note))
+    print('Maximum allowed ratio: %.2f, minimum checked time: %.3f' %
+          (max_slowdown, min_time))
+    return passed
+
+
+def main():
+    """
+    Command line parser.
+
+    :return:
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark generate_test_code.py.')
+    parser.add_argument('--generator',
+                        default=os.path.join(os.path.dirname(__file__),
+                                             'generate_test_code.py'),
+                        help='generate_test_code.py to benchmark',
+                        metavar='FILE')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per measurement, best time is reported')
+    subparsers = parser.add_subparsers(dest='benchmark')
+    subparsers.required = True
+
+    scaling = subparsers.add_parser(
+        'scaling', help='Time gen_from_test_data() on synthetic data files')
+    scaling.add_argument('--sizes', type=int, nargs='+',
+                         default=[12500, 25000, 50000, 100000, 200000],
+                         help='Numbers of test cases to generate',
+                         metavar='N')
+    scaling.add_argument('--distinct', type=int, default=0,
+                         help='Number of distinct dependencies and '
+                              'expressions. Default is one per test case',
+                         metavar='N')
+    scaling.add_argument('--max-ratio', type=float, default=2.0,
+                         help='Maximum allowed ratio of time per test '
+                              'case between the biggest and smallest file',
+                         metavar='RATIO')
+
+    suites = subparsers.add_parser(
+        'suites', help='Time generate_code() on the biggest test suites')
+    suites.add_argument('--suites-dir',
+                        default=os.path.join(os.path.dirname(__file__),
+                                             os.pardir, 'suites'),
+                        help='Test suites dir', metavar='DIR')
+    suites.add_argument('--count', type=int, default=5,
+                        help='Number of suites to benchmark', metavar='N')
+
+    throughput = subparsers.add_parser(
+        'throughput', help='Time the generator functions on all suites '
+                           'and on scaled up data files')
+    throughput.add_argument('--suites-dir',
+                            default=os.path.join(os.path.dirname(__file__),
+                                                 os.pardir, 'suites'),
+                            help='Test suites dir', metavar='DIR')
+    throughput.add_argument('--scales', type=int, nargs='*',
+                            default=[10, 100],
+                            help='Numbers of times the biggest data files '
+                                 'are repeated', metavar='N')
+    throughput.add_argument('--scaled-count', type=int, default=3,
+                            help='Number of data files to scale up',
+                            metavar='N')
+    throughput.add_argument('--output',
+                            help='Save results to a JSON file',
+                            metavar='FILE')
+    throughput.add_argument('--baseline',
+                            help='Compare results with a JSON file saved '
+                                 'with --output',
+                            metavar='FILE')
+    throughput.add_argument('--max-slowdown', type=float, default=1.2,
+                            help='Maximum allowed ratio of total time to '
+                                 'baseline time',
+                            metavar='RATIO')
+    throughput.add_argument('--min-time', type=float, default=0.05,
+                            help='Totals below this time in seconds, now '
+                                 'and in the baseline, are not compared',
+                            metavar='SECONDS')
+
+    args = parser.parse_args()
+    generator = load_generator(args.generator)
+    if args.benchmark == 'scaling':
+        if not run_scaling(generator, args):
+            sys.exit(1)
+    elif args.benchmark == 'throughput':
+        if not run_throughput(generator, args):
+            sys.exit(1)
+    else:
+        run_suites(generator, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,9 @@
 # PEP8 coding standards.
 
 if `hash pylint > /dev/null 2>&1`; then
-    pylint -j 2 tests/scripts/generate_test_code.py --rcfile .pylint
-    pylint -j 2 tests/scripts/test_generate_test_code.py --rcfile .pylint
+    pylint -j 2 tests/scripts/generate_test_code*.py --rcfile .pylint
+    pylint -j 2 tests/scripts/test_generate_test_code*.py --rcfile .pylint
+    pylint -j 2 tests/scripts/benchmark_generate_test_code.py --rcfile .pylint
     pylint -j 2 tests/scripts/mbedtls_test.py --rcfile .pylint
 else
     echo "$0: WARNING: 'pylint' not found! Skipping checks on Python files."
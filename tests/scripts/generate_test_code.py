@@ -142,917 +142,1479 @@ $functions_code             <-- Test functions are substituted here
                                 generates wrappers for the test
                                 functions with code to expand the
                                 string parameters read from the data
-                                file.
+                                file. Only the test functions called
+                                by the test cases of the data file
+                                are included, header and helpers code
+                                is always included.
 $expression_code            <-- This script enumerates the
                                 expressions in the .data file and
-                                generates code to handle enumerated
-                                expression Ids and return the values.
+                                generates the initializer for the
+                                table of expression values indexed
+                                by expression Id.
 $dep_check_code             <-- This script enumerates all
-                                build dependencies and generate
-                                code to handle enumerated build
-                                dependency Id and return status: if
-                                the dependency is defined or not.
+                                build dependencies and generates
+                                the initializer for the table of
+                                dependency statuses indexed by
+                                dependency Id: if the dependency is
+                                defined or not.
 $dispatch_code              <-- This script enumerates the functions
                                 specified in the input test data file
                                 and generates the initializer for the
                                 function table in the template
                                 file.
+$function_names_code        <-- Initializer for the table of test
+                                function names, used by the optional
+                                test timing report.
 $platform_code              <-- Platform specific setup and test
                                 dispatch code.
 
+Several test suites can be generated in one run by giving multiple
+data files or no data file at all. In the latter case all data files
+in the suites dir are used. The functions file for each data file is
+derived from its name and the template, platform and helpers files
+are read only once.
+
+Test parameters are checked while generating: strings and hex strings
+must be enclosed in '"', hex strings must have an even number of hex
+digits and int literals must fit in 32 bits. All the invalid test
+cases of a data file are reported at once with their line numbers.
+
+With --merge-data-files, the data files of a functions file, e.g.
+test_suite_gcm.aes128_en.data and test_suite_gcm.aes128_de.data, are
+generated as one merged test suite, test_suite_gcm.c, so that the test
+code is compiled and linked once. Function, dependency and expression
+Ids are shared by its data files. An intermediate data file is still
+written per data file. The test binary runs any of them given on its
+command line, all of them by default, and reports results per data
+file.
+
+With --watch, the script keeps running after generating the suites.
+It watches the input files, with inotify on Linux and by polling
+elsewhere, and regenerates only the suites affected by each change.
+Parsed template and functions files stay in memory in between.
+
+Binary intermediate data file:
+------------------------------
+Optionally, the intermediate data file is written in a binary format
+with the test parameters already decoded, so that the host test
+binary does not parse text, unhexify hex strings or convert integers
+at run time. It is only read by host_test.function. The format is
+described in generate_test_code_binary.py.
+
+Test suite manifest:
+--------------------
+With --manifest, a JSON file with the same base name as the C file is
+written for each suite. It lists every test case with its test
+function name and Id, dependencies, argument types (int arguments
+given as expressions have type 'exp') and the sizes of its parameters
+in the binary intermediate data file. Schedulers can use it to plan
+and split test runs without parsing the data file.
+
+Configuration pruning:
+----------------------
+With --config-file and/or -D, dependencies are resolved at generation
+time with the macros known from the configuration. Test cases with a
+known unmet test suite or test case dependency are left out of the
+intermediate data file and counted in a summary. Dependencies that
+are met are not written, only the unknown ones are checked at run
+time. Test function dependencies are still checked at run time. The
+generated files are then only valid for that configuration.
+
+Expression resolution:
+----------------------
+Int parameters given as expressions, e.g. error code macros, are
+normally evaluated at run time: the generated C code has a table of
+their values and the intermediate data file refers to them by Id.
+With --resolve-expressions, the expressions of all the suites are
+expanded with one run of the C preprocessor (--cc, -I, --config-file
+and -D) on the template and helpers code followed by the code of each
+suite and its expressions. Expanded expressions made of int constants
+and operators are then evaluated by the generator and written in the
+intermediate data file as int parameters. The others, e.g. enum
+constants and casts, are still evaluated at run time.
+
+In-memory API:
+--------------
+Build tools can import this module and call generate_in_memory()
+instead of running the script. It takes the input files as strings or
+file-like objects and returns the C code, the intermediate data and
+metadata about the suite without reading or writing any file.
+
+Modules:
+--------
+Parts of the generator are in modules next to this script:
+
+generate_test_code_files.py         Input and output files
+generate_test_code_functions.py     Functions file parser
+generate_test_code_data.py          Data file parser and text
+                                    intermediate data file writer
+generate_test_code_binary.py        Binary intermediate data file writer
+generate_test_code_config.py        Configuration pruning
+generate_test_code_expressions.py   Expression resolver
+generate_test_code_cache.py         Generation cache
+generate_test_code_watch.py         Watch mode
+generate_test_code_profile.py       Profiling
+
 """
 
 
 import io
 import os
-import re
+import glob
 import sys
+import json
 import string
+import hashlib
 import argparse
+import functools
+import collections
+import multiprocessing
+try:
+    # Python 2
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+
+from generate_test_code_files import GeneratorInputError, FileWrapper
+from generate_test_code_files import write_file_if_changed, file_digest
+from generate_test_code_functions import parse_function_sections
+from generate_test_code_functions import gen_functions_code
+from generate_test_code_functions import gen_function_names
+from generate_test_code_data import INT_LITERAL_PATTERN, InternTable
+from generate_test_code_data import parse_test_data, get_test_function
+from generate_test_code_data import intern_dependencies, write_dependencies
+from generate_test_code_data import intern_parameters, write_parameters
+from generate_test_code_data import gen_suite_dep_checks
+from generate_test_code_binary import encode_binary_parameter
+from generate_test_code_binary import gen_binary_datax
+from generate_test_code_config import read_config, resolve_dependencies
+from generate_test_code_config import print_pruned_summary
+from generate_test_code_expressions import collect_expressions
+from generate_test_code_expressions import resolve_expressions
+from generate_test_code_expressions import get_preprocessor_command
+from generate_test_code_cache import CACHE_FILE_NAME, read_cache, write_cache
+from generate_test_code_cache import gen_cache_key, gen_shared_cache_key
+from generate_test_code_watch import watch_suites
+from generate_test_code_profile import PhaseProfiler, print_profile
+from generate_test_code_profile import dump_profile
+
+
+# Version of the test suite manifest file format.
+MANIFEST_VERSION = 1
+
+# generate_code() parameters specific to a data file. merge_tasks()
+# keeps them per data file in the merged task.
+MERGED_TASK_DATA_FILE_KEYS = ('data_file', 'out_data_file', 'manifest_file',
+                              'skip_tests', 'resolved_expressions')
+
+
+# (digest, parse_function_sections() result) keyed by functions file
+# name. Suites sharing a functions file parse it only once per process.
+# The entry of a file is replaced when its digest changes, so that --watch
+# keeps only the last parse of each file.
+PARSED_FUNCTIONS = {}
+
+
+# Options of gen_from_test_data(). They all default to off.
+DataOptions = collections.namedtuple('DataOptions', [
+    'binary', 'manifest', 'skip_tests', 'config', 'pruned', 'resolved',
+    'used_functions', 'unique_dependencies', 'unique_expressions'])
+DataOptions.__new__.__defaults__ = (False,) + (None,) * 8
+
+
+def parse_functions(funcs_f, used_functions=None):
+    """
+    Parses a test_suite_xxx.function file and returns information
+    for generating a C source file for the test suite.
 
-
-BEGIN_HEADER_REGEX = r'/\*\s*BEGIN_HEADER\s*\*/'
-END_HEADER_REGEX = r'/\*\s*END_HEADER\s*\*/'
-
-BEGIN_SUITE_HELPERS_REGEX = r'/\*\s*BEGIN_SUITE_HELPERS\s*\*/'
-END_SUITE_HELPERS_REGEX = r'/\*\s*END_SUITE_HELPERS\s*\*/'
-
-BEGIN_DEP_REGEX = r'BEGIN_DEPENDENCIES'
-END_DEP_REGEX = r'END_DEPENDENCIES'
-
-BEGIN_CASE_REGEX = r'/\*\s*BEGIN_CASE\s*(?P<depends_on>.*?)\s*\*/'
-END_CASE_REGEX = r'/\*\s*END_CASE\s*\*/'
-
-DEPENDENCY_REGEX = r'depends_on:(?P<dependencies>.*)'
-C_IDENTIFIER_REGEX = r'!?[a-z_][a-z0-9_]*$'
-TEST_FUNCTION_VALIDATION_REGEX = r'\s*void\s+(?P<func_name>\w+)\s*\('
-INT_CHECK_REGEX = r'int\s+.*'
-CHAR_CHECK_REGEX = r'char\s*\*\s*.*'
-DATA_T_CHECK_REGEX = r'data_t\s*\*\s*.*'
-FUNCTION_ARG_LIST_END_REGEX = r'.*\)'
-EXIT_LABEL_REGEX = r'^exit:'
+    :param funcs_f: file object of the functions file.
+    :param used_functions: Optional names of the test functions to
+           generate code for, see gen_functions_code().
+    :return: List of test suite dependencies, test function dispatch
+             code, function code and a dict with function identifiers
+             and arguments info.
+    """
+    return gen_functions_code(parse_function_sections(funcs_f),
+                              used_functions)
 
 
-class GeneratorInputError(Exception):
+def add_binary_test_case(test_cases, test_case, func_info, options):
     """
-    Exception to indicate error in the input files to this script.
-    This includes missing patterns, test function names and other
-    parsing errors.
+    Adds a test case with its parameters encoded to the list of test
+    cases for gen_binary_datax(). Also, generates dependency and
+    expression check code.
+
+    :param test_cases: List of test cases to append to
+    :param test_case: Test name, function name without the "test_"
+           prefix, dependencies and parameters of the test case
+    :param func_info: Dict keyed by function and with function id
+           and arguments info
+    :param options: DataOptions with the InternTables to track unique
+           dependencies and expressions and the resolved expressions
+    :return: Dependency and expression check code
     """
-    pass
+    test_name, function_name, test_dependencies, test_args = test_case
+    func_id, func_args = get_test_function(test_name, function_name,
+                                           test_args, func_info)
+    dep_ids, dep_check_code = intern_dependencies(
+        test_dependencies, options.unique_dependencies)
+    params, expression_code = intern_parameters(
+        test_args, func_args, options.unique_expressions, options.resolved)
+    test_cases.append((test_name, dep_ids, func_id,
+                       [encode_binary_parameter(typ, val)
+                        for typ, val in params]))
+    return dep_check_code, expression_code
 
 
-class FileWrapper(io.FileIO, object):
+def write_test_case(out_data_f, test_case, func_info, options):
     """
-    This class extends built-in io.FileIO class with attribute line_no,
-    that indicates line number for the line that is read.
+    Writes a test case to the text intermediate data file. Also,
+    generates dependency and expression check code.
+
+    :param out_data_f: Output intermediate data file
+    :param test_case: Test name, function name without the "test_"
+           prefix, dependencies and parameters of the test case
+    :param func_info: Dict keyed by function and with function id
+           and arguments info
+    :param options: DataOptions with the InternTables to track unique
+           dependencies and expressions and the resolved expressions
+    :return: Dependency and expression check code
     """
+    test_name, function_name, test_dependencies, test_args = test_case
+    func_id, func_args = get_test_function(test_name, function_name,
+                                           test_args, func_info)
+    out_data_f.write(test_name + '\n')
 
-    def __init__(self, file_name):
-        """
-        Instantiate the base class and initialize the line number to 0.
+    # Write dependencies
+    dep_check_code = write_dependencies(out_data_f, test_dependencies,
+                                        options.unique_dependencies)
 
-        :param file_name: File path to open.
-        """
-        super(FileWrapper, self).__init__(file_name, 'r')
-        self._line_no = 0
+    # Write test function name
+    out_data_f.write(str(func_id))
 
-    def next(self):
-        """
-        Python 2 iterator method. This method overrides base class's
-        next method and extends the next method to count the line
-        numbers as each line is read.
+    # Write parameters
+    expression_code = write_parameters(out_data_f, test_args, func_args,
+                                       options.unique_expressions,
+                                       options.resolved)
 
-        It works for both Python 2 and Python 3 by checking iterator
-        method name in the base iterator object.
+    # Write a newline as test case separator
+    out_data_f.write('\n')
+    return dep_check_code, expression_code
 
-        :return: Line read from file.
-        """
-        parent = super(FileWrapper, self)
-        if hasattr(parent, '__next__'):
-            line = parent.__next__()  # Python 3
-        else:
-            line = parent.next()  # Python 2
-        if line is not None:
-            self._line_no += 1
-            # Convert byte array to string with correct encoding and
-            # strip any whitespaces added in the decoding process.
-            return line.decode(sys.getdefaultencoding()).rstrip() + '\n'
-        return None
 
-    # Python 3 iterator method
-    __next__ = next
+def gen_manifest_entry(test_case, func_info, resolved=None):
+    """
+    Generates manifest entry of a test case. Parameter sizes are the
+    sizes in bytes of the parameters encoded as in the binary
+    intermediate data file, type code included.
 
-    def get_line_no(self):
-        """
-        Gives current line number.
-        """
-        return self._line_no
+    :param test_case: Test case name, test function name without the
+           "test_" prefix, dependencies and parameters as from
+           parse_test_data()
+    :param func_info: Dict keyed by function and with function id
+           and arguments info
+    :param resolved: Optional dict of expression to value from
+           resolve_expressions()
+    :return: Dictionary describing the test case
+    """
+    test_name, function_name, test_dependencies, test_args = test_case
+    func_id, func_args = get_test_function(test_name, function_name,
+                                           test_args, func_info)
+    int_literal_match = INT_LITERAL_PATTERN.match
+    arguments = []
+    sizes = []
+    for typ, val in zip(func_args, test_args):
+        if typ == 'int' and not int_literal_match(val):
+            if resolved and val in resolved:
+                val = str(resolved[val])
+            else:
+                # Expression Ids are not known here, they are all the
+                # same size.
+                typ = 'exp'
+                val = 0
+        arguments.append(typ)
+        sizes.append(len(encode_binary_parameter(typ, val)))
+    return {'name': test_name,
+            'function': 'test_' + function_name,
+            'function_id': func_id,
+            'dependencies': list(test_dependencies),
+            'arguments': arguments,
+            'parameter_sizes': sizes}
+
+
+def read_probe_suite(funcs_file, data_file):
+    """
+    Reads the code and expressions of a test suite for
+    resolve_expressions().
 
-    line_no = property(get_line_no)
+    :param funcs_file: Functions file name
+    :param data_file: Data file name
+    :return: Data file name, suite dependencies, function code and list
+             of expressions
+    """
+    snippets = {}
+    suite_dependencies, func_info = parse_function_file(funcs_file,
+                                                        snippets)
+    return (data_file, suite_dependencies, snippets['functions_code'],
+            list(collect_expressions(data_file, func_info)))
 
 
-def split_dep(dep):
+def gen_probe_header(shared_inputs):
     """
-    Split NOT character '!' from dependency. Used by gen_dependencies()
+    Generates the template code that precedes the test suite code, for
+    resolve_expressions().
 
-    :param dep: Dependency list
-    :return: string tuple. Ex: ('!', MACRO) for !MACRO and ('', MACRO) for
-             MACRO.
+    :param shared_inputs: Shared inputs from read_shared_inputs()
+    :return: C code
     """
-    return ('!', dep[1:]) if dep[0] == '!' else ('', dep)
+    snippets = {'generator_script': os.path.basename(__file__)}
+    read_code_from_input_files(shared_inputs, [''], snippets)
+    code = []
+    for literal, name in shared_inputs['template']:
+        code.append(literal)
+        if name == 'functions_code':
+            break
+        if name is not None:
+            code.append('%s' % (snippets.get(name, ''),))
+    return ''.join(code)
 
 
-def gen_dependencies(dependencies):
+def resolve_task_expressions(tasks, shared_inputs, command):
     """
-    Test suite data and functions specifies compile time dependencies.
-    This function generates C preprocessor code from the input
-    dependency list. Caller uses the generated preprocessor code to
-    wrap dependent code.
-    A dependency in the input list can have a leading '!' character
-    to negate a condition. '!' is separated from the dependency using
-    function split_dep() and proper preprocessor check is generated
-    accordingly.
-
-    :param dependencies: List of dependencies.
-    :return: if defined and endif code with macro annotations for
-             readability.
+    Evaluates the expressions of the data files of tasks with
+    resolve_expressions() and sets the resolved_expressions of each
+    data file.
+
+    :param tasks: List of dictionaries of generate_code() or
+                  generate_merged_code() parameters
+    :param shared_inputs: Shared inputs from read_shared_inputs()
+    :param command: Preprocessor command and options, e.g. ['cc', '-E']
+    :return:
     """
-    dep_start = ''.join(['#if %sdefined(%s)\n' % (x, y) for x, y in
-                         map(split_dep, dependencies)])
-    dep_end = ''.join(['#endif /* %s */\n' %
-                       x for x in reversed(dependencies)])
+    data_tasks = [sibling for task in tasks
+                  for sibling in task.get('siblings', [task])]
+    resolved = resolve_expressions(
+        gen_probe_header(shared_inputs),
+        [read_probe_suite(task['funcs_file'], task['data_file'])
+         for task in data_tasks], command)
+    for task, task_resolved in zip(data_tasks, resolved):
+        task['resolved_expressions'] = task_resolved
 
-    return dep_start, dep_end
 
+def find_duplicate_test_cases(data_files):
+    """
+    Finds test cases that call the same test function with the same
+    dependencies and arguments as an earlier test case, in the same
+    data file or in a data file before it in the list. Running them
+    repeats identical work.
+
+    :param data_files: List of the data files of a functions file
+    :return: List of duplicates as (data file, test case index, line
+             number, test name) tuples, each followed by the (data
+             file, line number, test name) tuple of the first test
+             case it duplicates.
+    """
+    first_test_cases = {}
+    duplicates = []
+    for data_file in data_files:
+        with FileWrapper(data_file) as data_f:
+            for index, (test_name, function_name, test_dependencies,
+                        test_args) in enumerate(parse_test_data(data_f)):
+                key = (function_name, tuple(test_dependencies),
+                       tuple(test_args))
+                location = (data_file, data_f.line_no, test_name)
+                if key in first_test_cases:
+                    duplicates.append(((data_file, index, data_f.line_no,
+                                        test_name), first_test_cases[key]))
+                else:
+                    first_test_cases[key] = location
+    return duplicates
+
+
+def select_test_cases(data_f, suite_dependencies, options):
+    """
+    Gives the test cases of a data file that are not left out as per
+    the skip_tests and config options of gen_from_test_data(). The
+    dependencies of a test case that are known to be met as per config
+    are dropped.
 
-def gen_dependencies_one_line(dependencies):
+    :param data_f: Data file object
+    :param suite_dependencies: Test suite dependencies
+    :param options: DataOptions
+    :return: Generator that yields test name, function name,
+             dependency list and function argument list.
     """
-    Similar to gen_dependencies() but generates dependency checks in one line.
-    Useful for generating code with #else block.
+    suite_unmet = []
+    if options.config is not None:
+        suite_unmet = resolve_dependencies(suite_dependencies,
+                                           options.config)[0]
+    for index, (test_name, function_name, test_dependencies, test_args) in \
+            enumerate(parse_test_data(data_f)):
+        if options.skip_tests and index in options.skip_tests:
+            continue
+        if options.config is not None:
+            unmet, test_dependencies = resolve_dependencies(
+                test_dependencies, options.config)
+            if suite_unmet or unmet:
+                if options.pruned is not None:
+                    options.pruned.append((test_name, suite_unmet + unmet))
+                continue
+        yield test_name, function_name, test_dependencies, test_args
+
+
+def add_used_function(function_name, all_func_info, func_info,
+                      used_functions):
+    """
+    Allocates an Id to a test function when it is first called, see
+    the used_functions option of gen_from_test_data().
 
-    :param dependencies: List of dependencies.
-    :return: Preprocessor check code
+    :param function_name: Test function name without the "test_" prefix
+    :param all_func_info: Dict keyed by function and with arguments
+           info of all the functions of the functions file
+    :param func_info: Dict keyed by function and with function id
+           and arguments info of the functions called so far
+    :param used_functions: InternTable of the functions called so far
+    :return:
     """
-    defines = '#if ' if dependencies else ''
-    defines += ' && '.join(['%sdefined(%s)' % (x, y) for x, y in map(
-        split_dep, dependencies)])
-    return defines
+    test_function_name = 'test_' + function_name
+    if test_function_name in all_func_info and \
+            test_function_name not in func_info:
+        func_id = used_functions.intern(test_function_name)[0]
+        func_info[test_function_name] = \
+            (func_id, all_func_info[test_function_name][1])
 
 
-def gen_function_wrapper(name, local_vars, args_dispatch):
+def gen_from_test_data(data_f, out_data_f, func_info, suite_dependencies,
+                       options=None):
     """
-    Creates test function wrapper code. A wrapper has the code to
-    unpack parameters from parameters[] array.
+    This function reads test case name, dependencies and test vectors
+    from the .data file. This information is correlated with the test
+    functions file for generating an intermediate data file replacing
+    the strings for test function names, dependencies and integer
+    constant expressions with identifiers. Mainly for optimising
+    space for on-target execution.
+    It also generates test case dependency check code and expression
+    evaluation code.
+
+    options is a DataOptions with following optional fields:
+    binary: Write binary intermediate data file content from
+            gen_binary_datax() instead of text. out_data_f must be a
+            binary file in that case.
+    manifest: List. A manifest entry from gen_manifest_entry() is
+              appended to it for each test case.
+    skip_tests: Set of indices of the test cases in the data file to
+                leave out.
+    config: Configuration macros from read_config(). Test cases with
+            known unmet test suite or test case dependencies are left
+            out and only the dependencies that are not known are
+            checked at run time.
+    pruned: List. A (test name, unmet dependencies) tuple is appended
+            to it for each test case left out as per config.
+    resolved: Dict of expression to value from resolve_expressions().
+              These expressions are written as int values instead of
+              expression Ids.
+    used_functions: InternTable. The test functions called by the test
+                    cases written are added to it and function Ids are
+                    allocated in that order instead of taken from
+                    func_info, so that the functions that are not
+                    called can be left out, see gen_functions_code().
+    unique_dependencies: InternTable of dependencies, to share
+                         dependency Ids with other data files. Check
+                         code is only generated for the dependencies
+                         added to it.
+    unique_expressions: InternTable of expressions, like
+                        unique_dependencies.
 
-    :param name: Test function name
-    :param local_vars: Local variables declaration code
-    :param args_dispatch: List of dispatch arguments.
-           Ex: ['(char *)params[0]', '*((int *)params[1])']
-    :return: Test function wrapper.
+    :param data_f: Data file object
+    :param out_data_f: Output intermediate data file
+    :param func_info: Dict keyed by function and with function id
+           and arguments info
+    :param suite_dependencies: Test suite dependencies
+    :param options: Optional DataOptions
+    :return: Returns dependency and expression check code. Raises
+             GeneratorInputError listing the invalid test cases with
+             their file name and line number if any.
     """
-    # Then create the wrapper
-    wrapper = '''
-void {name}_wrapper( void ** params )
-{{
-{unused_params}{locals}
-    {name}( {args} );
-}}
-'''.format(name=name,
-           unused_params='' if args_dispatch else '    (void)params;\n',
-           args=', '.join(args_dispatch),
-           locals=local_vars)
-    return wrapper
+    if options is None:
+        options = DataOptions()
+    if options.unique_dependencies is None:
+        options = options._replace(unique_dependencies=InternTable())
+    if options.unique_expressions is None:
+        options = options._replace(unique_expressions=InternTable())
+    check_code = []
+    binary_test_cases = []
+    errors = []
+    if options.used_functions is not None:
+        all_func_info = func_info
+        func_info = {}
+    for test_case in select_test_cases(data_f, suite_dependencies, options):
+        if options.used_functions is not None:
+            add_used_function(test_case[1], all_func_info, func_info,
+                              options.used_functions)
+        try:
+            if options.binary:
+                check_code.append(add_binary_test_case(
+                    binary_test_cases, test_case, func_info, options))
+            else:
+                check_code.append(write_test_case(
+                    out_data_f, test_case, func_info, options))
+        except GeneratorInputError as error:
+            # Carry on to report the errors in all the test cases at once
+            errors.append('%s:%d: %s: %s' % (data_f.name, data_f.line_no,
+                                             test_case[0], error))
+            continue
+        if options.manifest is not None:
+            options.manifest.append(gen_manifest_entry(
+                test_case, func_info, options.resolved))
 
+    if errors:
+        raise GeneratorInputError('\n'.join(errors))
+    if options.binary:
+        out_data_f.write(gen_binary_datax(binary_test_cases))
+    return gen_suite_dep_checks(suite_dependencies,
+                                ''.join(code[0] for code in check_code),
+                                ''.join(code[1] for code in check_code))
 
-def gen_dispatch(name, dependencies):
-    """
-    Test suite code template main_test.function defines a C function
-    array to contain test case functions. This function generates an
-    initializer entry for a function in that array. The entry is
-    composed of a compile time check for the test function
-    dependencies. At compile time the test function is assigned when
-    dependencies are met, else NULL is assigned.
 
-    :param name: Test function name
-    :param dependencies: List of dependencies
-    :return: Dispatch code.
+def add_input_info(funcs_file, data_files, template_file,
+                   c_file, snippets):
     """
-    if dependencies:
-        preprocessor_check = gen_dependencies_one_line(dependencies)
-        dispatch_code = '''
-{preprocessor_check}
-    {name}_wrapper,
-#else
-    NULL,
-#endif
-'''.format(preprocessor_check=preprocessor_check, name=name)
-    else:
-        dispatch_code = '''
-    {name}_wrapper,
-'''.format(name=name)
+    Add generator input info in snippets.
 
-    return dispatch_code
+    :param funcs_file: Functions file object
+    :param data_files: List of data file objects
+    :param template_file: Template file object
+    :param c_file: Output C file object
+    :param snippets: Dictionary to contain code pieces to be
+                     substituted in the template.
+    :return:
+    """
+    snippets['test_file'] = c_file
+    snippets['test_main_file'] = template_file
+    snippets['test_case_file'] = funcs_file
+    # One data file per line in the header comment of the template
+    snippets['test_case_data_file'] = ('\n *' + ' ' * 28).join(data_files)
 
 
-def parse_until_pattern(funcs_f, end_regex):
+def read_shared_inputs(template_file, platform_file, helpers_file):
     """
-    Matches pattern end_regex to the lines read from the file object.
-    Returns the lines read until end pattern is matched.
+    Read the input files that are common to all test suites i.e.
+    template, platform and helpers files. When generating several
+    suites in one run, these are read only once and shared by all
+    the suites.
 
-    :param funcs_f: file object for .function file
-    :param end_regex: Pattern to stop parsing
-    :return: Lines read before the end pattern
+    :param template_file: Template file name
+    :param platform_file: Platform file name
+    :param helpers_file: Helper functions file name
+    :return: Dictionary with the file names, their contents and the
+             compiled template.
     """
-    headers = '#line %d "%s"\n' % (funcs_f.line_no + 1, funcs_f.name)
-    for line in funcs_f:
-        if re.search(end_regex, line):
-            break
-        headers += line
-    else:
-        raise GeneratorInputError("file: %s - end pattern [%s] not found!" %
-                                  (funcs_f.name, end_regex))
+    with open(template_file, 'r') as template_f, \
+            open(platform_file, 'r') as platform_f, \
+            open(helpers_file, 'r') as help_f:
+        return gen_shared_inputs((template_file, template_f.read()),
+                                 (platform_file, platform_f.read()),
+                                 (helpers_file, help_f.read()))
 
-    return headers
 
+def gen_shared_inputs(template, platform, helpers):
+    """
+    Gives the shared inputs of read_shared_inputs() from the contents
+    of the template, platform and helpers files.
+
+    :param template: Template file name and content tuple
+    :param platform: Platform file name and content tuple
+    :param helpers: Helper functions file name and content tuple
+    :return: Dictionary with the file names, their contents and the
+             compiled template.
+    """
+    template_file, template_code = template
+    platform_file, platform_code = platform
+    helpers_file, helpers_code = helpers
+    template_lines = template_code.splitlines(True)
+    return {'template_file': template_file,
+            'template_lines': template_lines,
+            'template': compile_template(template_lines),
+            'platform_file': platform_file,
+            'platform_code': platform_code,
+            'helpers_file': helpers_file,
+            'helpers_code': helpers_code}
+
+
+def read_code_from_input_files(shared_inputs, out_data_files, snippets):
+    """
+    Create substitutions for replacement strings in the template file
+    from the code read from the shared input files.
 
-def validate_dependency(dependency):
+    :param shared_inputs: Shared input files info from read_shared_inputs()
+    :param out_data_files: List of output intermediate data file objects
+    :param snippets: Dictionary to contain code pieces to be
+                     substituted in the template.
+    :return:
     """
-    Validates a C macro and raises GeneratorInputError on invalid input.
-    :param dependency: Input macro dependency
-    :return: input dependency stripped of leading & trailing white spaces.
+    snippets['test_common_helper_file'] = shared_inputs['helpers_file']
+    snippets['test_common_helpers'] = shared_inputs['helpers_code']
+    snippets['test_platform_file'] = shared_inputs['platform_file']
+    # DATA_FILE is in a string literal in an array initializer. Several
+    # files are substituted as a list of string literals.
+    snippets['platform_code'] = shared_inputs['platform_code'].replace(
+        'DATA_FILE', '", "'.join(
+            out_data_file.replace('\\', '\\\\')  # escape '\'
+            for out_data_file in out_data_files))
+
+
+def compile_template(template_lines):
     """
-    dependency = dependency.strip()
-    if not re.match(C_IDENTIFIER_REGEX, dependency, re.I):
-        raise GeneratorInputError('Invalid dependency %s' % dependency)
-    return dependency
+    Parses template lines into segments of literal text, each followed
+    by the name of the placeholder substituted after it. Placeholders
+    use the string.Template syntax. $line_no is resolved here, since
+    it depends only on the line it appears on.
+
+    :param template_lines: Lines read from the template file
+    :return: List of (literal text, placeholder name) tuples. Name is
+             None for the last segment.
+    """
+    segments = []
+    literal = []
+    for line_no, line in enumerate(template_lines, 1):
+        pos = 0
+        for match in string.Template.pattern.finditer(line):
+            literal.append(line[pos:match.start()])
+            pos = match.end()
+            name = match.group('named') or match.group('braced')
+            if name == 'line_no':
+                # +1 as #line directive sets next line number
+                literal.append(str(line_no + 1))
+            elif name is not None:
+                segments.append((''.join(literal), name))
+                literal = []
+            elif match.group('escaped') is not None:
+                literal.append(string.Template.delimiter)
+            else:
+                raise ValueError('Invalid placeholder in template: '
+                                 'line %d, col %d' %
+                                 (line_no, match.start('invalid') + 1))
+        literal.append(line[pos:])
+    segments.append((''.join(literal), None))
+    return segments
 
 
-def parse_dependencies(inp_str):
+def render_template(template, snippets):
     """
-    Parses dependencies out of inp_str, validates them and returns a
-    list of macros.
+    Substitutes snippets in a compiled template.
 
-    :param inp_str: Input string with macros delimited by ':'.
-    :return: list of dependencies
+    :param template: Segments from compile_template()
+    :param snippets: Dictionary of placeholder values
+    :return: Rendered text
     """
-    dependencies = [dep for dep in map(validate_dependency,
-                                       inp_str.split(':'))]
-    return dependencies
+    out = []
+    for literal, name in template:
+        out.append(literal)
+        if name is not None:
+            out.append('%s' % (snippets[name],))
+    return ''.join(out)
 
 
-def parse_suite_dependencies(funcs_f):
+def read_function_sections(funcs_file, content=None):
     """
-    Parses test suite dependencies specified at the top of a
-    .function file, that starts with pattern BEGIN_DEPENDENCIES
-    and end with END_DEPENDENCIES. Dependencies are specified
-    after pattern 'depends_on:' and are delimited by ':'.
+    Parses a functions file into its sections. Parsed sections are
+    memoised, since several data files share a functions file.
 
-    :param funcs_f: file object for .function file
-    :return: List of test suite dependencies.
+    :param funcs_file: Functions file name
+    :param content: Optional functions file content, read from
+                    funcs_file if not given.
+    :return: Sections as returned by parse_function_sections()
     """
-    dependencies = []
-    for line in funcs_f:
-        match = re.search(DEPENDENCY_REGEX, line.strip())
-        if match:
-            try:
-                dependencies = parse_dependencies(match.group('dependencies'))
-            except GeneratorInputError as error:
-                raise GeneratorInputError(
-                    str(error) + " - %s:%d" % (funcs_f.name, funcs_f.line_no))
-        if re.search(END_DEP_REGEX, line):
-            break
+    if content is None:
+        digest = file_digest(funcs_file)
     else:
-        raise GeneratorInputError("file: %s - end dependency pattern [%s]"
-                                  " not found!" % (funcs_f.name,
-                                                   END_DEP_REGEX))
+        if not isinstance(content, bytes):
+            content = content.encode(sys.getdefaultencoding())
+        digest = hashlib.sha256(content).hexdigest()
+    parsed = PARSED_FUNCTIONS.get(funcs_file)
+    if parsed is None or parsed[0] != digest:
+        with FileWrapper(funcs_file, content) as funcs_f:
+            parsed = (digest, parse_function_sections(funcs_f))
+        PARSED_FUNCTIONS[funcs_file] = parsed
+    return parsed[1]
+
+
+def add_functions_code(sections, snippets, used_functions=None):
+    """
+    Generate function dispatch code from the sections of a functions
+    file.
 
-    return dependencies
+    :param sections: Sections from read_function_sections()
+    :param snippets: Dictionary to contain code pieces to be
+                     substituted in the template.
+    :param used_functions: Optional names of the test functions to
+                           generate code for, in function Id order.
+                           All if not given.
+    :return: Test suite dependencies and function info
+    """
+    suite_dependencies, dispatch_code, func_code, func_info = \
+        gen_functions_code(sections, used_functions)
+    snippets['functions_code'] = func_code
+    snippets['dispatch_code'] = dispatch_code
+    snippets['function_names_code'] = gen_function_names(func_info)
+    return suite_dependencies, func_info
 
 
-def parse_function_dependencies(line):
+def parse_function_file(funcs_file, snippets, content=None,
+                        used_functions=None):
     """
-    Parses function dependencies, that are in the same line as
-    comment BEGIN_CASE. Dependencies are specified after pattern
-    'depends_on:' and are delimited by ':'.
+    Parse function file and generate function dispatch code.
 
-    :param line: Line from .function file that has dependencies.
-    :return: List of dependencies.
+    :param funcs_file: Functions file name
+    :param snippets: Dictionary to contain code pieces to be
+                     substituted in the template.
+    :param content: Optional functions file content, read from
+                    funcs_file if not given.
+    :param used_functions: Optional names of the test functions to
+                           generate code for, in function Id order.
+                           All if not given.
+    :return: Test suite dependencies and function info
     """
-    dependencies = []
-    match = re.search(BEGIN_CASE_REGEX, line)
-    dep_str = match.group('depends_on')
-    if dep_str:
-        match = re.search(DEPENDENCY_REGEX, dep_str)
-        if match:
-            dependencies += parse_dependencies(match.group('dependencies'))
+    return add_functions_code(read_function_sections(funcs_file, content),
+                              snippets, used_functions)
 
-    return dependencies
 
-
-def parse_function_arguments(line):
+def gen_intermediate_data(data_file, suite_dependencies, func_info,
+                          options=None, content=None):
     """
-    Parses test function signature for validation and generates
-    a dispatch wrapper function that translates input test vectors
-    read from the data file into test function arguments.
+    Generates intermediate data from input data file and information
+    read from functions file.
 
-    :param line: Line from .function file that has a function
-                 signature.
-    :return: argument list, local variables for
-             wrapper function and argument dispatch code.
+    :param data_file: Data file name
+    :param suite_dependencies: List of suite dependencies.
+    :param func_info: Function info parsed from functions file.
+    :param options: Optional DataOptions, see gen_from_test_data()
+    :param content: Optional data file content, read from data_file
+                    if not given.
+    :return: Intermediate data, bytes if binary else text, dependency
+             check code and expression check code.
     """
-    args = []
-    local_vars = ''
-    args_dispatch = []
-    arg_idx = 0
-    # Remove characters before arguments
-    line = line[line.find('(') + 1:]
-    # Process arguments, ex: <type> arg1, <type> arg2 )
-    # This script assumes that the argument list is terminated by ')'
-    # i.e. the test functions will not have a function pointer
-    # argument.
-    for arg in line[:line.find(')')].split(','):
-        arg = arg.strip()
-        if arg == '':
-            continue
-        if re.search(INT_CHECK_REGEX, arg.strip()):
-            args.append('int')
-            args_dispatch.append('*( (int *) params[%d] )' % arg_idx)
-        elif re.search(CHAR_CHECK_REGEX, arg.strip()):
-            args.append('char*')
-            args_dispatch.append('(char *) params[%d]' % arg_idx)
-        elif re.search(DATA_T_CHECK_REGEX, arg.strip()):
-            args.append('hex')
-            # create a structure
-            pointer_initializer = '(uint8_t *) params[%d]' % arg_idx
-            len_initializer = '*( (uint32_t *) params[%d] )' % (arg_idx+1)
-            local_vars += """    data_t data%d = {%s, %s};
-""" % (arg_idx, pointer_initializer, len_initializer)
-
-            args_dispatch.append('&data%d' % arg_idx)
-            arg_idx += 1
-        else:
-            raise ValueError("Test function arguments can only be 'int', "
-                             "'char *' or 'data_t'\n%s" % line)
-        arg_idx += 1
-
-    return args, local_vars, args_dispatch
+    binary = options is not None and options.binary
+    out_data_f = io.BytesIO() if binary else StringIO()
+    with FileWrapper(data_file, content) as data_f:
+        dep_check_code, expression_code = gen_from_test_data(
+            data_f, out_data_f, func_info, suite_dependencies, options)
+    return out_data_f.getvalue(), dep_check_code, expression_code
 
 
-def generate_function_code(name, code, local_vars, args_dispatch,
-                           dependencies):
+def generate_intermediate_data_file(data_file, out_data_file, functions,
+                                    snippets, options=None):
     """
-    Generate function code with preprocessor checks and parameter dispatch
-    wrapper.
+    Generates intermediate data file from input data file and
+    information read from functions file.
 
-    :param name: Function name
-    :param code: Function code
-    :param local_vars: Local variables for function wrapper
-    :param args_dispatch: Argument dispatch code
-    :param dependencies: Preprocessor dependencies list
-    :return: Final function code
+    :param data_file: Data file name
+    :param out_data_file: Output/Intermediate data file
+    :param functions: Suite dependencies and function info as returned
+                      by parse_function_file()
+    :param snippets: Dictionary to contain code pieces to be
+                     substituted in the template.
+    :param options: Optional DataOptions, see gen_from_test_data()
+    :return:
     """
-    # Add exit label if not present
-    if code.find('exit:') == -1:
-        split_code = code.rsplit('}', 1)
-        if len(split_code) == 2:
-            code = """exit:
-    ;
-}""".join(split_code)
+    suite_dependencies, func_info = functions
+    out_data, snippets['dep_check_code'], snippets['expression_code'] = \
+        gen_intermediate_data(data_file, suite_dependencies, func_info,
+                              options)
+    write_file_if_changed(out_data_file, out_data,
+                          options is not None and options.binary)
 
-    code += gen_function_wrapper(name, local_vars, args_dispatch)
-    preprocessor_check_start, preprocessor_check_end = \
-        gen_dependencies(dependencies)
-    return preprocessor_check_start + code + preprocessor_check_end
 
-
-def parse_function_code(funcs_f, dependencies, suite_dependencies):
+def write_test_source_file(template, c_file, snippets):
     """
-    Parses out a function from function file object and generates
-    function and dispatch code.
+    Write output source file with generated source code.
 
-    :param funcs_f: file object of the functions file.
-    :param dependencies: List of dependencies
-    :param suite_dependencies: List of test suite dependencies
-    :return: Function name, arguments, function code and dispatch code.
-    """
-    line_directive = '#line %d "%s"\n' % (funcs_f.line_no + 1, funcs_f.name)
-    code = ''
-    has_exit_label = False
-    for line in funcs_f:
-        # Check function signature. Function signature may be split
-        # across multiple lines. Here we try to find the start of
-        # arguments list, then remove '\n's and apply the regex to
-        # detect function start.
-        up_to_arg_list_start = code + line[:line.find('(') + 1]
-        match = re.match(TEST_FUNCTION_VALIDATION_REGEX,
-                         up_to_arg_list_start.replace('\n', ' '), re.I)
-        if match:
-            # check if we have full signature i.e. split in more lines
-            name = match.group('func_name')
-            if not re.match(FUNCTION_ARG_LIST_END_REGEX, line):
-                for lin in funcs_f:
-                    line += lin
-                    if re.search(FUNCTION_ARG_LIST_END_REGEX, line):
-                        break
-            args, local_vars, args_dispatch = parse_function_arguments(
-                line)
-            code += line
-            break
-        code += line
-    else:
-        raise GeneratorInputError("file: %s - Test functions not found!" %
-                                  funcs_f.name)
+    :param template: Template compiled by compile_template()
+    :param c_file: Output source file
+    :param snippets: Generated and code snippets
+    :return:
+    """
+    write_file_if_changed(c_file, render_template(template, snippets))
 
-    # Prefix test function name with 'test_'
-    code = code.replace(name, 'test_' + name, 1)
-    name = 'test_' + name
 
-    for line in funcs_f:
-        if re.search(END_CASE_REGEX, line):
-            break
-        if not has_exit_label:
-            has_exit_label = \
-                re.search(EXIT_LABEL_REGEX, line.strip()) is not None
-        code += line
-    else:
-        raise GeneratorInputError("file: %s - end case pattern [%s] not "
-                                  "found!" % (funcs_f.name, END_CASE_REGEX))
+def gen_data_file_manifest(data, suite_dependencies, options, input_info):
+    """
+    Generates the manifest of a data file of a test suite generated by
+    gen_merged_suite().
 
-    code = line_directive + code
-    code = generate_function_code(name, code, local_vars, args_dispatch,
-                                  dependencies)
-    dispatch_code = gen_dispatch(name, suite_dependencies + dependencies)
-    return (name, args, code, dispatch_code)
+    :param data: Data file dictionary, see gen_merged_suite()
+    :param suite_dependencies: Test suite dependencies
+    :param options: DataOptions the data file was generated with
+    :param input_info: gen_merged_suite() parameters
+    :return: Manifest dictionary, None if no manifest was requested.
+    """
+    if options.manifest is None:
+        return None
+    manifest = {'version': MANIFEST_VERSION,
+                'functions_file': input_info['funcs_file'],
+                'data_file': data['data_file'],
+                'c_file': input_info['c_file'],
+                'out_data_file': data['out_data_file'],
+                'binary_datax': options.binary,
+                'suite_dependencies': list(suite_dependencies),
+                'test_cases': options.manifest}
+    if options.config is not None:
+        manifest['pruned_test_cases'] = [
+            {'name': test_name, 'unmet_dependencies': unmet}
+            for test_name, unmet in options.pruned]
+    return manifest
+
+
+def gen_merged_suite(shared_inputs, **input_info):
+    """
+    Generates the C source code of a test suite that runs several data
+    files of a functions file, and the intermediate data of each data
+    file, in memory. Function, dependency and expression Ids are shared
+    by the data files, so that the test binary can run any combination
+    of their intermediate data files. It runs all of them by default.
 
+    input_info expands to following parameters:
+    funcs_file: Functions file name
+    data_files: List of dictionaries, one per data file, with:
+        data_file: Data file name
+        out_data_file: Intermediate data file name
+        data_content: Optional. Data file content.
+        skip_tests: Optional. Indices of test cases to leave out.
+        resolved_expressions: Optional. Dict of expression to value
+                              from resolve_expressions().
+    c_file: Output C file name, used in #line directives
+    funcs_content: Optional. Functions file content.
+    binary_datax: Optional. Generate binary intermediate data.
+    manifest: Optional. Generate a manifest per data file.
+    config: Optional. Configuration macros to prune test cases.
+    profiler: Optional. PhaseProfiler measuring the generation phases.
+    :param shared_inputs: Shared inputs from read_shared_inputs() or
+                          gen_shared_inputs()
+    :return: Dictionary with:
+             c_code: Generated C source code
+             suite_dependencies: Test suite dependencies
+             functions: Dict of test function names to function Ids
+             data_files: List of dictionaries, one per data file, with
+                         out_data, pruned and manifest as returned by
+                         generate_in_memory()
+    """
+    funcs_file = input_info['funcs_file']
+    profiler = input_info.get('profiler') or PhaseProfiler(False)
 
-def parse_functions(funcs_f):
+    snippets = {'generator_script': os.path.basename(__file__)}
+    read_code_from_input_files(
+        shared_inputs,
+        [data['out_data_file'] for data in input_info['data_files']],
+        snippets)
+    add_input_info(funcs_file,
+                   [data['data_file'] for data in input_info['data_files']],
+                   shared_inputs['template_file'], input_info['c_file'],
+                   snippets)
+    with profiler.phase('parse_function_file', funcs_file):
+        sections = read_function_sections(funcs_file,
+                                          input_info.get('funcs_content'))
+    # Function Ids are allocated as the data files call the functions,
+    # only the arguments info is used.
+    func_info = dict((function[0], (func_id, function[1]))
+                     for func_id, function in enumerate(sections[2]))
+    options = DataOptions(binary=input_info.get('binary_datax', False),
+                          config=input_info.get('config'),
+                          used_functions=InternTable(),
+                          unique_dependencies=InternTable(),
+                          unique_expressions=InternTable())
+    check_code = []
+    results = []
+    for data in input_info['data_files']:
+        data_options = options._replace(
+            manifest=[] if input_info.get('manifest') else None,
+            skip_tests=data.get('skip_tests'), pruned=[],
+            resolved=data.get('resolved_expressions'))
+        with profiler.phase('generate_intermediate_data_file',
+                            data['data_file']):
+            out_data = gen_intermediate_data(data['data_file'], sections[0],
+                                             func_info, data_options,
+                                             data.get('data_content'))
+        check_code.append(out_data[1:])
+        results.append({'out_data': out_data[0],
+                        'pruned': data_options.pruned,
+                        'manifest': gen_data_file_manifest(
+                            data, sections[0], data_options, input_info)})
+    snippets['dep_check_code'] = ''.join(code[0] for code in check_code)
+    snippets['expression_code'] = ''.join(code[1] for code in check_code)
+    with profiler.phase('select_functions', funcs_file):
+        func_info = add_functions_code(sections, snippets,
+                                       options.used_functions)[1]
+    with profiler.phase('write_test_source_file', input_info['c_file']):
+        c_code = render_template(shared_inputs['template'], snippets)
+    return {'c_code': c_code,
+            'suite_dependencies': list(sections[0]),
+            'functions': dict((name, func_info[name][0])
+                              for name in func_info),
+            'data_files': results}
+
+
+def gen_suite(shared_inputs, **input_info):
     """
-    Parses a test_suite_xxx.function file and returns information
-    for generating a C source file for the test suite.
+    Generates the C source code and intermediate data of a test suite
+    in memory. Functions and data files are read from disk unless
+    their contents are given.
 
-    :param funcs_f: file object of the functions file.
-    :return: List of test suite dependencies, test function dispatch
-             code, function code and a dict with function identifiers
-             and arguments info.
+    input_info expands to following parameters:
+    funcs_file: Functions file name
+    data_file: Data file name
+    c_file: Output C file name, used in #line directives
+    out_data_file: Intermediate data file name, opened by default by
+                   the test binary
+    funcs_content: Optional. Functions file content.
+    data_content: Optional. Data file content.
+    binary_datax: Optional. Generate binary intermediate data.
+    manifest: Optional. Generate the test suite manifest.
+    skip_tests: Optional. Indices of test cases to leave out.
+    config: Optional. Configuration macros to prune test cases.
+    resolved_expressions: Optional. Dict of expression to value from
+                          resolve_expressions().
+    profiler: Optional. PhaseProfiler measuring the generation phases.
+    :param shared_inputs: Shared inputs from read_shared_inputs() or
+                          gen_shared_inputs()
+    :return: Dictionary as returned by generate_in_memory()
     """
-    suite_helpers = ''
-    suite_dependencies = []
-    suite_functions = ''
-    func_info = {}
-    function_idx = 0
-    dispatch_code = ''
-    for line in funcs_f:
-        if re.search(BEGIN_HEADER_REGEX, line):
-            suite_helpers += parse_until_pattern(funcs_f, END_HEADER_REGEX)
-        elif re.search(BEGIN_SUITE_HELPERS_REGEX, line):
-            suite_helpers += parse_until_pattern(funcs_f,
-                                                 END_SUITE_HELPERS_REGEX)
-        elif re.search(BEGIN_DEP_REGEX, line):
-            suite_dependencies += parse_suite_dependencies(funcs_f)
-        elif re.search(BEGIN_CASE_REGEX, line):
-            try:
-                dependencies = parse_function_dependencies(line)
-            except GeneratorInputError as error:
-                raise GeneratorInputError(
-                    "%s:%d: %s" % (funcs_f.name, funcs_f.line_no,
-                                   str(error)))
-            func_name, args, func_code, func_dispatch =\
-                parse_function_code(funcs_f, dependencies, suite_dependencies)
-            suite_functions += func_code
-            # Generate dispatch code and enumeration info
-            if func_name in func_info:
-                raise GeneratorInputError(
-                    "file: %s - function %s re-declared at line %d" %
-                    (funcs_f.name, func_name, funcs_f.line_no))
-            func_info[func_name] = (function_idx, args)
-            dispatch_code += '/* Function Id: %d */\n' % function_idx
-            dispatch_code += func_dispatch
-            function_idx += 1
-
-    func_code = (suite_helpers +
-                 suite_functions).join(gen_dependencies(suite_dependencies))
-    return suite_dependencies, dispatch_code, func_code, func_info
-
-
-def escaped_split(inp_str, split_char):
-    """
-    Split inp_str on character split_char but ignore if escaped.
-    Since, return value is used to write back to the intermediate
-    data file, any escape characters in the input are retained in the
-    output.
-
-    :param inp_str: String to split
-    :param split_char: Split character
-    :return: List of splits
-    """
-    if len(split_char) > 1:
-        raise ValueError('Expected split character. Found string!')
-    out = re.sub(r'(\\.)|' + split_char,
-                 lambda m: m.group(1) or '\n', inp_str,
-                 len(inp_str)).split('\n')
-    out = [x for x in out if x]
-    return out
-
-
-def parse_test_data(data_f):
-    """
-    Parses .data file for each test case name, test function name,
-    test dependencies and test arguments. This information is
-    correlated with the test functions file for generating an
-    intermediate data file replacing the strings for test function
-    names, dependencies and integer constant expressions with
-    identifiers. Mainly for optimising space for on-target
-    execution.
-
-    :param data_f: file object of the data file.
-    :return: Generator that yields test name, function name,
-             dependency list and function argument list.
+    data_keys = ('data_file', 'out_data_file', 'data_content', 'skip_tests',
+                 'resolved_expressions')
+    data = dict((key, input_info[key]) for key in data_keys
+                if key in input_info)
+    suite_info = dict((key, input_info[key]) for key in input_info
+                      if key not in data_keys)
+    suite = gen_merged_suite(shared_inputs, data_files=[data], **suite_info)
+    data = suite['data_files'][0]
+    return {'c_code': suite['c_code'],
+            'out_data': data['out_data'],
+            'suite_dependencies': suite['suite_dependencies'],
+            'functions': suite['functions'],
+            'pruned': data['pruned'],
+            'manifest': data['manifest']}
+
+
+def read_input(source):
     """
-    __state_read_name = 0
-    __state_read_args = 1
-    state = __state_read_name
-    dependencies = []
-    name = ''
-    for line in data_f:
-        line = line.strip()
-        # Skip comments
-        if line.startswith('#'):
-            continue
+    Gives the content of an input given as a string or a file-like
+    object.
 
-        # Blank line indicates end of test
-        if not line:
-            if state == __state_read_args:
-                raise GeneratorInputError("[%s:%d] Newline before arguments. "
-                                          "Test function and arguments "
-                                          "missing for %s" %
-                                          (data_f.name, data_f.line_no, name))
-            continue
+    :param source: Text, bytes or file-like object
+    :return: Content
+    """
+    if hasattr(source, 'read'):
+        return source.read()
+    return source
 
-        if state == __state_read_name:
-            # Read test name
-            name = line
-            state = __state_read_args
-        elif state == __state_read_args:
-            # Check dependencies
-            match = re.search(DEPENDENCY_REGEX, line)
-            if match:
-                try:
-                    dependencies = parse_dependencies(
-                        match.group('dependencies'))
-                except GeneratorInputError as error:
-                    raise GeneratorInputError(
-                        str(error) + " - %s:%d" %
-                        (data_f.name, data_f.line_no))
-            else:
-                # Read test vectors
-                parts = escaped_split(line, ':')
-                test_function = parts[0]
-                args = parts[1:]
-                yield name, test_function, dependencies, args
-                dependencies = []
-                state = __state_read_name
-    if state == __state_read_args:
-        raise GeneratorInputError("[%s:%d] Newline before arguments. "
-                                  "Test function and arguments missing for "
-                                  "%s" % (data_f.name, data_f.line_no, name))
-
-
-def gen_dep_check(dep_id, dep):
-    """
-    Generate code for checking dependency with the associated
-    identifier.
-
-    :param dep_id: Dependency identifier
-    :param dep: Dependency macro
-    :return: Dependency check code
-    """
-    if dep_id < 0:
-        raise GeneratorInputError("Dependency Id should be a positive "
-                                  "integer.")
-    _not, dep = ('!', dep[1:]) if dep[0] == '!' else ('', dep)
-    if not dep:
-        raise GeneratorInputError("Dependency should not be an empty string.")
-    dep_check = '''
-        case {id}:
-            {{
-#if {_not}defined({macro})
-                ret = DEPENDENCY_SUPPORTED;
-#else
-                ret = DEPENDENCY_NOT_SUPPORTED;
-#endif
-            }}
-            break;'''.format(_not=_not, macro=dep, id=dep_id)
-    return dep_check
-
-
-def gen_expression_check(exp_id, exp):
-    """
-    Generates code for evaluating an integer expression using
-    associated expression Id.
-
-    :param exp_id: Expression Identifier
-    :param exp: Expression/Macro
-    :return: Expression check code
-    """
-    if exp_id < 0:
-        raise GeneratorInputError("Expression Id should be a positive "
-                                  "integer.")
-    if not exp:
-        raise GeneratorInputError("Expression should not be an empty string.")
-    exp_code = '''
-        case {exp_id}:
-            {{
-                *out_value = {expression};
-            }}
-            break;'''.format(exp_id=exp_id, expression=exp)
-    return exp_code
-
-
-def write_dependencies(out_data_f, test_dependencies, unique_dependencies):
-    """
-    Write dependencies to intermediate test data file, replacing
-    the string form with identifiers. Also, generates dependency
-    check code.
 
-    :param out_data_f: Output intermediate data file
-    :param test_dependencies: Dependencies
-    :param unique_dependencies: Mutable list to track unique dependencies
-           that are global to this re-entrant function.
-    :return: returns dependency check code.
-    """
-    dep_check_code = ''
-    if test_dependencies:
-        out_data_f.write('depends_on')
-        for dep in test_dependencies:
-            if dep not in unique_dependencies:
-                unique_dependencies.append(dep)
-                dep_id = unique_dependencies.index(dep)
-                dep_check_code += gen_dep_check(dep_id, dep)
-            else:
-                dep_id = unique_dependencies.index(dep)
-            out_data_f.write(':' + str(dep_id))
-        out_data_f.write('\n')
-    return dep_check_code
+def generate_in_memory(funcs, data, template, platform, helpers,
+                       **options):
+    """
+    Generates a test suite in memory, without reading or writing any
+    file. This is the API for build tools that run the generator in
+    process. Inputs are given as strings or file-like objects.
+
+    options expands to following optional parameters:
+    funcs_file, data_file, template_file, platform_file, helpers_file:
+        Input file names used in #line directives and messages.
+        Default to the name attribute of file-like inputs, else to
+        the names of a suite called test_suite.
+    c_file: C file name used in #line directives. Default
+            test_suite.c.
+    out_data_file: Intermediate data file name, opened by default by
+                   the test binary. Default test_suite.datax.
+    binary_datax: Generate binary intermediate data. Default is text.
+    manifest: Generate the test suite manifest.
+    skip_tests: Indices of test cases in the data file to leave out.
+    config: Configuration macros from read_config(). Test cases that
+            are not supported by the configuration are left out.
+    resolved_expressions: Dict of expression to value, e.g. from
+                          resolve_expressions(). These expressions are
+                          written as int values.
+
+    :param funcs: Functions file
+    :param data: Data file
+    :param template: Template file
+    :param platform: Platform file
+    :param helpers: Helper functions file
+    :return: Dictionary with:
+             c_code: Generated C source code
+             out_data: Intermediate data, bytes if binary_datax else
+                       text
+             suite_dependencies: Test suite dependencies
+             functions: Dict of test function names to function Ids
+             pruned: List of (test name, unmet dependencies) tuples
+                     of the test cases left out as per config
+             manifest: Test suite manifest as written with
+                       --manifest, or None if not requested
+    """
+    names = {}
+    for key, source, default in [
+            ('funcs_file', funcs, 'test_suite.function'),
+            ('data_file', data, 'test_suite.data'),
+            ('template_file', template, 'main_test.function'),
+            ('platform_file', platform, 'host_test.function'),
+            ('helpers_file', helpers, 'helpers.function')]:
+        names[key] = options.get(key) or getattr(source, 'name', default)
+    shared_inputs = gen_shared_inputs(
+        (names['template_file'], read_input(template)),
+        (names['platform_file'], read_input(platform)),
+        (names['helpers_file'], read_input(helpers)))
+    return gen_suite(shared_inputs,
+                     funcs_file=names['funcs_file'],
+                     data_file=names['data_file'],
+                     c_file=options.get('c_file', 'test_suite.c'),
+                     out_data_file=options.get('out_data_file',
+                                               'test_suite.datax'),
+                     funcs_content=read_input(funcs),
+                     data_content=read_input(data),
+                     binary_datax=options.get('binary_datax', False),
+                     manifest=options.get('manifest', False),
+                     skip_tests=options.get('skip_tests'),
+                     config=options.get('config'),
+                     resolved_expressions=options.get(
+                         'resolved_expressions'))
 
 
-def write_parameters(out_data_f, test_args, func_args, unique_expressions):
+def generate_code(**input_info):
     """
-    Writes test parameters to the intermediate data file, replacing
-    the string form with identifiers. Also, generates expression
-    check code.
+    Generates C source code from test suite file, data file, common
+    helpers file and platform file.
 
-    :param out_data_f: Output intermediate data file
-    :param test_args: Test parameters
-    :param func_args: Function arguments
-    :param unique_expressions: Mutable list to track unique
-           expressions that are global to this re-entrant function.
-    :return: Returns expression check code.
-    """
-    expression_code = ''
-    for i, _ in enumerate(test_args):
-        typ = func_args[i]
-        val = test_args[i]
-
-        # check if val is a non literal int val (i.e. an expression)
-        if typ == 'int' and not re.match(r'(\d+|0x[0-9a-f]+)$',
-                                         val, re.I):
-            typ = 'exp'
-            if val not in unique_expressions:
-                unique_expressions.append(val)
-                # exp_id can be derived from len(). But for
-                # readability and consistency with case of existing
-                # let's use index().
-                exp_id = unique_expressions.index(val)
-                expression_code += gen_expression_check(exp_id, val)
-                val = exp_id
-            else:
-                val = unique_expressions.index(val)
-        out_data_f.write(':' + typ + ':' + str(val))
-    out_data_f.write('\n')
-    return expression_code
-
-
-def gen_suite_dep_checks(suite_dependencies, dep_check_code, expression_code):
-    """
-    Generates preprocessor checks for test suite dependencies.
-
-    :param suite_dependencies: Test suite dependencies read from the
-            .function file.
-    :param dep_check_code: Dependency check code
-    :param expression_code: Expression check code
-    :return: Dependency and expression code guarded by test suite
-             dependencies.
-    """
-    if suite_dependencies:
-        preprocessor_check = gen_dependencies_one_line(suite_dependencies)
-        dep_check_code = '''
-{preprocessor_check}
-{code}
-#endif
-'''.format(preprocessor_check=preprocessor_check, code=dep_check_code)
-        expression_code = '''
-{preprocessor_check}
-{code}
-#endif
-'''.format(preprocessor_check=preprocessor_check, code=expression_code)
-    return dep_check_code, expression_code
+    input_info expands to following parameters:
+    funcs_file: Functions file object
+    data_file: Data file object
+    template_file: Template file object
+    platform_file: Platform file object
+    helpers_file: Helper functions file object
+    suites_dir: Test suites dir
+    c_file: Output C file object
+    out_data_file: Output intermediate data file object
+    shared_inputs: Optional. Contents of template, platform and helpers
+                   files as returned by read_shared_inputs(). Read from
+                   the files if not given.
+    binary_datax: Optional. Write binary intermediate data file.
+                  Default is text.
+    manifest_file: Optional. Output JSON manifest file listing the
+                   test cases. Not written if not given.
+    skip_tests: Optional. Indices of test cases in the data file to
+                leave out.
+    config: Optional. Configuration macros from read_config(). Test
+            cases that are not supported by the configuration are left
+            out and a summary is printed.
+    resolved_expressions: Optional. Dict of expression to value from
+                          resolve_expressions().
+    profile: Optional. Measure the generation phases.
+    :return: List of phase measurements as in PhaseProfiler.records.
+             Empty if not profiling.
+    """
+    return generate_merged_code(siblings=[input_info], **input_info)
 
 
-def gen_from_test_data(data_f, out_data_f, func_info, suite_dependencies):
+def check_input_files(input_info):
     """
-    This function reads test case name, dependencies and test vectors
-    from the .data file. This information is correlated with the test
-    functions file for generating an intermediate data file replacing
-    the strings for test function names, dependencies and integer
-    constant expressions with identifiers. Mainly for optimising
-    space for on-target execution.
-    It also generates test case dependency check code and expression
-    evaluation code.
+    Checks that the input files of generate_merged_code() exist.
 
-    :param data_f: Data file object
-    :param out_data_f: Output intermediate data file
-    :param func_info: Dict keyed by function and with function id
-           and arguments info
-    :param suite_dependencies: Test suite dependencies
-    :return: Returns dependency and expression check code
-    """
-    unique_dependencies = []
-    unique_expressions = []
-    dep_check_code = ''
-    expression_code = ''
-    for test_name, function_name, test_dependencies, test_args in \
-            parse_test_data(data_f):
-        out_data_f.write(test_name + '\n')
-
-        # Write dependencies
-        dep_check_code += write_dependencies(out_data_f, test_dependencies,
-                                             unique_dependencies)
-
-        # Write test function name
-        test_function_name = 'test_' + function_name
-        if test_function_name not in func_info:
-            raise GeneratorInputError("Function %s not found!" %
-                                      test_function_name)
-        func_id, func_args = func_info[test_function_name]
-        out_data_f.write(str(func_id))
-
-        # Write parameters
-        if len(test_args) != len(func_args):
-            raise GeneratorInputError("Invalid number of arguments in test "
-                                      "%s. See function %s signature." %
-                                      (test_name, function_name))
-        expression_code += write_parameters(out_data_f, test_args, func_args,
-                                            unique_expressions)
-
-        # Write a newline as test case separator
-        out_data_f.write('\n')
-
-    dep_check_code, expression_code = gen_suite_dep_checks(
-        suite_dependencies, dep_check_code, expression_code)
-    return dep_check_code, expression_code
+    :param input_info: generate_merged_code() parameters
+    :return:
+    """
+    for name, path in [('Functions file', input_info['funcs_file'])] + \
+            [('Data file', sibling['data_file'])
+             for sibling in input_info['siblings']] + \
+            [('Template file', input_info['template_file']),
+             ('Platform file', input_info['platform_file']),
+             ('Helpers code file', input_info['helpers_file']),
+             ('Suites dir', input_info['suites_dir'])]:
+        if not os.path.exists(path):
+            raise IOError("ERROR: %s [%s] not found!" % (name, path))
 
 
-def add_input_info(funcs_file, data_file, template_file,
-                   c_file, snippets):
+def generate_merged_code(**input_info):
     """
-    Add generator input info in snippets.
-
-    :param funcs_file: Functions file object
-    :param data_file: Data file object
-    :param template_file: Template file object
-    :param c_file: Output C file object
-    :param snippets: Dictionary to contain code pieces to be
-                     substituted in the template.
+    Generates the C source code of a test suite that runs several data
+    files of a functions file, and the intermediate data file of each
+    data file. See gen_merged_suite().
+
+    input_info expands to the generate_code() parameters that are
+    common to the data files: funcs_file, template_file,
+    platform_file, helpers_file, suites_dir, c_file, shared_inputs,
+    binary_datax, config and profile, and to:
+    siblings: List of dictionaries of generate_code() parameters, one
+              per data file. Their data_file, out_data_file,
+              manifest_file, skip_tests and resolved_expressions are
+              used.
+    :return: List of phase measurements as in PhaseProfiler.records.
+             Empty if not profiling.
+    """
+    funcs_file = input_info['funcs_file']
+    siblings = input_info['siblings']
+    c_file = input_info['c_file']
+    shared_inputs = input_info.get('shared_inputs')
+    check_input_files(input_info)
+
+    profiler = PhaseProfiler(input_info.get('profile', False))
+    if shared_inputs is None:
+        with profiler.phase('read inputs', funcs_file):
+            shared_inputs = read_shared_inputs(input_info['template_file'],
+                                               input_info['platform_file'],
+                                               input_info['helpers_file'])
+    binary_datax = input_info.get('binary_datax', False)
+    suite = gen_merged_suite(
+        shared_inputs, funcs_file=funcs_file,
+        data_files=[{'data_file': sibling['data_file'],
+                     'out_data_file': sibling['out_data_file'],
+                     'skip_tests': sibling.get('skip_tests'),
+                     'resolved_expressions': sibling.get(
+                         'resolved_expressions')}
+                    for sibling in siblings],
+        c_file=c_file, binary_datax=binary_datax,
+        manifest=any(sibling.get('manifest_file') is not None
+                     for sibling in siblings),
+        config=input_info.get('config'), profiler=profiler)
+    for sibling, data in zip(siblings, suite['data_files']):
+        with profiler.phase('write_output_files', sibling['out_data_file']):
+            write_file_if_changed(sibling['out_data_file'], data['out_data'],
+                                  binary_datax)
+    with profiler.phase('write_output_files', c_file):
+        write_file_if_changed(c_file, suite['c_code'])
+    for sibling, data in zip(siblings, suite['data_files']):
+        if data['pruned']:
+            print_pruned_summary(sibling['data_file'], data['pruned'])
+        manifest_file = sibling.get('manifest_file')
+        if manifest_file:
+            with profiler.phase('write_manifest', manifest_file):
+                write_manifest(manifest_file, data['manifest'])
+    return profiler.records
+
+
+def write_manifest(manifest_file, manifest):
+    """
+    Writes a test suite manifest file. The manifest lists the test
+    cases of a suite with the resolved test function, dependencies,
+    argument types and parameter sizes, so that tools can plan test
+    runs without parsing the data file.
+
+    :param manifest_file: Manifest file name
+    :param manifest: Dictionary describing the suite, as generated by
+                     gen_suite()
     :return:
     """
-    snippets['test_file'] = c_file
-    snippets['test_main_file'] = template_file
-    snippets['test_case_file'] = funcs_file
-    snippets['test_case_data_file'] = data_file
+    write_file_if_changed(manifest_file,
+                          json.dumps(manifest, indent=1, sort_keys=True,
+                                     separators=(',', ': ')))
 
 
-def read_code_from_input_files(platform_file, helpers_file,
-                               out_data_file, snippets):
+def get_functions_file(data_file, suites_dir):
     """
-    Read code from input files and create substitutions for replacement
-    strings in the template file.
+    Gives the functions file for a data file. As per the naming
+    convention followed by the build scripts, functions file's base
+    name is the word before the first dot in the data file's base name.
+    Ex: suites/test_suite_aes.cbc.data -> suites/test_suite_aes.function
 
-    :param platform_file: Platform file object
-    :param helpers_file: Helper functions file object
-    :param out_data_file: Output intermediate data file object
-    :param snippets: Dictionary to contain code pieces to be
-                     substituted in the template.
-    :return:
+    :param data_file: Data file name
+    :param suites_dir: Test suites dir
+    :return: Functions file name
     """
-    # Read helpers
-    with open(helpers_file, 'r') as help_f, open(platform_file, 'r') as \
-            platform_f:
-        snippets['test_common_helper_file'] = helpers_file
-        snippets['test_common_helpers'] = help_f.read()
-        snippets['test_platform_file'] = platform_file
-        snippets['platform_code'] = platform_f.read().replace(
-            'DATA_FILE', out_data_file.replace('\\', '\\\\'))  # escape '\'
+    data_name = os.path.basename(data_file)
+    return os.path.join(suites_dir, data_name.split('.')[0] + '.function')
 
 
-def write_test_source_file(template_file, c_file, snippets):
+def find_suites(suites_dir):
     """
-    Write output source file with generated source code.
+    Finds all test suites in the suites dir.
 
-    :param template_file: Template file name
-    :param c_file: Output source file
-    :param snippets: Generated and code snippets
-    :return:
+    :param suites_dir: Test suites dir
+    :return: List of (functions file, data file) tuples.
     """
-    with open(template_file, 'r') as template_f, open(c_file, 'w') as c_f:
-        for line_no, line in enumerate(template_f.readlines(), 1):
-            # Update line number. +1 as #line directive sets next line number
-            snippets['line_no'] = line_no + 1
-            code = string.Template(line).substitute(**snippets)
-            c_f.write(code)
+    data_files = sorted(glob.glob(os.path.join(suites_dir,
+                                               'test_suite_*.data')))
+    return [(get_functions_file(data_file, suites_dir), data_file)
+            for data_file in data_files]
 
 
-def parse_function_file(funcs_file, snippets):
+def get_output_files(data_file, out_dir):
     """
-    Parse function file and generate function dispatch code.
+    Gives output C file and intermediate data file names for a data
+    file. Output files have the same base name as the data file.
+
+    :param data_file: Data file name
+    :param out_dir: Output dir
+    :return: Output C file and intermediate data file names.
+    """
+    data_name = os.path.splitext(os.path.basename(data_file))[0]
+    return (os.path.join(out_dir, data_name + '.c'),
+            os.path.join(out_dir, data_name + '.datax'))
+
+
+def get_merged_c_file(funcs_file, out_dir):
+    """
+    Gives output C file name of the merged test suite of a functions
+    file. It has the same base name as the functions file.
+    Ex: suites/test_suite_gcm.function -> test_suite_gcm.c
 
     :param funcs_file: Functions file name
-    :param snippets: Dictionary to contain code pieces to be
-                     substituted in the template.
-    :return:
+    :param out_dir: Output dir
+    :return: Output C file name
     """
-    with FileWrapper(funcs_file) as funcs_f:
-        suite_dependencies, dispatch_code, func_code, func_info = \
-            parse_functions(funcs_f)
-        snippets['functions_code'] = func_code
-        snippets['dispatch_code'] = dispatch_code
-        return suite_dependencies, func_info
+    funcs_name = os.path.splitext(os.path.basename(funcs_file))[0]
+    return os.path.join(out_dir, funcs_name + '.c')
 
 
-def generate_intermediate_data_file(data_file, out_data_file,
-                                    suite_dependencies, func_info, snippets):
+def merge_tasks(tasks, out_dir):
     """
-    Generates intermediate data file from input data file and
-    information read from functions file.
+    Merges the tasks of the data files of each functions file into one
+    task generating the merged test suite, see generate_merged_code().
 
-    :param data_file: Data file name
-    :param out_data_file: Output/Intermediate data file
-    :param suite_dependencies: List of suite dependencies.
-    :param func_info: Function info parsed from functions file.
-    :param snippets: Dictionary to contain code pieces to be
-                     substituted in the template.
-    :return:
+    :param tasks: List of dictionaries of generate_code() parameters
+    :param out_dir: Output dir
+    :return: List of dictionaries of generate_merged_code() parameters,
+             in the order of the first task of each functions file.
     """
-    with FileWrapper(data_file) as data_f, \
-            open(out_data_file, 'w') as out_data_f:
-        dep_check_code, expression_code = gen_from_test_data(
-            data_f, out_data_f, func_info, suite_dependencies)
-        snippets['dep_check_code'] = dep_check_code
-        snippets['expression_code'] = expression_code
+    merged_tasks = []
+    by_funcs_file = {}
+    for task in tasks:
+        funcs_file = os.path.normpath(task['funcs_file'])
+        if funcs_file not in by_funcs_file:
+            merged_task = dict((key, task[key]) for key in task
+                               if key not in MERGED_TASK_DATA_FILE_KEYS)
+            merged_task['c_file'] = get_merged_c_file(task['funcs_file'],
+                                                      out_dir)
+            merged_task['siblings'] = []
+            by_funcs_file[funcs_file] = merged_task
+            merged_tasks.append(merged_task)
+        by_funcs_file[funcs_file]['siblings'].append(task)
+    return merged_tasks
+
+
+def get_task_output_files(task):
+    """
+    Gives the files written by a task.
+
+    :param task: Dictionary of generate_code() or
+                 generate_merged_code() parameters
+    :return: List of file names
+    """
+    output_files = [task['c_file']]
+    for sibling in task.get('siblings', [task]):
+        output_files.append(sibling['out_data_file'])
+        if sibling.get('manifest_file'):
+            output_files.append(sibling['manifest_file'])
+    return output_files
 
 
-def generate_code(**input_info):
+def generate_suite(input_info):
     """
-    Generates C source code from test suite file, data file, common
-    helpers file and platform file.
+    Generates a test suite. Wrapper around generate_code() and
+    generate_merged_code() taking a single argument, for use with
+    multiprocessing.Pool.map().
+
+    :param input_info: Dictionary of generate_code() parameters, or of
+                       generate_merged_code() parameters for a merged
+                       test suite
+    :return: Phase measurements returned by generate_code()
+    """
+    if 'siblings' in input_info:
+        return generate_merged_code(**input_info)
+    return generate_code(**input_info)
+
+
+def gen_suite_task(funcs_file, data_file, shared_inputs, input_info):
+    """
+    Gives the generate_code() parameters of a test suite generated by
+    generate_suites().
+
+    :param funcs_file: Functions file name
+    :param data_file: Data file name
+    :param shared_inputs: Shared inputs from read_shared_inputs()
+    :param input_info: generate_suites() parameters
+    :return: Dictionary of generate_code() parameters
+    """
+    c_file, out_data_file = get_output_files(data_file,
+                                             input_info['out_dir'])
+    manifest_file = None
+    if input_info.get('manifest', False):
+        manifest_file = os.path.splitext(c_file)[0] + '.json'
+    return {'funcs_file': funcs_file, 'data_file': data_file,
+            'template_file': input_info['template_file'],
+            'platform_file': input_info['platform_file'],
+            'helpers_file': input_info['helpers_file'],
+            'suites_dir': input_info['suites_dir'],
+            'c_file': c_file, 'out_data_file': out_data_file,
+            'shared_inputs': shared_inputs,
+            'binary_datax': input_info.get('binary_datax', False),
+            'manifest_file': manifest_file,
+            'config': input_info.get('config'),
+            'profile': input_info.get('profile', False)}
+
+
+def generate_suites(suites, **input_info):
+    """
+    Generates C source and intermediate data files for a list of test
+    suites in one run. Template, platform and helpers files are read
+    once and shared by all the suites. Suites are independent of each
+    other and can be generated in parallel by a pool of worker
+    processes. Suites that are up to date as per the cache file are
+    skipped.
 
     input_info expands to following parameters:
-    funcs_file: Functions file object
-    data_file: Data file object
     template_file: Template file object
     platform_file: Platform file object
     helpers_file: Helper functions file object
     suites_dir: Test suites dir
-    c_file: Output C file object
-    out_data_file: Output intermediate data file object
-    :return:
+    out_dir: Dir where generated code and data files are written
+    jobs: Optional. Number of worker processes. 0 for one per CPU.
+          Default is 1 i.e. suites are generated in this process.
+    cache_file: Optional. Generation cache file. Suites whose inputs
+                are unchanged since they were last generated are
+                skipped. No caching if not given.
+    binary_datax: Optional. Write binary intermediate data files.
+    manifest: Optional. Write a JSON manifest file next to each C file.
+    duplicates: Optional. What to do with duplicate test cases, see
+                handle_duplicate_test_cases(). Default is 'ignore'.
+    config: Optional. Configuration macros from read_config() to prune
+            the test cases that are not supported.
+    preprocessor: Optional. Preprocessor command and options, e.g.
+                  ['cc', '-E', '-I../include']. If given, the
+                  expressions of the suites to generate are evaluated
+                  with resolve_expressions() and written as int values.
+    merge_data_files: Optional. Generate one merged test suite per
+                      functions file for its data files in the list,
+                      see generate_merged_code().
+    profile: Optional. Print wall time and peak memory of each phase
+             of the generation of each suite.
+    shared_inputs: Optional. Shared inputs from read_shared_inputs().
+                   Read from the files if not given.
+
+    :param suites: List of (functions file, data file) tuples.
+    :return: Shared inputs, for generating more suites with them.
     """
-    funcs_file = input_info['funcs_file']
-    data_file = input_info['data_file']
     template_file = input_info['template_file']
-    platform_file = input_info['platform_file']
-    helpers_file = input_info['helpers_file']
-    suites_dir = input_info['suites_dir']
-    c_file = input_info['c_file']
-    out_data_file = input_info['out_data_file']
-    for name, path in [('Functions file', funcs_file),
-                       ('Data file', data_file),
-                       ('Template file', template_file),
-                       ('Platform file', platform_file),
-                       ('Helpers code file', helpers_file),
-                       ('Suites dir', suites_dir)]:
-        if not os.path.exists(path):
-            raise IOError("ERROR: %s [%s] not found!" % (name, path))
+    out_dir = input_info['out_dir']
+    cache_file = input_info.get('cache_file')
+    shared_inputs = input_info.get('shared_inputs')
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    profiler = PhaseProfiler(input_info.get('profile', False))
+    if shared_inputs is None:
+        with profiler.phase('read shared inputs', template_file):
+            shared_inputs = read_shared_inputs(template_file,
+                                               input_info['platform_file'],
+                                               input_info['helpers_file'])
+    tasks = [gen_suite_task(funcs_file, data_file, shared_inputs, input_info)
+             for funcs_file, data_file in suites]
+
+    duplicates = input_info.get('duplicates', 'ignore')
+    if duplicates != 'ignore':
+        handle_duplicate_test_cases(tasks, input_info['suites_dir'],
+                                    duplicates == 'drop')
+
+    if input_info.get('merge_data_files', False):
+        tasks = merge_tasks(tasks, out_dir)
+
+    preprocessor = input_info.get('preprocessor')
+    if cache_file:
+        cache = read_cache(cache_file)
+        shared_key = gen_shared_cache_key(shared_inputs, preprocessor)
+        keys = {}
+        for task in tasks:
+            keys[task['c_file']] = gen_cache_key(task, shared_key)
+        tasks = [task for task in tasks
+                 if cache.get(task['c_file']) != keys[task['c_file']] or
+                 not all(os.path.exists(output_file) for output_file in
+                         get_task_output_files(task))]
+
+    # Expressions are resolved after the cache lookup, so that the
+    # preprocessor runs only for the suites to generate, if any.
+    if preprocessor and tasks:
+        with profiler.phase('resolve expressions', template_file):
+            resolve_task_expressions(tasks, shared_inputs, preprocessor)
+
+    for records in run_tasks(tasks, input_info.get('jobs', 1)):
+        profiler.add_records(records)
+
+    if cache_file:
+        cache.update(keys)
+        write_cache(cache_file, cache)
+    if input_info.get('profile', False):
+        print_profile(profiler.records)
+    return shared_inputs
+
+
+def handle_duplicate_test_cases(tasks, suites_dir, drop):
+    """
+    Reports test cases duplicated within a data file or across the
+    sibling data files of a functions file, i.e. the data files in the
+    suites dir with the same functions file. The first occurrence in
+    data file name order is kept. Siblings that are not generated in
+    this run are taken into account too, so that the result does not
+    depend on the data files given.
+
+    :param tasks: List of dictionaries of generate_code() parameters.
+                  With drop, the duplicates are added to the tasks'
+                  skip_tests.
+    :param suites_dir: Test suites dir
+    :param drop: Leave duplicates out of the generated suites
+    :return:
+    """
+    siblings = {}
+    for funcs_file, data_file in find_suites(suites_dir):
+        siblings.setdefault(os.path.normpath(funcs_file), set()).add(
+            os.path.normpath(data_file))
+    tasks_by_data_file = {}
+    for task in tasks:
+        data_file = os.path.normpath(task['data_file'])
+        tasks_by_data_file[data_file] = task
+        siblings.setdefault(os.path.normpath(task['funcs_file']),
+                            set()).add(data_file)
+
+    for funcs_file in sorted(siblings):
+        data_files = sorted(siblings[funcs_file])
+        if not any(data_file in tasks_by_data_file
+                   for data_file in data_files):
+            continue
+        for duplicate, first in find_duplicate_test_cases(data_files):
+            data_file, index, line_no, test_name = duplicate
+            sys.stderr.write("%s:%d: duplicate test case '%s' of '%s' "
+                             "at %s:%d%s\n" %
+                             (data_file, line_no, test_name, first[2],
+                              first[0], first[1],
+                              ", dropped" if drop else ""))
+            task = tasks_by_data_file.get(data_file)
+            if drop and task:
+                task.setdefault('skip_tests', set()).add(index)
+
+
+def run_tasks(tasks, jobs):
+    """
+    Generates test suites in this process or in a pool of worker
+    processes.
 
-    snippets = {'generator_script': os.path.basename(__file__)}
-    read_code_from_input_files(platform_file, helpers_file,
-                               out_data_file, snippets)
-    add_input_info(funcs_file, data_file, template_file,
-                   c_file, snippets)
-    suite_dependencies, func_info = parse_function_file(funcs_file, snippets)
-    generate_intermediate_data_file(data_file, out_data_file,
-                                    suite_dependencies, func_info, snippets)
-    write_test_source_file(template_file, c_file, snippets)
+    :param tasks: List of dictionaries of generate_code() parameters
+    :param jobs: Number of worker processes. 0 for one per CPU.
+    :return: List of the results of generate_code() for the tasks
+    """
+    if jobs == 0:
+        jobs = multiprocessing.cpu_count()
+    jobs = min(jobs, len(tasks))
+    if jobs <= 1:
+        return [generate_suite(task) for task in tasks]
+
+    # Generation time is roughly proportional to the data file size.
+    # Start with the biggest suites so that the workers finish together.
+    tasks.sort(key=lambda task: sum(os.path.getsize(sibling['data_file'])
+                                    for sibling in
+                                    task.get('siblings', [task])),
+               reverse=True)
+    pool = multiprocessing.Pool(jobs)
+    try:
+        results = pool.map(generate_suite, tasks, chunksize=1)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+    return results
 
 
 def main():
@@ -1066,15 +1628,18 @@ def main():
 
     parser.add_argument("-f", "--functions-file",
                         dest="funcs_file",
-                        help="Functions file",
-                        metavar="FUNCTIONS_FILE",
-                        required=True)
+                        help="Functions file. If not given, it is derived "
+                             "from each data file's name",
+                        metavar="FUNCTIONS_FILE")
 
     parser.add_argument("-d", "--data-file",
-                        dest="data_file",
-                        help="Data file",
-                        metavar="DATA_FILE",
-                        required=True)
+                        dest="data_files",
+                        action="append",
+                        help="Data file. Can be given multiple times to "
+                             "generate several suites in one run. If not "
+                             "given, all data files in the suites dir are "
+                             "used",
+                        metavar="DATA_FILE")
 
     parser.add_argument("-t", "--template-file",
                         dest="template_file",
@@ -1106,25 +1671,180 @@ def main():
                         metavar="OUT_DIR",
                         required=True)
 
-    args = parser.parse_args()
-
-    data_file_name = os.path.basename(args.data_file)
-    data_name = os.path.splitext(data_file_name)[0]
+    parser.add_argument("--no-cache",
+                        dest="use_cache",
+                        action="store_false",
+                        help="Regenerate all suites instead of skipping "
+                             "the suites with unchanged inputs")
+
+    parser.add_argument("-j", "--jobs",
+                        dest="jobs",
+                        type=int,
+                        default=1,
+                        help="Number of suites to generate in parallel. "
+                             "0 for one per CPU. Default is 1",
+                        metavar="N")
+
+    parser.add_argument("--binary-datax",
+                        dest="binary_datax",
+                        action="store_true",
+                        help="Write the intermediate data files in binary "
+                             "format with decoded parameters. Only "
+                             "supported by host_test.function")
+
+    parser.add_argument("--manifest",
+                        dest="manifest",
+                        action="store_true",
+                        help="Write a JSON manifest listing the test cases "
+                             "of each suite next to its C file")
+
+    parser.add_argument("--merge-data-files",
+                        dest="merge_data_files",
+                        action="store_true",
+                        help="Generate one C file per functions file, "
+                             "named after it, for all its data files. "
+                             "Its test binary runs the intermediate data "
+                             "files given on its command line, by default "
+                             "all of them, and reports results per data "
+                             "file")
+
+    parser.add_argument("--duplicates",
+                        dest="duplicates",
+                        choices=['ignore', 'report', 'drop'],
+                        default='ignore',
+                        help="Report test cases with the same test function, "
+                             "dependencies and arguments as another test "
+                             "case of the same data file or of a sibling "
+                             "data file, and optionally drop them. Default "
+                             "is ignore")
+
+    parser.add_argument("--config-file",
+                        dest="config_file",
+                        help="Configuration file, e.g. "
+                             "include/mbedtls/config.h. Test cases with "
+                             "dependencies that are known to be unmet in "
+                             "this configuration are left out of the "
+                             "intermediate data files",
+                        metavar="CONFIG_FILE")
+
+    parser.add_argument("-D", "--define",
+                        dest="defines",
+                        action="append",
+                        default=[],
+                        help="Macro defined in addition to the "
+                             "configuration file, like the compiler "
+                             "option. Can be given multiple times. "
+                             "Enables pruning like --config-file",
+                        metavar="MACRO[=VALUE]")
+
+    parser.add_argument("--resolve-expressions",
+                        dest="resolve_expressions",
+                        action="store_true",
+                        help="Evaluate the int parameters given as "
+                             "expressions at generation time, with one "
+                             "run of the C preprocessor for all the "
+                             "suites, and write their values in the "
+                             "intermediate data files. Expressions that "
+                             "cannot be evaluated are left to run time. "
+                             "The configuration is taken from "
+                             "--config-file and -D")
+
+    parser.add_argument("--cc",
+                        dest="cc",
+                        default=os.environ.get('CC') or 'cc',
+                        help="C compiler used as preprocessor by "
+                             "--resolve-expressions. Default is $CC or cc",
+                        metavar="CC")
+
+    parser.add_argument("-I", "--include-dir",
+                        dest="include_dirs",
+                        action="append",
+                        default=[],
+                        help="Include dir for --resolve-expressions, like "
+                             "the compiler option. Can be given multiple "
+                             "times",
+                        metavar="DIR")
+
+    parser.add_argument("--profile",
+                        dest="profile",
+                        action="store_true",
+                        help="Print wall time and peak memory allocated by "
+                             "each phase of the generation of each suite. "
+                             "Suites skipped as per the cache are not "
+                             "measured, see --no-cache")
+
+    parser.add_argument("--profile-dump",
+                        dest="profile_dump",
+                        help="Run the generator under cProfile and dump the "
+                             "statistics to a file, to be read with pstats. "
+                             "Suites are then generated in this process, "
+                             "regardless of --jobs",
+                        metavar="FILE")
+
+    parser.add_argument("--watch",
+                        dest="watch",
+                        action="store_true",
+                        help="Keep running and regenerate the suites "
+                             "whose inputs change, until interrupted")
+
+    parser.add_argument("--watch-interval",
+                        dest="watch_interval",
+                        type=float,
+                        default=0.5,
+                        help="Polling interval in seconds of --watch "
+                             "where inotify is not available. Default "
+                             "is 0.5",
+                        metavar="SECONDS")
 
-    out_c_file = os.path.join(args.out_dir, data_name + '.c')
-    out_data_file = os.path.join(args.out_dir, data_name + '.datax')
-
-    out_c_file_dir = os.path.dirname(out_c_file)
-    out_data_file_dir = os.path.dirname(out_data_file)
-    for directory in [out_c_file_dir, out_data_file_dir]:
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+    args = parser.parse_args()
 
-    generate_code(funcs_file=args.funcs_file, data_file=args.data_file,
-                  template_file=args.template_file,
-                  platform_file=args.platform_file,
-                  helpers_file=args.helpers_file, suites_dir=args.suites_dir,
-                  c_file=out_c_file, out_data_file=out_data_file)
+    if args.data_files:
+        data_files = args.data_files
+    elif args.funcs_file:
+        parser.error("a data file is required with a functions file")
+    else:
+        data_files = [data_file for _, data_file in
+                      find_suites(args.suites_dir)]
+
+    config = None
+    if args.config_file or args.defines:
+        config = read_config(args.config_file, args.defines)
+
+    preprocessor = None
+    if args.resolve_expressions:
+        preprocessor = get_preprocessor_command(args.cc, args.include_dirs,
+                                                args.defines,
+                                                args.config_file)
+
+    cache_file = None
+    if args.use_cache:
+        cache_file = os.path.join(args.out_dir, CACHE_FILE_NAME)
+
+    suites = [(args.funcs_file or
+               get_functions_file(data_file, args.suites_dir), data_file)
+              for data_file in data_files]
+
+    input_info = dict(template_file=args.template_file,
+                      platform_file=args.platform_file,
+                      helpers_file=args.helpers_file,
+                      suites_dir=args.suites_dir, out_dir=args.out_dir,
+                      jobs=1 if args.profile_dump else args.jobs,
+                      cache_file=cache_file,
+                      binary_datax=args.binary_datax,
+                      manifest=args.manifest,
+                      duplicates=args.duplicates, config=config,
+                      preprocessor=preprocessor,
+                      merge_data_files=args.merge_data_files,
+                      profile=args.profile)
+    with dump_profile(args.profile_dump):
+        if args.watch:
+            discover = None
+            if not args.data_files:
+                discover = functools.partial(find_suites, args.suites_dir)
+            watch_suites(suites, generate_suites, discover,
+                         args.watch_interval, **input_info)
+        else:
+            generate_suites(suites, **input_info)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# Binary intermediate data file writer of the test suites code generator.
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Writing of the binary intermediate data files of generate_test_code.py.
+
+The test parameters are already decoded, so that the host test binary
+does not parse text, unhexify hex strings or convert integers at run
+time. The file is only read by host_test.function. All integers are
+32 bit little endian. The file starts with BINARY_DATAX_MAGIC, the
+format version, the number of test cases, the number of pooled
+parameters, the size of the pool and the size of the index. The index
+gives the file offset of each test case's record followed by the test
+case name. It lets a test binary list test cases and seek directly to
+the test cases it runs, e.g. with --shard or --filter. It is followed
+by the pool and one record per test case:
+
+    record size     Size of the rest of the record
+    dep count       Number of dependency Ids that follow
+    dep Ids...
+    function Id
+    param count     Number of parameters that follow
+    params...       Type code byte followed by the value:
+                    'i' int and 'e' expression Id: integer
+                    's' char*: string, without the enclosing quotes
+                        and with escape sequences replaced
+                    'h' hex: length and the decoded bytes
+                    'p' pooled string or hex: pool Id
+
+Strings are written as their length, the characters and a NUL
+terminator. String and hex parameters passed to more than one test
+case, e.g. keys and certificates, are written only once in the pool,
+encoded as params, and the records refer to them by Id. The test
+binary reads the pool once and copies pooled parameters for each test
+case, as test functions may modify their parameters.
+"""
+
+
+import struct
+import binascii
+
+from generate_test_code_files import GeneratorInputError
+from generate_test_code_data import InternTable, unescape_string
+
+
+# Binary intermediate data file header and parameter type codes.
+# Keep in sync with host_test.function.
+BINARY_DATAX_MAGIC = b'\x89DATAX\r\n'
+BINARY_DATAX_VERSION = 4
+BINARY_PARAM_TYPES = {'int': b'i', 'exp': b'e', 'char*': b's', 'hex': b'h'}
+BINARY_POOL_REF_TYPE = b'p'
+BINARY_POOLED_TYPES = (BINARY_PARAM_TYPES['char*'], BINARY_PARAM_TYPES['hex'])
+
+
+def encode_binary_int(value):
+    """
+    Encodes an integer as 32 bit little endian. Values that do not fit
+    wrap around, like the conversion from long to int done by the text
+    intermediate data file parser in host_test.function.
+
+    :param value: Integer
+    :return: Encoded bytes
+    """
+    return struct.pack('<I', value & 0xffffffff)
+
+
+def encode_binary_string(value):
+    """
+    Encodes a string as its length, its characters and a NUL
+    terminator.
+
+    :param value: String
+    :return: Encoded bytes
+    """
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+    return encode_binary_int(len(value)) + value + b'\0'
+
+
+def encode_binary_parameter(typ, val):
+    """
+    Encodes a test parameter for the binary intermediate data file.
+
+    :param typ: Parameter type. One of the keys of BINARY_PARAM_TYPES.
+    :param val: Parameter value as given by intern_parameters()
+    :return: Encoded bytes
+    """
+    if typ == 'int':
+        if val[:2].lower() == '0x':
+            value = int(val, 16)
+        else:
+            value = int(val, 10)
+        return BINARY_PARAM_TYPES[typ] + encode_binary_int(value)
+    if typ == 'exp':
+        return BINARY_PARAM_TYPES[typ] + encode_binary_int(val)
+
+    # String and hex parameters are enclosed in '"'.
+    val = unescape_string(val)
+    if len(val) < 2 or val[0] != '"' or val[-1] != '"':
+        raise GeneratorInputError("Expected string (with \"\") for "
+                                  "parameter and got: %s" % val)
+    val = val[1:-1]
+    if typ == 'char*':
+        return BINARY_PARAM_TYPES[typ] + encode_binary_string(val)
+    try:
+        data = binascii.unhexlify(val)
+    except (TypeError, ValueError, binascii.Error):
+        raise GeneratorInputError("Invalid hex parameter: %s" % val)
+    return BINARY_PARAM_TYPES[typ] + encode_binary_int(len(data)) + data
+
+
+def gen_binary_test_case(dep_ids, func_id, params):
+    """
+    Generates a binary intermediate data file record for a test case.
+    The test case name is written in the index.
+
+    :param dep_ids: Dependency Ids
+    :param func_id: Test function Id
+    :param params: Parameters encoded with encode_binary_parameter()
+           or pool references
+    :return: Encoded record
+    """
+    record = [encode_binary_int(len(dep_ids))]
+    for dep_id in dep_ids:
+        record.append(encode_binary_int(dep_id))
+    record.append(encode_binary_int(func_id))
+    record.append(encode_binary_int(len(params)))
+    record.extend(params)
+    record = b''.join(record)
+    return encode_binary_int(len(record)) + record
+
+
+def gen_binary_pool(test_cases):
+    """
+    Finds the string and hex parameters that are passed to more than
+    one test case and are bigger than a pool reference.
+
+    :param test_cases: List of (test name, dep Ids, function Id,
+           encoded params) tuples
+    :return: InternTable of encoded parameters to pool
+    """
+    ref_size = len(BINARY_POOL_REF_TYPE) + 4
+    counts = {}
+    for params in (test_case[3] for test_case in test_cases):
+        for param in params:
+            if param[:1] in BINARY_POOLED_TYPES and len(param) > ref_size:
+                counts[param] = counts.get(param, 0) + 1
+    pool = InternTable()
+    for params in (test_case[3] for test_case in test_cases):
+        for param in params:
+            if counts.get(param, 0) > 1:
+                pool.intern(param)
+    return pool
+
+
+def gen_binary_datax(test_cases):
+    """
+    Generates binary intermediate data file content from the test
+    cases: the header, the index of test case names and record
+    offsets, the pool of repeated parameters and the records, in which
+    pooled parameters are replaced by references.
+
+    :param test_cases: List of (test name, dep Ids, function Id,
+           encoded params) tuples
+    :return: Binary intermediate data file content
+    """
+    pool = gen_binary_pool(test_cases)
+    pool_data = b''.join(pool)
+    records = []
+    for _, dep_ids, func_id, params in test_cases:
+        params = [BINARY_POOL_REF_TYPE +
+                  encode_binary_int(pool.intern(param)[0])
+                  if param in pool else param for param in params]
+        records.append(gen_binary_test_case(dep_ids, func_id, params))
+    names = [encode_binary_string(test_case[0]) for test_case in test_cases]
+    index_size = 4 * len(records) + sum(len(name) for name in names)
+    header = [BINARY_DATAX_MAGIC, encode_binary_int(BINARY_DATAX_VERSION),
+              encode_binary_int(len(records)), encode_binary_int(len(pool)),
+              encode_binary_int(len(pool_data)),
+              encode_binary_int(index_size)]
+    offset = len(BINARY_DATAX_MAGIC) + 20 + index_size + len(pool_data)
+    for name, record in zip(names, records):
+        header.append(encode_binary_int(offset))
+        header.append(name)
+        offset += len(record)
+    return b''.join(header) + pool_data + b''.join(records)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# Generation cache of the test suites code generator.
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Cache of the keys of the inputs that the test suites were last
+generated from. generate_test_code.py skips the suites whose key is
+unchanged. Keys are hashes of the contents of the input files and of
+the generator modules, and of the generation options.
+"""
+
+
+import os
+import glob
+import json
+import hashlib
+
+from generate_test_code_files import write_file_if_changed, file_digest
+
+
+# Name of the generation cache file written in the output dir.
+CACHE_FILE_NAME = '.generate_test_code.cache'
+CACHE_VERSION = 1
+
+
+def read_cache(cache_file):
+    """
+    Reads generation cache file. The cache maps output C file names to
+    the key of the inputs they were generated from.
+
+    :param cache_file: Cache file name
+    :return: Dictionary of cached keys. Empty if the cache file does not
+             exist or is not valid.
+    """
+    try:
+        with open(cache_file, 'r') as cache_f:
+            cache = json.load(cache_f)
+        if cache.get('version') == CACHE_VERSION:
+            return cache['suites']
+    except (IOError, OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+
+def write_cache(cache_file, suites):
+    """
+    Writes generation cache file.
+
+    :param cache_file: Cache file name
+    :param suites: Dictionary of keys keyed by output C file name
+    :return:
+    """
+    write_file_if_changed(cache_file,
+                          json.dumps({'version': CACHE_VERSION,
+                                      'suites': suites},
+                                     indent=1, sort_keys=True))
+
+
+def gen_cache_key(input_info, shared_key):
+    """
+    Generates cache key of a test suite from its functions and data
+    file contents, its output file names and the key of the inputs
+    shared by all suites.
+
+    :param input_info: Dictionary of generate_code() or
+                       generate_merged_code() parameters. The key of a
+                       merged test suite is made of the keys of its
+                       data files.
+    :param shared_key: Key of the generator and shared input files
+    :return: Cache key
+    """
+    if 'siblings' in input_info:
+        key = hashlib.sha256(input_info['c_file'].encode('utf-8'))
+        for sibling in input_info['siblings']:
+            key.update(b'\0' + gen_cache_key(sibling,
+                                             shared_key).encode('utf-8'))
+        return key.hexdigest()
+    key = hashlib.sha256(shared_key.encode('utf-8'))
+    for part in (input_info['funcs_file'], input_info['data_file'],
+                 file_digest(input_info['funcs_file']),
+                 file_digest(input_info['data_file']),
+                 input_info['c_file'], input_info['out_data_file'],
+                 str(input_info.get('binary_datax', False)),
+                 str(input_info.get('manifest_file')),
+                 str(sorted(input_info.get('skip_tests') or [])),
+                 json.dumps(input_info.get('config'), sort_keys=True),
+                 json.dumps(input_info.get('resolved_expressions'),
+                            sort_keys=True)):
+        key.update(b'\0' + part.encode('utf-8'))
+    return key.hexdigest()
+
+
+def gen_shared_cache_key(shared_inputs, preprocessor=None):
+    """
+    Generates cache key of the generator modules and the input files
+    shared by all suites.
+
+    :param shared_inputs: Shared input files info from read_shared_inputs()
+    :param preprocessor: Optional preprocessor command resolving the
+                         expressions, see gen_preprocessor_cache_key()
+    :return: Cache key
+    """
+    key = hashlib.sha256()
+    for module_file in sorted(glob.glob(os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            'generate_test_code*.py'))):
+        key.update(b'\0' + file_digest(module_file).encode('utf-8'))
+    for part in (shared_inputs['template_file'],
+                 ''.join(shared_inputs['template_lines']),
+                 shared_inputs['platform_file'],
+                 shared_inputs['platform_code'],
+                 shared_inputs['helpers_file'],
+                 shared_inputs['helpers_code']):
+        key.update(b'\0' + part.encode('utf-8'))
+    if preprocessor:
+        key.update(b'\0' + gen_preprocessor_cache_key(
+            preprocessor).encode('utf-8'))
+    return key.hexdigest()
+
+
+def gen_preprocessor_cache_key(command):
+    """
+    Generates cache key of the values of the expressions resolved with
+    a preprocessor command, so that suites whose inputs are unchanged
+    are skipped without running the preprocessor. The key is made of
+    the command and of the headers in its include dirs and the files
+    named by its macro definitions, such as MBEDTLS_CONFIG_FILE. Other
+    headers, e.g. the system headers, are taken as unchanged.
+
+    :param command: Preprocessor command and options, e.g. ['cc', '-E']
+    :return: Cache key
+    """
+    key = hashlib.sha256('\0'.join(command).encode('utf-8'))
+    files = []
+    for arg in command:
+        if arg.startswith('-I'):
+            for dir_path, dir_names, file_names in os.walk(arg[2:]):
+                dir_names.sort()
+                files += [os.path.join(dir_path, file_name)
+                          for file_name in sorted(file_names)
+                          if file_name.endswith('.h')]
+        elif arg.startswith('-D') and '=' in arg:
+            file_name = arg.split('=', 1)[1].strip('"')
+            if os.path.isfile(file_name):
+                files.append(file_name)
+    for file_name in files:
+        key.update(b'\0' + file_digest(file_name).encode('utf-8'))
+    return key.hexdigest()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# Configuration pruning of the test suites code generator.
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Resolution of test dependencies at generation time from a configuration
+file and macro definitions, for the --config-file and -D options of
+generate_test_code.py.
+"""
+
+
+import re
+import sys
+
+from generate_test_code_files import GeneratorInputError, FileWrapper
+
+
+CONFIG_DIRECTIVE_REGEX = r'\s*(?P<comment>//)?\s*#\s*(?P<directive>\w+)' \
+                         r'\s*(?P<macro>\w*)'
+
+
+def parse_config_file(config_f):
+    """
+    Parses the configuration macros of a config file, see read_config().
+
+    :param config_f: File object of the config file
+    :return: Dict keyed by macro name, True if the macro is defined,
+             False if it is not and None if it is not known.
+    """
+    config = {}
+    directive_match = re.compile(CONFIG_DIRECTIVE_REGEX).match
+    conditional = set(['if', 'ifdef', 'ifndef'])
+    depth = 0
+    guard = None
+    for line in config_f:
+        match = directive_match(line)
+        if not match:
+            continue
+        directive = match.group('directive')
+        macro = match.group('macro')
+        if match.group('comment'):
+            if directive == 'define' and depth == 0:
+                config.setdefault(macro, False)
+            continue
+        if guard is None:
+            # An #ifndef before any other directive is the
+            # include guard and does not make a conditional block.
+            guard = macro if directive == 'ifndef' else ''
+            if guard:
+                continue
+        if directive in conditional:
+            depth += 1
+        elif directive == 'endif':
+            depth = max(depth - 1, 0)
+        elif directive == 'define' and macro != guard:
+            config[macro] = True if depth == 0 else None
+        elif directive == 'undef':
+            config[macro] = False if depth == 0 else None
+    return config
+
+
+def read_config(config_file, defines):
+    """
+    Reads the configuration macros from a config file such as
+    include/mbedtls/config.h and from -D style macro definitions.
+
+    Macros defined in the config file are known to be defined and
+    macros whose #define is commented out are known not to be defined.
+    Macros defined or undefined inside #if blocks (other than the
+    include guard) depend on other macros and are left unknown. So are
+    the macros not mentioned at all, for example the macros derived in
+    other headers. Files included by the config file are not read.
+
+    :param config_file: Config file name. None to use only defines.
+    :param defines: List of macro definitions as NAME or NAME=VALUE
+    :return: Dict keyed by macro name, True if the macro is defined
+             and False if it is not.
+    """
+    config = {}
+    if config_file:
+        with FileWrapper(config_file) as config_f:
+            config = parse_config_file(config_f)
+    for define in defines:
+        config[define.split('=', 1)[0]] = True
+    config = dict((macro, defined) for macro, defined in config.items()
+                  if defined is not None)
+    if config.get('MBEDTLS_USER_CONFIG_FILE'):
+        raise GeneratorInputError("MBEDTLS_USER_CONFIG_FILE is not "
+                                  "supported with configuration pruning")
+    return config
+
+
+def resolve_dependencies(dependencies, config):
+    """
+    Resolves dependencies with the configuration macros known at
+    generation time.
+
+    :param dependencies: Dependencies. Negated with a leading '!'.
+    :param config: Configuration macros from read_config()
+    :return: List of dependencies known to be unmet and list of
+             dependencies that are not known, to be checked at run time.
+    """
+    unmet = []
+    unknown = []
+    for dependency in dependencies:
+        macro = dependency.lstrip('!')
+        if macro not in config:
+            unknown.append(dependency)
+        elif config[macro] == dependency.startswith('!'):
+            unmet.append(dependency)
+    return unmet, unknown
+
+
+def print_pruned_summary(data_file, pruned):
+    """
+    Prints a summary of the test cases left out because they are not
+    supported by the configuration, with the number of test cases per
+    unmet dependency.
+
+    :param data_file: Data file name
+    :param pruned: List of (test name, unmet dependencies) tuples
+    :return:
+    """
+    counts = {}
+    for _, unmet in pruned:
+        for dependency in unmet:
+            counts[dependency] = counts.get(dependency, 0) + 1
+    dependencies = sorted(counts, key=lambda dep: (-counts[dep], dep))
+    details = ', '.join('%s: %d' % (dependency, counts[dependency])
+                        for dependency in dependencies)
+    sys.stdout.write("%s: %d test cases not supported by the "
+                     "configuration (%s)\n" % (data_file, len(pruned),
+                                                details))
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# Data file parser of the test suites code generator.
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Parsing of test_suite_<module>[.<submodule>].data files and writing of
+the text intermediate data files for generate_test_code.py. Test case
+dependencies and int parameters given as expressions are written as
+Ids, that index the dependency and expression checks generated in the
+test suite code.
+"""
+
+
+import re
+import binascii
+
+from generate_test_code_files import GeneratorInputError
+from generate_test_code_functions import DEPENDENCY_REGEX, parse_dependencies
+from generate_test_code_functions import gen_dependencies_one_line
+
+
+INT_LITERAL_REGEX = r'(\d+|0x[0-9a-f]+)$'
+# Compiled once, as it is matched against every int parameter.
+INT_LITERAL_PATTERN = re.compile(INT_LITERAL_REGEX, re.I)
+
+# Range of a C int on the target. Negative int literals and resolved
+# expressions must fit in it.
+C_INT_MIN = -0x80000000
+C_INT_MAX = 0x7fffffff
+
+# Biggest int literal parameter. Int parameters are 32 bit on target
+# and bigger literals would be silently truncated.
+INT_LITERAL_MAX = 0xffffffff
+
+
+class InternTable(object):
+    """
+    Table of unique values, each identified by an integer Id. Ids are
+    allocated in the order the values are first added. Lookup of a
+    value's Id takes constant time.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty table.
+        """
+        self._ids = {}
+        self._values = []
+
+    def intern(self, value):
+        """
+        Gives Id of a value, adding the value to the table if not
+        already present.
+
+        :param value: Value to look up
+        :return: Tuple of value Id and a flag that is True if the value
+                 was added by this call.
+        """
+        value_id = self._ids.get(value)
+        if value_id is not None:
+            return value_id, False
+        value_id = len(self._values)
+        self._ids[value] = value_id
+        self._values.append(value)
+        return value_id, True
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, value):
+        return value in self._ids
+
+    def __iter__(self):
+        """
+        Iterates values in the order of their Ids.
+        """
+        return iter(self._values)
+
+
+def escaped_split(inp_str, split_char):
+    """
+    Split inp_str on character split_char but ignore if escaped.
+    Since, return value is used to write back to the intermediate
+    data file, any escape characters in the input are retained in the
+    output.
+
+    :param inp_str: String to split
+    :param split_char: Split character
+    :return: List of splits
+    """
+    if len(split_char) > 1:
+        raise ValueError('Expected split character. Found string!')
+    # A split is a run of escape sequences and characters other than
+    # split_char. Empty splits are dropped.
+    return re.findall(r'(?:[^\\\n%s]+|\\.|\\)+' % re.escape(split_char),
+                      inp_str)
+
+
+def parse_test_data(data_f):
+    """
+    Parses .data file for each test case name, test function name,
+    test dependencies and test arguments. This information is
+    correlated with the test functions file for generating an
+    intermediate data file replacing the strings for test function
+    names, dependencies and integer constant expressions with
+    identifiers. Mainly for optimising space for on-target
+    execution.
+
+    :param data_f: file object of the data file.
+    :return: Generator that yields test name, function name,
+             dependency list and function argument list.
+    """
+    __state_read_name = 0
+    __state_read_args = 1
+    state = __state_read_name
+    dependencies = []
+    name = ''
+    dependency_search = re.compile(DEPENDENCY_REGEX).search
+    for line in data_f:
+        line = line.strip()
+        # Skip comments
+        if line.startswith('#'):
+            continue
+
+        # Blank line indicates end of test
+        if not line:
+            if state == __state_read_args:
+                raise GeneratorInputError("[%s:%d] Newline before arguments. "
+                                          "Test function and arguments "
+                                          "missing for %s" %
+                                          (data_f.name, data_f.line_no, name))
+            continue
+
+        if state == __state_read_name:
+            # Read test name
+            name = line
+            state = __state_read_args
+        elif state == __state_read_args:
+            # Check dependencies
+            match = dependency_search(line)
+            if match:
+                try:
+                    dependencies = parse_dependencies(
+                        match.group('dependencies'))
+                except GeneratorInputError as error:
+                    raise GeneratorInputError(
+                        str(error) + " - %s:%d" %
+                        (data_f.name, data_f.line_no))
+            else:
+                # Read test vectors
+                parts = escaped_split(line, ':')
+                test_function = parts[0]
+                args = parts[1:]
+                yield name, test_function, dependencies, args
+                dependencies = []
+                state = __state_read_name
+    if state == __state_read_args:
+        raise GeneratorInputError("[%s:%d] Newline before arguments. "
+                                  "Test function and arguments missing for "
+                                  "%s" % (data_f.name, data_f.line_no, name))
+
+
+def gen_dep_check(dep_id, dep):
+    """
+    Generate the dependency table entry for checking dependency with
+    the associated identifier. The entry is the result of the check,
+    evaluated at compile time. Entries are emitted in Id order, so
+    that the Id is the index of the entry in the table.
+
+    :param dep_id: Dependency identifier
+    :param dep: Dependency macro
+    :return: Dependency check code
+    """
+    if dep_id < 0:
+        raise GeneratorInputError("Dependency Id should be a positive "
+                                  "integer.")
+    _not, dep = ('!', dep[1:]) if dep[0] == '!' else ('', dep)
+    if not dep:
+        raise GeneratorInputError("Dependency should not be an empty string.")
+    dep_check = '''
+#if {_not}defined({macro})
+    DEPENDENCY_SUPPORTED,       /* {id} */
+#else
+    DEPENDENCY_NOT_SUPPORTED,   /* {id} */
+#endif'''.format(_not=_not, macro=dep, id=dep_id)
+    return dep_check
+
+
+def gen_expression_check(exp_id, exp):
+    """
+    Generates the expression table entry for evaluating an integer
+    expression using associated expression Id. Entries are emitted in
+    Id order, so that the Id is the index of the entry in the table.
+
+    :param exp_id: Expression Identifier
+    :param exp: Expression/Macro
+    :return: Expression check code
+    """
+    if exp_id < 0:
+        raise GeneratorInputError("Expression Id should be a positive "
+                                  "integer.")
+    if not exp:
+        raise GeneratorInputError("Expression should not be an empty string.")
+    exp_code = '''
+    {expression},   /* {exp_id} */'''.format(exp_id=exp_id, expression=exp)
+    return exp_code
+
+
+def intern_dependencies(test_dependencies, unique_dependencies):
+    """
+    Replaces dependencies with their identifiers. Also, generates
+    dependency check code for the dependencies not seen before.
+
+    :param test_dependencies: Dependencies
+    :param unique_dependencies: InternTable to track unique dependencies
+           that are global to this re-entrant function.
+    :return: List of dependency Ids and dependency check code.
+    """
+    dep_ids = []
+    dep_check_code = ''
+    for dep in test_dependencies:
+        dep_id, is_new = unique_dependencies.intern(dep)
+        if is_new:
+            dep_check_code += gen_dep_check(dep_id, dep)
+        dep_ids.append(dep_id)
+    return dep_ids, dep_check_code
+
+
+def write_dependencies(out_data_f, test_dependencies, unique_dependencies):
+    """
+    Write dependencies to intermediate test data file, replacing
+    the string form with identifiers. Also, generates dependency
+    check code.
+
+    :param out_data_f: Output intermediate data file
+    :param test_dependencies: Dependencies
+    :param unique_dependencies: InternTable to track unique dependencies
+           that are global to this re-entrant function.
+    :return: returns dependency check code.
+    """
+    dep_ids, dep_check_code = intern_dependencies(test_dependencies,
+                                                  unique_dependencies)
+    if dep_ids:
+        out_data_f.write('depends_on')
+        for dep_id in dep_ids:
+            out_data_f.write(':' + str(dep_id))
+        out_data_f.write('\n')
+    return dep_check_code
+
+
+def parse_int_literal(val):
+    """
+    Gives the value of an int parameter that is a literal with an
+    optional sign. White space around the literal and the sign is
+    ignored.
+
+    :param val: Parameter value as written in the data file
+    :return: Value or None if the parameter is not a literal, e.g. an
+             expression.
+    """
+    literal = val.strip()
+    sign = 1
+    if literal[:1] in ('-', '+'):
+        if literal[0] == '-':
+            sign = -1
+        literal = literal[1:].lstrip()
+    if not INT_LITERAL_PATTERN.match(literal):
+        return None
+    if literal[:2].lower() == '0x':
+        return sign * int(literal, 16)
+    return sign * int(literal, 10)
+
+
+def check_parameter(typ, val):
+    """
+    Checks that a test parameter is in the format expected by the
+    intermediate data file parsers in host_test.function: strings
+    and hex strings enclosed in '"', hex strings with an even number
+    of hex digits and int literals, negative ones included, that fit
+    in 32 bits.
+
+    :param typ: Parameter type
+    :param val: Parameter value as written in the data file
+    :return: Error description or None if the parameter is valid
+    """
+    if typ == 'int':
+        # Literals of up to 9 characters, sign included, always fit
+        if len(val) > 9:
+            value = parse_int_literal(val)
+            if value is not None and \
+                    not C_INT_MIN <= value <= INT_LITERAL_MAX:
+                return 'int value %s out of range' % val
+        return None
+    if len(val) < 2 or val[0] != '"' or val[-1] != '"':
+        return 'expected string (with "") and got: %s' % val
+    if typ == 'hex':
+        if len(val) % 2:
+            return 'odd number of hex digits in: %s' % val
+        try:
+            binascii.unhexlify(val[1:-1])
+        except (TypeError, ValueError, binascii.Error):
+            return 'invalid hex digits in: %s' % val
+    return None
+
+
+def intern_parameters(test_args, func_args, unique_expressions,
+                      resolved=None):
+    """
+    Gives parameter types and values, replacing non literal int
+    values i.e. expressions with identifiers. Also, generates
+    expression check code for the expressions not seen before.
+    All parameters are checked with check_parameter() first.
+
+    :param test_args: Test parameters
+    :param func_args: Function arguments
+    :param unique_expressions: InternTable to track unique
+           expressions that are global to this re-entrant function.
+    :param resolved: Optional dict of expression to value from
+           resolve_expressions(). These expressions are given as int
+           values.
+    :return: List of (type, value) tuples and expression check code.
+    """
+    errors = []
+    for i, (typ, val) in enumerate(zip(func_args, test_args)):
+        error = check_parameter(typ, val)
+        if error:
+            errors.append('parameter %d: %s' % (i + 1, error))
+    if errors:
+        raise GeneratorInputError('; '.join(errors))
+    params = []
+    expression_code = ''
+    int_literal_match = INT_LITERAL_PATTERN.match
+    for i, _ in enumerate(test_args):
+        typ = func_args[i]
+        val = test_args[i]
+
+        # check if val is a non literal int val (i.e. an expression)
+        if typ == 'int' and not int_literal_match(val):
+            if resolved and val in resolved:
+                params.append((typ, str(resolved[val])))
+                continue
+            typ = 'exp'
+            val, is_new = unique_expressions.intern(val)
+            if is_new:
+                expression_code += gen_expression_check(val, test_args[i])
+        params.append((typ, val))
+    return params, expression_code
+
+
+def write_parameters(out_data_f, test_args, func_args, unique_expressions,
+                     resolved=None):
+    """
+    Writes test parameters to the intermediate data file, replacing
+    the string form with identifiers. Also, generates expression
+    check code. Raises GeneratorInputError listing all the invalid
+    parameters if any, before writing anything.
+
+    :param out_data_f: Output intermediate data file
+    :param test_args: Test parameters
+    :param func_args: Function arguments
+    :param unique_expressions: InternTable to track unique
+           expressions that are global to this re-entrant function.
+    :param resolved: Optional dict of expression to value from
+           resolve_expressions()
+    :return: Returns expression check code.
+    """
+    params, expression_code = intern_parameters(test_args, func_args,
+                                                unique_expressions, resolved)
+    for typ, val in params:
+        out_data_f.write(':' + typ + ':' + str(val))
+    out_data_f.write('\n')
+    return expression_code
+
+
+def unescape_string(inp_str):
+    """
+    Replaces the escape sequences '\\n', '\\:' and '\\?' in a string
+    parameter the same way as the text intermediate data file parser
+    in host_test.function. Other backslashes are left as they are.
+
+    :param inp_str: String parameter as written in the data file
+    :return: Unescaped string
+    """
+    return re.sub(r'\\([n:?])',
+                  lambda match: '\n' if match.group(1) == 'n'
+                  else match.group(1), inp_str)
+
+
+def gen_suite_dep_checks(suite_dependencies, dep_check_code, expression_code):
+    """
+    Generates preprocessor checks for test suite dependencies.
+
+    :param suite_dependencies: Test suite dependencies read from the
+            .function file.
+    :param dep_check_code: Dependency check code
+    :param expression_code: Expression check code
+    :return: Dependency and expression code guarded by test suite
+             dependencies.
+    """
+    if suite_dependencies:
+        preprocessor_check = gen_dependencies_one_line(suite_dependencies)
+        dep_check_code = '''
+{preprocessor_check}
+{code}
+#endif
+'''.format(preprocessor_check=preprocessor_check, code=dep_check_code)
+        expression_code = '''
+{preprocessor_check}
+{code}
+#endif
+'''.format(preprocessor_check=preprocessor_check, code=expression_code)
+    return dep_check_code, expression_code
+
+
+def get_test_function(test_name, function_name, test_args, func_info):
+    """
+    Gives Id and arguments of the function called by a test case,
+    checking that the test case matches the function's signature.
+
+    :param test_name: Test case name
+    :param function_name: Test function name without the "test_" prefix
+    :param test_args: Test parameters
+    :param func_info: Dict keyed by function and with function id
+           and arguments info
+    :return: Function Id and arguments
+    """
+    test_function_name = 'test_' + function_name
+    if test_function_name not in func_info:
+        raise GeneratorInputError("Function %s not found!" %
+                                  test_function_name)
+    func_id, func_args = func_info[test_function_name]
+    if len(test_args) != len(func_args):
+        raise GeneratorInputError("Invalid number of arguments in test "
+                                  "%s. See function %s signature." %
+                                  (test_name, function_name))
+    return func_id, func_args
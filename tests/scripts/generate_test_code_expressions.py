@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# Expression resolver of the test suites code generator.
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Evaluation at generation time of the int test parameters given as
+expressions, for the --resolve-expressions option of
+generate_test_code.py. The expressions are expanded by the C
+preprocessor with the macros that the test suite code sees. Expanded
+expressions made of int constants and C operators are then evaluated
+as the compiler would on the target.
+"""
+
+
+import os
+import re
+import shlex
+import tempfile
+import subprocess
+
+from generate_test_code_files import GeneratorInputError, FileWrapper
+from generate_test_code_functions import gen_dependencies
+from generate_test_code_data import INT_LITERAL_PATTERN, C_INT_MIN, C_INT_MAX
+from generate_test_code_data import InternTable, parse_test_data
+
+
+C_EXPRESSION_TOKEN_REGEX = r'\s*(?:(?P<number>(?:0x[0-9a-f]+|\d+))' \
+                           r'(?P<suffix>[ul]*)|(?P<operator><<|>>|<=|>=|' \
+                           r'==|!=|&&|\|\||[-+*/%()~!<>&|^]))'
+C_DEFINE_REGEX = r'^\s*#\s*define\s+(?P<macro>\w+)'
+EXPRESSION_MARKER = '__generate_test_code_expression'
+EXPRESSION_MARKER_REGEX = r'\s*' + EXPRESSION_MARKER + \
+                          r'\s+(?P<suite>\d+)\s+(?P<exp_id>\d+)\s*:' \
+                          r'(?P<value>.*)'
+
+# Precedence of the binary operators evaluated by evaluate_c_expression()
+C_BINARY_OPERATORS = {'||': 1, '&&': 2, '|': 3, '^': 4, '&': 5,
+                      '==': 6, '!=': 6, '<': 7, '<=': 7, '>': 7, '>=': 7,
+                      '<<': 8, '>>': 8, '+': 9, '-': 9,
+                      '*': 10, '/': 10, '%': 10}
+
+
+def tokenize_c_expression(exp):
+    """
+    Splits a preprocessed C integer constant expression into integer
+    constants and operators.
+
+    :param exp: Expression
+    :return: List of tokens, ints for the constants and strings for
+             the operators. None if the expression has anything else,
+             e.g. identifiers, casts, unsigned or floating constants.
+             Raises GeneratorInputError if an octal constant has
+             digits 8 or 9, as the compiler would.
+    """
+    tokens = []
+    token_match = re.compile(C_EXPRESSION_TOKEN_REGEX, re.I).match
+    pos = 0
+    exp = exp.rstrip()
+    while pos < len(exp):
+        match = token_match(exp, pos)
+        if not match:
+            return None
+        pos = match.end()
+        number = match.group('number')
+        if number is None:
+            tokens.append(match.group('operator'))
+            continue
+        if 'u' in match.group('suffix').lower():
+            # Unsigned arithmetic is not evaluated
+            return None
+        if number[:2].lower() == '0x':
+            value = int(number, 16)
+        elif number[0] == '0':
+            try:
+                value = int(number, 8)
+            except ValueError:
+                raise GeneratorInputError("Invalid octal constant %s in "
+                                          "expression: %s" % (number, exp))
+        else:
+            value = int(number, 10)
+        if value > C_INT_MAX:
+            # Constants that do not fit in int are unsigned or long
+            return None
+        tokens.append(value)
+    return tokens
+
+
+def apply_c_operator(operator, left, right):
+    """
+    Applies a binary operator with the semantics of C int arithmetic.
+
+    :param operator: Operator
+    :param left: Left operand
+    :param right: Right operand
+    :return: Result. None if it is undefined or implementation defined
+             behaviour in C, or does not fit in int.
+    """
+    if operator in ('/', '%'):
+        if right == 0:
+            return None
+        # C division truncates towards zero
+        quotient = abs(left) // abs(right)
+        if (left < 0) != (right < 0):
+            quotient = -quotient
+        result = quotient if operator == '/' else left - right * quotient
+    elif operator in ('<<', '>>'):
+        if left < 0 or not 0 <= right < 32:
+            return None
+        result = left << right if operator == '<<' else left >> right
+    else:
+        result = {'||': lambda: int(bool(left) or bool(right)),
+                  '&&': lambda: int(bool(left) and bool(right)),
+                  '|': lambda: left | right,
+                  '^': lambda: left ^ right,
+                  '&': lambda: left & right,
+                  '==': lambda: int(left == right),
+                  '!=': lambda: int(left != right),
+                  '<': lambda: int(left < right),
+                  '<=': lambda: int(left <= right),
+                  '>': lambda: int(left > right),
+                  '>=': lambda: int(left >= right),
+                  '+': lambda: left + right,
+                  '-': lambda: left - right,
+                  '*': lambda: left * right}[operator]()
+    if not C_INT_MIN <= result <= C_INT_MAX:
+        return None
+    return result
+
+
+def evaluate_c_expression(exp):
+    """
+    Evaluates a preprocessed C integer constant expression of int
+    constants, parentheses and unary and binary arithmetic, bitwise,
+    comparison and logical operators. Nothing is executed, so the
+    expression does not need to be trusted.
+
+    :param exp: Expression
+    :return: Value. None if the expression is not supported or its
+             value is not known for sure, e.g. on overflow.
+    """
+    tokens = tokenize_c_expression(exp)
+    if not tokens:
+        return None
+    # Parsed by precedence climbing. pos is the index of the next token.
+    pos = [0]
+
+    def parse_unary():
+        token = tokens[pos[0]] if pos[0] < len(tokens) else None
+        pos[0] += 1
+        if isinstance(token, int):
+            return token
+        if token == '(':
+            value = parse_binary(1)
+            if value is None or pos[0] >= len(tokens) or \
+                    tokens[pos[0]] != ')':
+                return None
+            pos[0] += 1
+            return value
+        if token in ('-', '+', '~', '!'):
+            value = parse_unary()
+            if value is None:
+                return None
+            value = {'-': -value, '+': value, '~': ~value,
+                     '!': int(not value)}[token]
+            return value if C_INT_MIN <= value <= C_INT_MAX else None
+        return None
+
+    def parse_binary(min_precedence):
+        left = parse_unary()
+        while left is not None and pos[0] < len(tokens):
+            operator = tokens[pos[0]]
+            precedence = C_BINARY_OPERATORS.get(operator)
+            if precedence is None or precedence < min_precedence:
+                break
+            pos[0] += 1
+            right = parse_binary(precedence + 1)
+            if right is None:
+                return None
+            left = apply_c_operator(operator, left, right)
+        return left
+
+    value = parse_binary(1)
+    if pos[0] != len(tokens):
+        return None
+    return value
+
+
+def collect_expressions(data_file, func_info):
+    """
+    Gives the unique int parameters of a data file that are expressions
+    rather than int literals.
+
+    :param data_file: Data file name
+    :param func_info: Dict keyed by function and with function id
+           and arguments info
+    :return: InternTable of the expressions
+    """
+    expressions = InternTable()
+    int_literal_match = INT_LITERAL_PATTERN.match
+    with FileWrapper(data_file) as data_f:
+        for _, function_name, _, test_args in parse_test_data(data_f):
+            # Errors in test cases are reported when generating the suite
+            func_args = func_info.get('test_' + function_name, (0, []))[1]
+            for typ, val in zip(func_args, test_args):
+                if typ == 'int' and not int_literal_match(val):
+                    expressions.intern(val)
+    return expressions
+
+
+def gen_macro_undefs(code):
+    """
+    Generates #undef directives for the macros defined in C code.
+
+    :param code: C code
+    :return: #undef directives
+    """
+    macros = InternTable()
+    for match in re.finditer(C_DEFINE_REGEX, code, re.M):
+        macros.intern(match.group('macro'))
+    return ''.join('#undef %s\n' % macro for macro in macros)
+
+
+def gen_expression_probe(header, suites):
+    """
+    Generates C code for preprocessing the expressions of several test
+    suites in one run. The code is the template up to the test suite
+    code, followed by the code of each suite and its expressions
+    written after a marker giving the index of the suite and the
+    expression Id. Each expression is thus expanded with the macros
+    its suite code sees. The macros defined by the suite code are
+    undefined after its expressions, so that the next suites do not
+    see them. Expressions of suites whose dependencies are not met are
+    not expanded.
+
+    :param header: Template code up to the test suite code
+    :param suites: List of (data file name, suite dependencies,
+           function code, expressions) tuples
+    :return: C code
+    """
+    code = [header]
+    for index, (_, suite_dependencies, func_code, expressions) in \
+            enumerate(suites):
+        code.append(func_code)
+        dep_start, dep_end = gen_dependencies(suite_dependencies)
+        code.append(dep_start)
+        for exp_id, exp in enumerate(expressions):
+            code.append('\n%s %d %d : %s\n' % (EXPRESSION_MARKER, index,
+                                               exp_id, exp))
+        code.append(dep_end)
+        code.append(gen_macro_undefs(func_code))
+    return ''.join(code)
+
+
+def run_preprocessor(command, code):
+    """
+    Preprocesses C code.
+
+    :param command: Preprocessor command and options, e.g. ['cc', '-E']
+    :param code: C code
+    :return: Preprocessed code
+    """
+    source_fd, source_file = tempfile.mkstemp(suffix='.c',
+                                              prefix=EXPRESSION_MARKER)
+    try:
+        with os.fdopen(source_fd, 'w') as source_f:
+            source_f.write(code)
+        process = subprocess.Popen(command + [source_file],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+        output, errors = process.communicate()
+    except OSError as error:
+        raise GeneratorInputError("Failed to run %s: %s" %
+                                  (command[0], str(error)))
+    finally:
+        os.remove(source_file)
+    if process.returncode != 0:
+        raise GeneratorInputError("Preprocessing expressions with %s "
+                                  "failed:\n%s" % (' '.join(command), errors))
+    return output
+
+
+def resolve_expressions(header, suites, command):
+    """
+    Evaluates the expressions of several test suites at generation
+    time, with one run of the preprocessor for all of them and
+    evaluate_c_expression() for the expanded expressions.
+
+    :param header: Template code up to the test suite code
+    :param suites: List of (data file name, suite dependencies,
+           function code, expressions) tuples
+    :param command: Preprocessor command and options, e.g. ['cc', '-E']
+    :return: List of dicts, one per suite, of expression to value for
+             the expressions that could be evaluated.
+    """
+    output = run_preprocessor(command, gen_expression_probe(header, suites))
+    resolved = [{} for _ in suites]
+    marker_match = re.compile(EXPRESSION_MARKER_REGEX).match
+    for line in output.splitlines():
+        match = marker_match(line)
+        if not match:
+            continue
+        index = int(match.group('suite'))
+        exp = suites[index][3][int(match.group('exp_id'))]
+        try:
+            value = evaluate_c_expression(match.group('value'))
+        except GeneratorInputError as error:
+            raise GeneratorInputError("%s: %s: %s" % (suites[index][0], exp,
+                                                      str(error)))
+        if value is not None:
+            resolved[index][exp] = value
+    return resolved
+
+
+def get_preprocessor_command(compiler, include_dirs, defines, config_file):
+    """
+    Gives the command preprocessing the expressions with the
+    configuration given on the command line.
+
+    :param compiler: C compiler command, e.g. 'cc'
+    :param include_dirs: List of include dirs
+    :param defines: List of macro definitions as NAME or NAME=VALUE
+    :param config_file: Config file name or None
+    :return: Preprocessor command and options
+    """
+    command = shlex.split(compiler) + ['-E']
+    command += ['-I' + include_dir for include_dir in include_dirs]
+    command += ['-D' + define for define in defines]
+    if config_file:
+        command.append('-DMBEDTLS_CONFIG_FILE="%s"' %
+                       os.path.abspath(config_file))
+    return command
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# Input and output files of the test suites code generator.
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Reading of the input files and writing of the output files of
+generate_test_code.py. Output files are replaced atomically and only
+when their content changes, so that build tools do not rebuild targets
+depending on them.
+"""
+
+
+import io
+import os
+import sys
+import mmap
+import hashlib
+import contextlib
+
+
+class GeneratorInputError(Exception):
+    """
+    Exception to indicate error in the input files to this script.
+    This includes missing patterns, test function names and other
+    parsing errors.
+    """
+
+
+class FileWrapper(object):
+    """
+    Buffered text file reader with attribute line_no, that indicates
+    line number for the line that is read.
+
+    The file is read and decoded in large blocks, rather than a line
+    at a time. Files larger than a block are mapped into memory and the
+    blocks are read from the mapping. Like lines read from a file
+    object, each line ends with a newline. Trailing whitespace is
+    stripped from the lines.
+    """
+
+    # Number of bytes read at a time.
+    BLOCK_SIZE = 64 * 1024
+
+    # Map files larger than a block into memory. Set to False to read
+    # all files with read() calls.
+    USE_MMAP = True
+
+    def __init__(self, file_name, content=None):
+        """
+        Open the file and initialize the line number to 0.
+
+        :param file_name: File path to open.
+        :param content: Optional file content as text or bytes. If
+               given, it is read instead of the file and file_name is
+               only used in messages.
+        """
+        self.name = file_name
+        if content is None:
+            self._file = self._open(file_name)
+        else:
+            if not isinstance(content, bytes):
+                content = content.encode(sys.getdefaultencoding())
+            self._file = io.BytesIO(content)
+        self._lines = iter([])
+        self._partial_line = b''
+        self._line_no = 0
+
+    def _open(self, file_name):
+        """
+        Opens the file for reading, mapped into memory if it is larger
+        than a block. Mapping is optional: the file is read with read()
+        calls if it cannot be mapped.
+
+        :param file_name: File path to open.
+        :return: File or mmap object with read() and close() methods.
+        """
+        in_f = io.open(file_name, 'rb')
+        if not self.USE_MMAP or \
+                os.fstat(in_f.fileno()).st_size <= self.BLOCK_SIZE:
+            return in_f
+        try:
+            mapped = mmap.mmap(in_f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (EnvironmentError, ValueError):
+            return in_f
+        # The mapping stays valid after the file is closed.
+        in_f.close()
+        return mapped
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def close(self):
+        """
+        Close the file.
+        """
+        self._file.close()
+
+    def _read_block(self):
+        """
+        Reads and decodes the next block of complete lines. A line that
+        continues past the end of the block is kept for the next block.
+
+        :return: False at the end of the file, else True.
+        """
+        block = b''
+        while not block:
+            data = self._file.read(self.BLOCK_SIZE)
+            if data:
+                data = self._partial_line + data
+                end = data.rfind(b'\n') + 1
+                block, self._partial_line = data[:end], data[end:]
+            elif self._partial_line:
+                # Last line without a newline
+                block, self._partial_line = self._partial_line, b''
+            else:
+                return False
+        lines = block.decode(sys.getdefaultencoding()).split('\n')
+        if block.endswith(b'\n'):
+            lines.pop()
+        self._lines = iter([line.rstrip() + '\n' for line in lines])
+        return True
+
+    def next(self):
+        """
+        Python 2 iterator method. Gives the next line and counts the
+        line numbers as each line is read.
+
+        :return: Line read from file.
+        """
+        line = next(self._lines, None)
+        while line is None:
+            if not self._read_block():
+                raise StopIteration
+            line = next(self._lines, None)
+        self._line_no += 1
+        return line
+
+    # Python 3 iterator method
+    __next__ = next
+
+    def get_line_no(self):
+        """
+        Gives current line number.
+        """
+        return self._line_no
+
+    line_no = property(get_line_no)
+
+
+def replace_file(src_file, dst_file):
+    """
+    Renames src_file to dst_file, replacing dst_file if it exists.
+
+    :param src_file: File to rename
+    :param dst_file: New file name
+    :return:
+    """
+    if hasattr(os, 'replace'):
+        os.replace(src_file, dst_file)  # Python 3
+    else:
+        # Python 2 os.rename() does not replace an existing file on Windows
+        if os.name == 'nt' and os.path.exists(dst_file):
+            os.remove(dst_file)
+        os.rename(src_file, dst_file)
+
+
+@contextlib.contextmanager
+def open_atomic(file_name, binary=False):
+    """
+    Opens a file for writing such that readers never see it partially
+    written. Output goes to a temporary file in the same dir that is
+    renamed to file_name once it is written completely.
+
+    :param file_name: Output file name
+    :param binary: Open the file in binary mode
+    :return: File object of the temporary file
+    """
+    tmp_file = '%s.%d.tmp' % (file_name, os.getpid())
+    try:
+        with open(tmp_file, 'wb' if binary else 'w') as out_f:
+            yield out_f
+        replace_file(tmp_file, file_name)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def write_file_if_changed(file_name, content, binary=False):
+    """
+    Writes content to a file, unless the file already has the same
+    content. Unchanged outputs keep their timestamps, so that build
+    tools do not rebuild anything that depends on them.
+
+    :param file_name: Output file name
+    :param content: File content
+    :param binary: Content is bytes to be written in binary mode
+    :return: True if the file was written.
+    """
+    if os.path.exists(file_name):
+        try:
+            with open(file_name, 'rb' if binary else 'r') as in_f:
+                unchanged = in_f.read() == content
+        except ValueError:
+            # Not text, e.g. a data file previously written in binary
+            unchanged = False
+        if unchanged:
+            return False
+    with open_atomic(file_name, binary) as out_f:
+        out_f.write(content)
+    return True
+
+
+def file_digest(file_name):
+    """
+    Gives digest of a file's content.
+
+    :param file_name: File name
+    :return: Hex digest
+    """
+    with open(file_name, 'rb') as in_f:
+        return hashlib.sha256(in_f.read()).hexdigest()
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+# Functions file parser of the test suites code generator.
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Parsing of test_suite_<module>.function files for generate_test_code.py.
+The test functions are wrapped in functions taking their parameters as
+an array, guarded by their dependencies, and dispatched by function Id.
+"""
+
+
+import re
+
+from generate_test_code_files import GeneratorInputError
+
+
+BEGIN_HEADER_REGEX = r'/\*\s*BEGIN_HEADER\s*\*/'
+END_HEADER_REGEX = r'/\*\s*END_HEADER\s*\*/'
+
+BEGIN_SUITE_HELPERS_REGEX = r'/\*\s*BEGIN_SUITE_HELPERS\s*\*/'
+END_SUITE_HELPERS_REGEX = r'/\*\s*END_SUITE_HELPERS\s*\*/'
+
+BEGIN_DEP_REGEX = r'BEGIN_DEPENDENCIES'
+END_DEP_REGEX = r'END_DEPENDENCIES'
+
+BEGIN_CASE_REGEX = r'/\*\s*BEGIN_CASE\s*(?P<depends_on>.*?)\s*\*/'
+END_CASE_REGEX = r'/\*\s*END_CASE\s*\*/'
+
+DEPENDENCY_REGEX = r'depends_on:(?P<dependencies>.*)'
+C_IDENTIFIER_REGEX = r'!?[a-z_][a-z0-9_]*$'
+TEST_FUNCTION_VALIDATION_REGEX = r'\s*void\s+(?P<func_name>\w+)\s*\('
+INT_CHECK_REGEX = r'int\s+.*'
+CHAR_CHECK_REGEX = r'char\s*\*\s*.*'
+DATA_T_CHECK_REGEX = r'data_t\s*\*\s*.*'
+FUNCTION_ARG_LIST_END_REGEX = r'.*\)'
+EXIT_LABEL_REGEX = r'^exit:'
+
+# Matches any of the section start markers in a .function file
+FUNCTIONS_FILE_MARKER_REGEX = '|'.join([BEGIN_HEADER_REGEX,
+                                        BEGIN_SUITE_HELPERS_REGEX,
+                                        BEGIN_DEP_REGEX, BEGIN_CASE_REGEX])
+
+
+def split_dep(dep):
+    """
+    Split NOT character '!' from dependency. Used by gen_dependencies()
+
+    :param dep: Dependency list
+    :return: string tuple. Ex: ('!', MACRO) for !MACRO and ('', MACRO) for
+             MACRO.
+    """
+    return ('!', dep[1:]) if dep[0] == '!' else ('', dep)
+
+
+def gen_dependencies(dependencies):
+    """
+    Test suite data and functions specifies compile time dependencies.
+    This function generates C preprocessor code from the input
+    dependency list. Caller uses the generated preprocessor code to
+    wrap dependent code.
+    A dependency in the input list can have a leading '!' character
+    to negate a condition. '!' is separated from the dependency using
+    function split_dep() and proper preprocessor check is generated
+    accordingly.
+
+    :param dependencies: List of dependencies.
+    :return: if defined and endif code with macro annotations for
+             readability.
+    """
+    dep_start = ''.join(['#if %sdefined(%s)\n' % (x, y) for x, y in
+                         map(split_dep, dependencies)])
+    dep_end = ''.join(['#endif /* %s */\n' %
+                       x for x in reversed(dependencies)])
+
+    return dep_start, dep_end
+
+
+def gen_dependencies_one_line(dependencies):
+    """
+    Similar to gen_dependencies() but generates dependency checks in one line.
+    Useful for generating code with #else block.
+
+    :param dependencies: List of dependencies.
+    :return: Preprocessor check code
+    """
+    defines = '#if ' if dependencies else ''
+    defines += ' && '.join(['%sdefined(%s)' % (x, y) for x, y in map(
+        split_dep, dependencies)])
+    return defines
+
+
+def gen_function_wrapper(name, local_vars, args_dispatch):
+    """
+    Creates test function wrapper code. A wrapper has the code to
+    unpack parameters from parameters[] array.
+
+    :param name: Test function name
+    :param local_vars: Local variables declaration code
+    :param args_dispatch: List of dispatch arguments.
+           Ex: ['(char *)params[0]', '*((int *)params[1])']
+    :return: Test function wrapper.
+    """
+    # Then create the wrapper
+    wrapper = '''
+void {name}_wrapper( void ** params )
+{{
+{unused_params}{locals}
+    {name}( {args} );
+}}
+'''.format(name=name,
+           unused_params='' if args_dispatch else '    (void)params;\n',
+           args=', '.join(args_dispatch),
+           locals=local_vars)
+    return wrapper
+
+
+def gen_dispatch(name, dependencies):
+    """
+    Test suite code template main_test.function defines a C function
+    array to contain test case functions. This function generates an
+    initializer entry for a function in that array. The entry is
+    composed of a compile time check for the test function
+    dependencies. At compile time the test function is assigned when
+    dependencies are met, else NULL is assigned.
+
+    :param name: Test function name
+    :param dependencies: List of dependencies
+    :return: Dispatch code.
+    """
+    if dependencies:
+        preprocessor_check = gen_dependencies_one_line(dependencies)
+        dispatch_code = '''
+{preprocessor_check}
+    {name}_wrapper,
+#else
+    NULL,
+#endif
+'''.format(preprocessor_check=preprocessor_check, name=name)
+    else:
+        dispatch_code = '''
+    {name}_wrapper,
+'''.format(name=name)
+
+    return dispatch_code
+
+
+def parse_until_pattern(funcs_f, end_regex):
+    """
+    Matches pattern end_regex to the lines read from the file object.
+    Returns the lines read until end pattern is matched.
+
+    :param funcs_f: file object for .function file
+    :param end_regex: Pattern to stop parsing
+    :return: Lines read before the end pattern
+    """
+    headers = ['#line %d "%s"\n' % (funcs_f.line_no + 1, funcs_f.name)]
+    end_search = re.compile(end_regex).search
+    for line in funcs_f:
+        if end_search(line):
+            break
+        headers.append(line)
+    else:
+        raise GeneratorInputError("file: %s - end pattern [%s] not found!" %
+                                  (funcs_f.name, end_regex))
+
+    return ''.join(headers)
+
+
+def validate_dependency(dependency):
+    """
+    Validates a C macro and raises GeneratorInputError on invalid input.
+    :param dependency: Input macro dependency
+    :return: input dependency stripped of leading & trailing white spaces.
+    """
+    dependency = dependency.strip()
+    if not re.match(C_IDENTIFIER_REGEX, dependency, re.I):
+        raise GeneratorInputError('Invalid dependency %s' % dependency)
+    return dependency
+
+
+def parse_dependencies(inp_str):
+    """
+    Parses dependencies out of inp_str, validates them and returns a
+    list of macros.
+
+    :param inp_str: Input string with macros delimited by ':'.
+    :return: list of dependencies
+    """
+    dependencies = [dep for dep in map(validate_dependency,
+                                       inp_str.split(':'))]
+    return dependencies
+
+
+def parse_suite_dependencies(funcs_f):
+    """
+    Parses test suite dependencies specified at the top of a
+    .function file, that starts with pattern BEGIN_DEPENDENCIES
+    and end with END_DEPENDENCIES. Dependencies are specified
+    after pattern 'depends_on:' and are delimited by ':'.
+
+    :param funcs_f: file object for .function file
+    :return: List of test suite dependencies.
+    """
+    dependencies = []
+    dependency_search = re.compile(DEPENDENCY_REGEX).search
+    end_search = re.compile(END_DEP_REGEX).search
+    for line in funcs_f:
+        match = dependency_search(line.strip())
+        if match:
+            try:
+                dependencies = parse_dependencies(match.group('dependencies'))
+            except GeneratorInputError as error:
+                raise GeneratorInputError(
+                    str(error) + " - %s:%d" % (funcs_f.name, funcs_f.line_no))
+        if end_search(line):
+            break
+    else:
+        raise GeneratorInputError("file: %s - end dependency pattern [%s]"
+                                  " not found!" % (funcs_f.name,
+                                                   END_DEP_REGEX))
+
+    return dependencies
+
+
+def parse_function_dependencies(line):
+    """
+    Parses function dependencies, that are in the same line as
+    comment BEGIN_CASE. Dependencies are specified after pattern
+    'depends_on:' and are delimited by ':'.
+
+    :param line: Line from .function file that has dependencies.
+    :return: List of dependencies.
+    """
+    dependencies = []
+    match = re.search(BEGIN_CASE_REGEX, line)
+    dep_str = match.group('depends_on')
+    if dep_str:
+        match = re.search(DEPENDENCY_REGEX, dep_str)
+        if match:
+            dependencies += parse_dependencies(match.group('dependencies'))
+
+    return dependencies
+
+
+def parse_function_arguments(line):
+    """
+    Parses test function signature for validation and generates
+    a dispatch wrapper function that translates input test vectors
+    read from the data file into test function arguments.
+
+    :param line: Line from .function file that has a function
+                 signature.
+    :return: argument list, local variables for
+             wrapper function and argument dispatch code.
+    """
+    args = []
+    local_vars = ''
+    args_dispatch = []
+    arg_idx = 0
+    # Remove characters before arguments
+    line = line[line.find('(') + 1:]
+    # Process arguments, ex: <type> arg1, <type> arg2 )
+    # This script assumes that the argument list is terminated by ')'
+    # i.e. the test functions will not have a function pointer
+    # argument.
+    for arg in line[:line.find(')')].split(','):
+        arg = arg.strip()
+        if arg == '':
+            continue
+        if re.search(INT_CHECK_REGEX, arg.strip()):
+            args.append('int')
+            args_dispatch.append('*( (int *) params[%d] )' % arg_idx)
+        elif re.search(CHAR_CHECK_REGEX, arg.strip()):
+            args.append('char*')
+            args_dispatch.append('(char *) params[%d]' % arg_idx)
+        elif re.search(DATA_T_CHECK_REGEX, arg.strip()):
+            args.append('hex')
+            # create a structure
+            pointer_initializer = '(uint8_t *) params[%d]' % arg_idx
+            len_initializer = '*( (uint32_t *) params[%d] )' % (arg_idx+1)
+            local_vars += """    data_t data%d = {%s, %s};
+""" % (arg_idx, pointer_initializer, len_initializer)
+
+            args_dispatch.append('&data%d' % arg_idx)
+            arg_idx += 1
+        else:
+            raise ValueError("Test function arguments can only be 'int', "
+                             "'char *' or 'data_t'\n%s" % line)
+        arg_idx += 1
+
+    return args, local_vars, args_dispatch
+
+
+def generate_function_code(name, code, local_vars, args_dispatch,
+                           dependencies):
+    """
+    Generate function code with preprocessor checks and parameter dispatch
+    wrapper.
+
+    :param name: Function name
+    :param code: Function code
+    :param local_vars: Local variables for function wrapper
+    :param args_dispatch: Argument dispatch code
+    :param dependencies: Preprocessor dependencies list
+    :return: Final function code
+    """
+    # Add exit label if not present
+    if code.find('exit:') == -1:
+        split_code = code.rsplit('}', 1)
+        if len(split_code) == 2:
+            code = """exit:
+    ;
+}""".join(split_code)
+
+    code += gen_function_wrapper(name, local_vars, args_dispatch)
+    preprocessor_check_start, preprocessor_check_end = \
+        gen_dependencies(dependencies)
+    return preprocessor_check_start + code + preprocessor_check_end
+
+
+def parse_function_signature(funcs_f):
+    """
+    Parses the lines of a test function up to the end of its signature.
+
+    :param funcs_f: file object of the functions file.
+    :return: Function name, arguments, local variables, argument
+             dispatch code and list of the lines read.
+    """
+    code = []
+    signature_match = re.compile(TEST_FUNCTION_VALIDATION_REGEX, re.I).match
+    for line in funcs_f:
+        code.append(line)
+        # Check function signature. Function signature may be split
+        # across multiple lines. Here we try to find the start of
+        # arguments list, then remove '\n's and apply the regex to
+        # detect function start. The regex needs the first '(' of
+        # the function, so it is applied once, at the first line
+        # with a '('.
+        arg_list_start = line.find('(')
+        if arg_list_start != -1:
+            break
+    else:
+        raise GeneratorInputError("file: %s - Test functions not found!" %
+                                  funcs_f.name)
+
+    up_to_arg_list_start = ''.join(code[:-1]) + line[:arg_list_start + 1]
+    match = signature_match(up_to_arg_list_start.replace('\n', ' '))
+    if not match:
+        raise GeneratorInputError("file: %s - Test functions not found!" %
+                                  funcs_f.name)
+    # check if we have full signature i.e. split in more lines
+    signature = [line]
+    if not re.match(FUNCTION_ARG_LIST_END_REGEX, line):
+        arg_list_end_search = re.compile(FUNCTION_ARG_LIST_END_REGEX).search
+        for lin in funcs_f:
+            signature.append(lin)
+            if arg_list_end_search(lin):
+                break
+    code[-1] = ''.join(signature)
+    args, local_vars, args_dispatch = parse_function_arguments(code[-1])
+    return match.group('func_name'), args, local_vars, args_dispatch, code
+
+
+def parse_function_code(funcs_f, dependencies, suite_dependencies):
+    """
+    Parses out a function from function file object and generates
+    function and dispatch code.
+
+    :param funcs_f: file object of the functions file.
+    :param dependencies: List of dependencies
+    :param suite_dependencies: List of test suite dependencies
+    :return: Function name, arguments, function code and dispatch code.
+    """
+    line_directive = '#line %d "%s"\n' % (funcs_f.line_no + 1, funcs_f.name)
+    has_exit_label = False
+    name, args, local_vars, args_dispatch, code = \
+        parse_function_signature(funcs_f)
+
+    # Prefix test function name with 'test_'
+    code = [''.join(code).replace(name, 'test_' + name, 1)]
+    name = 'test_' + name
+
+    end_search = re.compile(END_CASE_REGEX).search
+    exit_label_search = re.compile(EXIT_LABEL_REGEX).search
+    for line in funcs_f:
+        if end_search(line):
+            break
+        if not has_exit_label:
+            has_exit_label = exit_label_search(line.strip()) is not None
+        code.append(line)
+    else:
+        raise GeneratorInputError("file: %s - end case pattern [%s] not "
+                                  "found!" % (funcs_f.name, END_CASE_REGEX))
+
+    code = line_directive + ''.join(code)
+    code = generate_function_code(name, code, local_vars, args_dispatch,
+                                  dependencies)
+    dispatch_code = gen_dispatch(name, suite_dependencies + dependencies)
+    return (name, args, code, dispatch_code)
+
+
+def parse_function_sections(funcs_f):
+    """
+    Parses a test_suite_xxx.function file into its sections.
+
+    :param funcs_f: file object of the functions file.
+    :return: List of test suite dependencies, list of header and suite
+             helpers code and list of (function name, arguments,
+             function code, dispatch code) tuples in file order.
+    """
+    suite_helpers = []
+    suite_dependencies = []
+    suite_functions = []
+    func_names = set()
+    marker_search = re.compile(FUNCTIONS_FILE_MARKER_REGEX).search
+    for line in funcs_f:
+        # Most lines are code. Only lines with a section marker need
+        # to be checked for the type of the section.
+        if not marker_search(line):
+            continue
+        if re.search(BEGIN_HEADER_REGEX, line):
+            suite_helpers.append(parse_until_pattern(funcs_f,
+                                                     END_HEADER_REGEX))
+        elif re.search(BEGIN_SUITE_HELPERS_REGEX, line):
+            suite_helpers.append(parse_until_pattern(funcs_f,
+                                                     END_SUITE_HELPERS_REGEX))
+        elif re.search(BEGIN_DEP_REGEX, line):
+            suite_dependencies += parse_suite_dependencies(funcs_f)
+        elif re.search(BEGIN_CASE_REGEX, line):
+            try:
+                dependencies = parse_function_dependencies(line)
+            except GeneratorInputError as error:
+                raise GeneratorInputError(
+                    "%s:%d: %s" % (funcs_f.name, funcs_f.line_no,
+                                   str(error)))
+            func_name, args, func_code, func_dispatch =\
+                parse_function_code(funcs_f, dependencies, suite_dependencies)
+            if func_name in func_names:
+                raise GeneratorInputError(
+                    "file: %s - function %s re-declared at line %d" %
+                    (funcs_f.name, func_name, funcs_f.line_no))
+            func_names.add(func_name)
+            suite_functions.append((func_name, args, func_code,
+                                    func_dispatch))
+    return suite_dependencies, suite_helpers, suite_functions
+
+
+def gen_functions_code(sections, used_functions=None):
+    """
+    Generates the function code, dispatch code and function Ids of a
+    test suite from the sections of its functions file. Only the test
+    functions called by the suite's test cases are needed: the others
+    can be left out, so that suites sharing a functions file do not
+    compile each other's functions. Header and suite helpers code is
+    always kept: which static helpers a function calls is not known
+    without parsing C, and dropping a helper would leave the static
+    variables it shares with the other helpers unused, which -Wall
+    warns about. Unused static functions are not warned about, as the
+    test code is built with -Wno-unused-function.
+
+    :param sections: Sections from parse_function_sections()
+    :param used_functions: Optional InternTable or list of the names
+           of the test functions to keep, in function Id order, as
+           filled by gen_from_test_data(). All functions are kept and
+           numbered in file order if not given.
+    :return: List of test suite dependencies, test function dispatch
+             code, function code and a dict with function identifiers
+             and arguments info.
+    """
+    suite_dependencies, suite_helpers, suite_functions = sections
+    code = list(suite_helpers)
+    dispatch = {}
+    func_info = {}
+    if used_functions is None:
+        used_functions = [function[0] for function in suite_functions]
+    func_ids = dict((func_name, func_id) for func_id, func_name
+                    in enumerate(used_functions))
+    for func_name, args, func_code, func_dispatch in suite_functions:
+        if func_name not in func_ids:
+            continue
+        func_id = func_ids[func_name]
+        # Generate dispatch code and enumeration info
+        func_info[func_name] = (func_id, args)
+        dispatch[func_id] = func_dispatch
+        code.append(func_code)
+
+    dispatch_code = ''.join('/* Function Id: %d */\n%s' %
+                            (func_id, dispatch[func_id])
+                            for func_id in sorted(dispatch))
+    func_code = ''.join(code).join(gen_dependencies(suite_dependencies))
+    return suite_dependencies, dispatch_code, func_code, func_info
+
+
+def gen_function_names(func_info):
+    """
+    Generates the initializer for the table of test function names
+    indexed by function Id. The names are used in test timing reports.
+
+    :param func_info: Dict keyed by function and with function id
+           and arguments info
+    :return: Function names code
+    """
+    names = sorted(func_info, key=lambda name: func_info[name][0])
+    return ''.join('    "%s",\n' % name for name in names)
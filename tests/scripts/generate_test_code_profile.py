@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# Profiling of the test suites code generator.
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Measurement of the phases of test suite generation for the --profile
+and --profile-dump options of generate_test_code.py.
+"""
+
+
+import sys
+import time
+import cProfile
+import contextlib
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+
+# Wall clock of the profiler and --watch, with the best resolution
+# available.
+timer = getattr(time, 'perf_counter', time.time)
+
+
+class PhaseProfiler(object):
+    """
+    Measures wall time and peak memory allocated by the phases of test
+    suite generation. Peak memory is measured with tracemalloc, that is
+    not available with Python 2, and only when tracemalloc is not
+    already tracing. Times include the tracing overhead.
+    """
+
+    def __init__(self, enabled=True):
+        """
+        Initialize profiler.
+
+        :param enabled: Measure phases. A disabled profiler records
+                        nothing.
+        """
+        self.enabled = enabled
+        self.records = []
+
+    @contextlib.contextmanager
+    def phase(self, name, file_name):
+        """
+        Context manager measuring the code run in its context as a
+        phase. Adds a (phase name, file name, seconds, peak bytes or
+        None) tuple to records.
+
+        :param name: Phase name
+        :param file_name: Name of the file processed by the phase
+        """
+        if not self.enabled:
+            yield
+            return
+        trace = tracemalloc is not None and not tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.start()
+        start = timer()
+        try:
+            yield
+        finally:
+            elapsed = timer() - start
+            peak = None
+            if trace:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self.records.append((name, file_name, elapsed, peak))
+
+    def add_records(self, records):
+        """
+        Adds phase measurements made by another profiler, like the ones
+        of generation jobs run in other processes.
+
+        :param records: List of phase measurements as in records
+        :return:
+        """
+        if self.enabled:
+            self.records.extend(records)
+
+
+def print_profile(records):
+    """
+    Prints phase measurements, slowest first, followed by the totals
+    per phase.
+
+    :param records: List of phase measurements as in
+                    PhaseProfiler.records
+    :return:
+    """
+    def format_peak(peak):
+        """
+        Formats peak memory in KiB.
+        """
+        return '-' if peak is None else '%d' % (peak // 1024)
+
+    def write_row(*row):
+        """
+        Writes a table row.
+        """
+        sys.stdout.write('{0:<32} {1:>10} {2:>10}  {3}'.format(*row).rstrip() +
+                         '\n')
+
+    write_row('phase', 'seconds', 'peak KiB', 'file')
+    totals = {}
+    for name, file_name, elapsed, peak in sorted(
+            records, key=lambda record: record[2], reverse=True):
+        write_row(name, '%.4f' % elapsed, format_peak(peak), file_name)
+        total_elapsed, total_peak = totals.get(name, (0, None))
+        if peak is not None:
+            total_peak = max(peak, total_peak or 0)
+        totals[name] = (total_elapsed + elapsed, total_peak)
+    sys.stdout.write('\n')
+    write_row('total', 'seconds', 'peak KiB', '')
+    for name in sorted(totals, key=lambda name: totals[name][0],
+                       reverse=True):
+        total_elapsed, total_peak = totals[name]
+        write_row(name, '%.4f' % total_elapsed, format_peak(total_peak), '')
+
+
+@contextlib.contextmanager
+def dump_profile(dump_file):
+    """
+    Runs the code in the context under cProfile and dumps the
+    statistics to a file.
+
+    :param dump_file: Statistics file name. No profiling if None.
+    :return:
+    """
+    if not dump_file:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(dump_file)
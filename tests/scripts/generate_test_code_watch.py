@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# Watch mode of the test suites code generator.
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Watching of the input files of the test suites for the --watch option
+of generate_test_code.py, with inotify on Linux and by polling
+elsewhere. Only the suites affected by a change are generated again.
+"""
+
+
+import os
+import sys
+import time
+import select
+try:
+    import ctypes
+    import ctypes.util
+except ImportError:
+    # Python built without ctypes. --watch polls for changes.
+    ctypes = None
+
+from generate_test_code_files import GeneratorInputError
+from generate_test_code_profile import timer
+
+
+class InotifyWatcher(object):
+    """
+    Waits for changes in directories with Linux inotify, called through
+    ctypes.
+    """
+
+    # Events of files created, written, moved or deleted.
+    EVENTS = 0x8 | 0x40 | 0x80 | 0x100 | 0x200
+
+    def __init__(self, dirs):
+        """
+        Starts watching the directories.
+
+        :param dirs: Directories to watch
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = libc.inotify_init()
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init failed')
+        for watch_dir in dirs:
+            if not isinstance(watch_dir, bytes):
+                watch_dir = watch_dir.encode(sys.getfilesystemencoding())
+            if libc.inotify_add_watch(self._fd, watch_dir, self.EVENTS) < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), 'inotify_add_watch failed')
+
+    def wait(self, timeout):
+        """
+        Waits until a file changes in the watched directories or the
+        timeout expires. Events are only used to wake up, the changed
+        files are found by comparing file snapshots.
+
+        :param timeout: Timeout in seconds
+        :return:
+        """
+        if select.select([self._fd], [], [], timeout)[0]:
+            # Editors write a file in several steps, wait for the last.
+            while select.select([self._fd], [], [], 0.02)[0]:
+                os.read(self._fd, 65536)
+
+    def close(self):
+        """
+        Stops watching.
+        """
+        os.close(self._fd)
+
+
+class PollingWatcher(object):
+    """
+    Waits for changes by polling, where inotify is not available.
+    """
+
+    def wait(self, timeout):
+        """
+        Waits for the polling interval.
+
+        :param timeout: Polling interval in seconds
+        :return:
+        """
+        time.sleep(timeout)
+
+    def close(self):
+        """
+        Nothing to release.
+        """
+
+
+def make_watcher(dirs):
+    """
+    Gives an InotifyWatcher for the directories if inotify is
+    available, else a PollingWatcher.
+
+    :param dirs: Directories to watch
+    :return: Watcher object
+    """
+    if ctypes is not None and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(dirs)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher()
+
+
+def snapshot_files(files):
+    """
+    Takes modification time and size of files, to detect changes.
+
+    :param files: File names
+    :return: Dictionary of file name to (mtime, size). None for a
+             missing file.
+    """
+    snapshot = {}
+    for file_name in files:
+        try:
+            stat = os.stat(file_name)
+            snapshot[file_name] = (stat.st_mtime, stat.st_size)
+        except OSError:
+            snapshot[file_name] = None
+    return snapshot
+
+
+def find_affected_suites(suites, changed, shared_files, merged=False):
+    """
+    Finds the test suites to regenerate after input files changed.
+
+    :param suites: List of (functions file, data file) tuples
+    :param changed: Set of changed file names
+    :param shared_files: Template, platform and helpers file names.
+           All suites are affected when one of them changes.
+    :param merged: The data files of a functions file are generated
+           as a merged test suite. All of them are affected when one
+           of them changes.
+    :return: List of affected (functions file, data file) tuples
+    """
+    if changed.intersection(shared_files):
+        return list(suites)
+    affected = [(funcs_file, data_file) for funcs_file, data_file in suites
+                if funcs_file in changed or data_file in changed]
+    if merged:
+        funcs_files = set(funcs_file for funcs_file, _ in affected)
+        affected = [(funcs_file, data_file)
+                    for funcs_file, data_file in suites
+                    if funcs_file in funcs_files]
+    return affected
+
+
+def watch_suites(suites, generate, discover, interval, **input_info):
+    """
+    Generates test suites, then watches their input files and
+    regenerates the suites affected by each change until interrupted.
+    Parsed template and functions files stay in memory between
+    regenerations. Errors in the inputs are reported and watching
+    goes on.
+
+    :param suites: List of (functions file, data file) tuples
+    :param generate: Function generating suites, like generate_suites()
+           of generate_test_code.py. It is called with a list of suites
+           and input_info and returns the shared inputs, that are
+           passed to the next calls.
+    :param discover: Optional function finding the suites again after
+           each change, to pick up new data files.
+    :param interval: Polling interval and inotify timeout in seconds
+    :param input_info: generate_suites() parameters
+    :return:
+    """
+    shared_files = [input_info['template_file'],
+                    input_info['platform_file'],
+                    input_info['helpers_file']]
+
+    def input_files():
+        """
+        Gives the input files of the current suites.
+        """
+        files = set(shared_files)
+        for funcs_file, data_file in suites:
+            files.update([funcs_file, data_file])
+        return files
+
+    def generate_affected(to_generate, shared_inputs):
+        """
+        Generates suites, reporting input errors.
+        :return: Shared inputs for the next call: the ones returned by
+                 generate, or the given ones if generation failed. None
+                 makes the next call read them again.
+        """
+        start = timer()
+        try:
+            shared_inputs = generate(to_generate, shared_inputs=shared_inputs,
+                                     **input_info)
+        except (GeneratorInputError, IOError, ValueError) as err:
+            sys.stderr.write("%s: input error: %s\n" %
+                             (os.path.basename(sys.argv[0]), str(err)))
+            return shared_inputs
+        sys.stdout.write("Generated %d suite%s in %.0f ms\n" %
+                         (len(to_generate),
+                          '' if len(to_generate) == 1 else 's',
+                          1000 * (timer() - start)))
+        sys.stdout.flush()
+        return shared_inputs
+
+    snapshot = snapshot_files(input_files())
+    shared_inputs = generate_affected(suites, None)
+    dirs = set(os.path.dirname(os.path.abspath(file_name))
+               for file_name in input_files())
+    dirs.add(os.path.abspath(input_info['suites_dir']))
+    watcher = make_watcher(sorted(dirs))
+    try:
+        while True:
+            watcher.wait(interval)
+            if discover:
+                suites = discover()
+            new_snapshot = snapshot_files(input_files())
+            changed = set(file_name for file_name in new_snapshot
+                          if new_snapshot[file_name] !=
+                          snapshot.get(file_name))
+            snapshot = new_snapshot
+            if changed.intersection(shared_files):
+                shared_inputs = None
+            affected = [suite for suite in
+                        find_affected_suites(
+                            suites, changed, shared_files,
+                            input_info.get('merge_data_files', False))
+                        if snapshot[suite[1]] is not None]
+            if affected:
+                shared_inputs = generate_affected(affected, shared_inputs)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
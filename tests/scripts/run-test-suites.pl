@@ -48,11 +48,15 @@ my $prefix = $^O eq "MSWin32" ? '' : './';
 my ($failed_suites, $total_tests_run, $failed, $suite_cases_passed,
     $suite_cases_failed, $suite_cases_skipped, $total_cases_passed,
     $total_cases_failed, $total_cases_skipped );
+my $suites_run = 0;
 
-for my $suite (@suites)
+# Prints and counts the results of a test suite from its output.
+sub report_suite
 {
+    my ( $suite, $result ) = @_;
+
     print "$suite ", "." x ( 72 - length($suite) - 2 - 4 ), " ";
-    my $result = `$prefix$suite`;
+    $suites_run++;
 
     $suite_cases_passed = () = $result =~ /.. PASS/g;
     $suite_cases_failed = () = $result =~ /.. FAILED/g;
@@ -66,7 +70,7 @@ for my $suite (@suites)
     }
 
     my ($passed, $tests, $skipped) = $result =~ /([0-9]*) \/ ([0-9]*) tests.*?([0-9]*) skipped/;
-    $total_tests_run += $tests - $skipped;
+    $total_tests_run += $tests - $skipped if defined $tests;
 
     if ( $verbose ) {
         print "(test cases passed:", $suite_cases_passed,
@@ -82,9 +86,32 @@ for my $suite (@suites)
     $total_cases_skipped += $suite_cases_skipped;
 }
 
+for my $suite (@suites)
+{
+    my $result = `$prefix$suite`;
+
+    # A test suite generated with --merge-data-files runs several data files
+    # and prints the results of each after its test cases. Report them per
+    # data file, named like the test suites of the data files.
+    my @parts = split /^(?:.*[\/\\])?(\S+)\.datax: ((?:PASSED|FAILED) \(.*)$/m,
+                      $result;
+    if ( @parts == 1 ) {
+        report_suite( $suite, $result );
+        next;
+    }
+    my $output = shift @parts;
+    while ( @parts > 1 ) {
+        my ( $data_suite, $summary ) = splice( @parts, 0, 2 );
+        report_suite( $data_suite, $output . $summary );
+        $output = @parts ? shift @parts : '';
+    }
+    # The test suite stopped before the end of a data file
+    report_suite( $suite, $output ) unless $output =~ /^(PASSED|FAILED) \(/m;
+}
+
 print "-" x 72, "\n";
 print $failed_suites ? "FAILED" : "PASSED";
-printf " (%d suites, %d tests run)\n", scalar @suites, $total_tests_run;
+printf " (%d suites, %d tests run)\n", $suites_run, $total_tests_run;
 
 if ( $verbose ) {
     print "  test cases passed :", $total_cases_passed, "\n";
@@ -23,6 +23,7 @@ Unit tests for generate_test_code.py
 """
 
 
+import io
 try:
     # Python 2
     from StringIO import StringIO
@@ -32,22 +33,29 @@ except ImportError:
 from unittest import TestCase, main as unittest_main
 try:
     # Python 2
-    from mock import patch
+    from mock import patch, ANY
 except ImportError:
     # Python 3
-    from unittest.mock import patch
-from generate_test_code import gen_dependencies, gen_dependencies_one_line
-from generate_test_code import gen_function_wrapper, gen_dispatch
-from generate_test_code import parse_until_pattern, GeneratorInputError
-from generate_test_code import parse_suite_dependencies
-from generate_test_code import parse_function_dependencies
-from generate_test_code import parse_function_arguments, parse_function_code
-from generate_test_code import parse_functions, END_HEADER_REGEX
-from generate_test_code import END_SUITE_HELPERS_REGEX, escaped_split
-from generate_test_code import parse_test_data, gen_dep_check
-from generate_test_code import gen_expression_check, write_dependencies
-from generate_test_code import write_parameters, gen_suite_dep_checks
-from generate_test_code import gen_from_test_data
+    from unittest.mock import patch, ANY
+from generate_test_code import parse_functions, gen_from_test_data
+from generate_test_code import DataOptions
+from generate_test_code_files import GeneratorInputError
+from generate_test_code_functions import gen_dependencies
+from generate_test_code_functions import gen_dependencies_one_line
+from generate_test_code_functions import gen_function_wrapper, gen_dispatch
+from generate_test_code_functions import parse_until_pattern
+from generate_test_code_functions import parse_suite_dependencies
+from generate_test_code_functions import parse_function_dependencies
+from generate_test_code_functions import parse_function_arguments
+from generate_test_code_functions import parse_function_code, END_HEADER_REGEX
+from generate_test_code_functions import END_SUITE_HELPERS_REGEX
+from generate_test_code_data import escaped_split, parse_test_data
+from generate_test_code_data import gen_dep_check, gen_expression_check
+from generate_test_code_data import write_dependencies, write_parameters
+from generate_test_code_data import gen_suite_dep_checks
+from generate_test_code_data import InternTable
+from generate_test_code_binary import encode_binary_parameter
+from generate_test_code_binary import gen_binary_datax
 
 
 class GenDep(TestCase):
@@ -612,7 +620,7 @@ void test_func()
         self.assert_raises_regex(GeneratorInputError, err_msg,
                                  parse_function_code, stream, [], [])
 
-    @patch("generate_test_code.parse_function_arguments")
+    @patch("generate_test_code_functions.parse_function_arguments")
     def test_function_called(self,
                              parse_function_arguments_mock):
         """
@@ -631,10 +639,10 @@ void test_func()
         self.assertTrue(parse_function_arguments_mock.called)
         parse_function_arguments_mock.assert_called_with('void test_func()\n')
 
-    @patch("generate_test_code.gen_dispatch")
-    @patch("generate_test_code.gen_dependencies")
-    @patch("generate_test_code.gen_function_wrapper")
-    @patch("generate_test_code.parse_function_arguments")
+    @patch("generate_test_code_functions.gen_dispatch")
+    @patch("generate_test_code_functions.gen_dependencies")
+    @patch("generate_test_code_functions.gen_function_wrapper")
+    @patch("generate_test_code_functions.parse_function_arguments")
     def test_return(self, parse_function_arguments_mock,
                     gen_function_wrapper_mock,
                     gen_dependencies_mock,
@@ -676,10 +684,10 @@ exit:
         self.assertEqual(code, expected)
         self.assertEqual(dispatch_code, "\n    test_func_wrapper,\n")
 
-    @patch("generate_test_code.gen_dispatch")
-    @patch("generate_test_code.gen_dependencies")
-    @patch("generate_test_code.gen_function_wrapper")
-    @patch("generate_test_code.parse_function_arguments")
+    @patch("generate_test_code_functions.gen_dispatch")
+    @patch("generate_test_code_functions.gen_dependencies")
+    @patch("generate_test_code_functions.gen_function_wrapper")
+    @patch("generate_test_code_functions.parse_function_arguments")
     def test_with_exit_label(self, parse_function_arguments_mock,
                              gen_function_wrapper_mock,
                              gen_dependencies_mock,
@@ -730,10 +738,10 @@ exit:
         self.assert_raises_regex(GeneratorInputError, err_msg,
                                  parse_function_code, stream, [], [])
 
-    @patch("generate_test_code.gen_dispatch")
-    @patch("generate_test_code.gen_dependencies")
-    @patch("generate_test_code.gen_function_wrapper")
-    @patch("generate_test_code.parse_function_arguments")
+    @patch("generate_test_code_functions.gen_dispatch")
+    @patch("generate_test_code_functions.gen_dependencies")
+    @patch("generate_test_code_functions.gen_function_wrapper")
+    @patch("generate_test_code_functions.parse_function_arguments")
     def test_functio_name_on_newline(self, parse_function_arguments_mock,
                                      gen_function_wrapper_mock,
                                      gen_dependencies_mock,
@@ -785,7 +793,7 @@ class ParseFunction(TestCase):
     Test Suite for testing parse_functions()
     """
 
-    @patch("generate_test_code.parse_until_pattern")
+    @patch("generate_test_code_functions.parse_until_pattern")
     def test_begin_header(self, parse_until_pattern_mock):
         """
         Test that begin header is checked and parse_until_pattern() is called.
@@ -806,7 +814,7 @@ class ParseFunction(TestCase):
         parse_until_pattern_mock.assert_called_with(stream, END_HEADER_REGEX)
         self.assertEqual(stream.line_no, 1)
 
-    @patch("generate_test_code.parse_until_pattern")
+    @patch("generate_test_code_functions.parse_until_pattern")
     def test_begin_helper(self, parse_until_pattern_mock):
         """
         Test that begin helper is checked and parse_until_pattern() is called.
@@ -829,7 +837,7 @@ void print_hello_world()
                                                     END_SUITE_HELPERS_REGEX)
         self.assertEqual(stream.line_no, 1)
 
-    @patch("generate_test_code.parse_suite_dependencies")
+    @patch("generate_test_code_functions.parse_suite_dependencies")
     def test_begin_dep(self, parse_suite_dependencies_mock):
         """
         Test that begin dep is checked and parse_suite_dependencies() is
@@ -850,7 +858,7 @@ void print_hello_world()
         parse_suite_dependencies_mock.assert_called_with(stream)
         self.assertEqual(stream.line_no, 1)
 
-    @patch("generate_test_code.parse_function_dependencies")
+    @patch("generate_test_code_functions.parse_function_dependencies")
     def test_begin_function_dep(self, func_mock):
         """
         Test that begin dep is checked and parse_function_dependencies() is
@@ -873,8 +881,8 @@ void print_hello_world()
         func_mock.assert_called_with(dependencies_str)
         self.assertEqual(stream.line_no, 1)
 
-    @patch("generate_test_code.parse_function_code")
-    @patch("generate_test_code.parse_function_dependencies")
+    @patch("generate_test_code_functions.parse_function_code")
+    @patch("generate_test_code_functions.parse_function_dependencies")
     def test_return(self, func_mock1, func_mock2):
         """
         Test that begin case is checked and parse_function_code() is called.
@@ -1100,6 +1108,15 @@ class EscapedSplit(TestCase):
                                   r'facebook\:instagram\\',
                                   r'bbc\\', r'wikipedia'])
 
+    def test_trailing_escape_char(self):
+        """
+        Test input ending with an escape character and empty splits.
+        :return:
+        """
+        test_str = '::yahoo::google\\'
+        splits = escaped_split(test_str, ':')
+        self.assertEqual(splits, ['yahoo', 'google\\'])
+
 
 class ParseTestData(TestCase):
     """
@@ -1237,15 +1254,11 @@ class GenDepCheck(TestCase):
         :return:
         """
         expected = """
-        case 5:
-            {
 #if defined(YAHOO)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 5 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
-#endif
-            }
-            break;"""
+    DEPENDENCY_NOT_SUPPORTED,   /* 5 */
+#endif"""
         out = gen_dep_check(5, 'YAHOO')
         self.assertEqual(out, expected)
 
@@ -1255,15 +1268,11 @@ class GenDepCheck(TestCase):
         :return:
         """
         expected = """
-        case 5:
-            {
 #if !defined(YAHOO)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 5 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
-#endif
-            }
-            break;"""
+    DEPENDENCY_NOT_SUPPORTED,   /* 5 */
+#endif"""
         out = gen_dep_check(5, '!YAHOO')
         self.assertEqual(out, expected)
 
@@ -1294,11 +1303,7 @@ class GenExpCheck(TestCase):
         :return:
         """
         expected = """
-        case 5:
-            {
-                *out_value = YAHOO;
-            }
-            break;"""
+    YAHOO,   /* 5 */"""
         out = gen_expression_check(5, 'YAHOO')
         self.assertEqual(out, expected)
 
@@ -1329,7 +1334,7 @@ class WriteDependencies(TestCase):
         :return:
         """
         stream = StringIOWrapper('test_suite_ut.data', '')
-        unique_dependencies = []
+        unique_dependencies = InternTable()
         dep_check_code = write_dependencies(stream, [], unique_dependencies)
         self.assertEqual(dep_check_code, '')
         self.assertEqual(len(unique_dependencies), 0)
@@ -1341,37 +1346,25 @@ class WriteDependencies(TestCase):
         :return:
         """
         stream = StringIOWrapper('test_suite_ut.data', '')
-        unique_dependencies = []
+        unique_dependencies = InternTable()
         dep_check_code = write_dependencies(stream, ['DEP3', 'DEP2', 'DEP1'],
                                             unique_dependencies)
         expect_dep_check_code = '''
-        case 0:
-            {
 #if defined(DEP3)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 0 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
+    DEPENDENCY_NOT_SUPPORTED,   /* 0 */
 #endif
-            }
-            break;
-        case 1:
-            {
 #if defined(DEP2)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 1 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
+    DEPENDENCY_NOT_SUPPORTED,   /* 1 */
 #endif
-            }
-            break;
-        case 2:
-            {
 #if defined(DEP1)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 2 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
-#endif
-            }
-            break;'''
+    DEPENDENCY_NOT_SUPPORTED,   /* 2 */
+#endif'''
         self.assertEqual(dep_check_code, expect_dep_check_code)
         self.assertEqual(len(unique_dependencies), 3)
         self.assertEqual(stream.getvalue(), 'depends_on:0:1:2\n')
@@ -1382,7 +1375,7 @@ class WriteDependencies(TestCase):
         :return:
         """
         stream = StringIOWrapper('test_suite_ut.data', '')
-        unique_dependencies = []
+        unique_dependencies = InternTable()
         dep_check_code = ''
         dep_check_code += write_dependencies(stream, ['DEP3', 'DEP2'],
                                              unique_dependencies)
@@ -1391,33 +1384,21 @@ class WriteDependencies(TestCase):
         dep_check_code += write_dependencies(stream, ['DEP1', 'DEP3'],
                                              unique_dependencies)
         expect_dep_check_code = '''
-        case 0:
-            {
 #if defined(DEP3)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 0 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
+    DEPENDENCY_NOT_SUPPORTED,   /* 0 */
 #endif
-            }
-            break;
-        case 1:
-            {
 #if defined(DEP2)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 1 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
+    DEPENDENCY_NOT_SUPPORTED,   /* 1 */
 #endif
-            }
-            break;
-        case 2:
-            {
 #if defined(DEP1)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 2 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
-#endif
-            }
-            break;'''
+    DEPENDENCY_NOT_SUPPORTED,   /* 2 */
+#endif'''
         self.assertEqual(dep_check_code, expect_dep_check_code)
         self.assertEqual(len(unique_dependencies), 3)
         self.assertEqual(stream.getvalue(),
@@ -1435,7 +1416,7 @@ class WriteParams(TestCase):
         :return:
         """
         stream = StringIOWrapper('test_suite_ut.data', '')
-        unique_expressions = []
+        unique_expressions = InternTable()
         expression_code = write_parameters(stream, [], [], unique_expressions)
         self.assertEqual(len(unique_expressions), 0)
         self.assertEqual(expression_code, '')
@@ -1447,7 +1428,7 @@ class WriteParams(TestCase):
         :return:
         """
         stream = StringIOWrapper('test_suite_ut.data', '')
-        unique_expressions = []
+        unique_expressions = InternTable()
         expression_code = write_parameters(stream, ['"Yahoo"', '"abcdef00"',
                                                     '0'],
                                            ['char*', 'hex', 'int'],
@@ -1463,7 +1444,7 @@ class WriteParams(TestCase):
         :return:
         """
         stream = StringIOWrapper('test_suite_ut.data', '')
-        unique_expressions = []
+        unique_expressions = InternTable()
         expression_code = write_parameters(stream,
                                            ['"Yahoo"', '"abcdef00"', '0xAA'],
                                            ['char*', 'hex', 'int'],
@@ -1479,7 +1460,7 @@ class WriteParams(TestCase):
         :return:
         """
         stream = StringIOWrapper('test_suite_ut.data', '')
-        unique_expressions = []
+        unique_expressions = InternTable()
         expression_code = write_parameters(stream,
                                            ['"Yahoo"', '"abcdef00"', '0',
                                             'MACRO1', 'MACRO2', 'MACRO3'],
@@ -1487,23 +1468,12 @@ class WriteParams(TestCase):
                                             'int', 'int', 'int'],
                                            unique_expressions)
         self.assertEqual(len(unique_expressions), 3)
-        self.assertEqual(unique_expressions, ['MACRO1', 'MACRO2', 'MACRO3'])
+        self.assertEqual(list(unique_expressions),
+                         ['MACRO1', 'MACRO2', 'MACRO3'])
         expected_expression_code = '''
-        case 0:
-            {
-                *out_value = MACRO1;
-            }
-            break;
-        case 1:
-            {
-                *out_value = MACRO2;
-            }
-            break;
-        case 2:
-            {
-                *out_value = MACRO3;
-            }
-            break;'''
+    MACRO1,   /* 0 */
+    MACRO2,   /* 1 */
+    MACRO3,   /* 2 */'''
         self.assertEqual(expression_code, expected_expression_code)
         self.assertEqual(stream.getvalue(),
                          ':char*:"Yahoo":hex:"abcdef00":int:0:exp:0:exp:1'
@@ -1515,7 +1485,7 @@ class WriteParams(TestCase):
         :return:
         """
         stream = StringIOWrapper('test_suite_ut.data', '')
-        unique_expressions = []
+        unique_expressions = InternTable()
         expression_code = ''
         expression_code += write_parameters(stream,
                                             ['"Yahoo"', 'MACRO1', 'MACRO2'],
@@ -1530,23 +1500,12 @@ class WriteParams(TestCase):
                                             ['int', 'int', 'int'],
                                             unique_expressions)
         self.assertEqual(len(unique_expressions), 3)
-        self.assertEqual(unique_expressions, ['MACRO1', 'MACRO2', 'MACRO3'])
+        self.assertEqual(list(unique_expressions),
+                         ['MACRO1', 'MACRO2', 'MACRO3'])
         expected_expression_code = '''
-        case 0:
-            {
-                *out_value = MACRO1;
-            }
-            break;
-        case 1:
-            {
-                *out_value = MACRO2;
-            }
-            break;
-        case 2:
-            {
-                *out_value = MACRO3;
-            }
-            break;'''
+    MACRO1,   /* 0 */
+    MACRO2,   /* 1 */
+    MACRO3,   /* 2 */'''
         self.assertEqual(expression_code, expected_expression_code)
         expected_data_file = ''':char*:"Yahoo":exp:0:exp:1
 :hex:"abcdef00":exp:1:exp:2
@@ -1554,6 +1513,25 @@ class WriteParams(TestCase):
 '''
         self.assertEqual(stream.getvalue(), expected_data_file)
 
+    def test_invalid_params(self):
+        """
+        Test that all invalid parameters are reported and nothing is
+        written.
+        :return:
+        """
+        stream = StringIOWrapper('test_suite_ut.data', '')
+        unique_expressions = InternTable()
+        with self.assertRaises(GeneratorInputError) as context:
+            write_parameters(stream,
+                             ['"abc"', 'MACRO1', '"0g"', '0x100000000'],
+                             ['hex', 'int', 'hex', 'int'], unique_expressions)
+        self.assertEqual(str(context.exception),
+                         'parameter 1: odd number of hex digits in: "abc"; '
+                         'parameter 3: invalid hex digits in: "0g"; '
+                         'parameter 4: int value 0x100000000 out of range')
+        self.assertEqual(len(unique_expressions), 0)
+        self.assertEqual(stream.getvalue(), '')
+
 
 class GenTestSuiteDependenciesChecks(TestCase):
     """
@@ -1607,11 +1585,10 @@ class GenFromTestData(TestCase):
     Test suite for gen_from_test_data()
     """
 
-    @staticmethod
     @patch("generate_test_code.write_dependencies")
     @patch("generate_test_code.write_parameters")
     @patch("generate_test_code.gen_suite_dep_checks")
-    def test_intermediate_data_file(func_mock1,
+    def test_intermediate_data_file(self, func_mock1,
                                     write_parameters_mock,
                                     write_dependencies_mock):
         """
@@ -1632,19 +1609,18 @@ func1:0
         func_mock1.side_effect = gen_suite_dep_checks
         gen_from_test_data(data_f, out_data_f, func_info, suite_dependencies)
         write_dependencies_mock.assert_called_with(out_data_f,
-                                                   ['DEP1'], ['DEP1'])
+                                                   ['DEP1'], ANY)
+        self.assertEqual(list(write_dependencies_mock.call_args[0][2]),
+                         ['DEP1'])
         write_parameters_mock.assert_called_with(out_data_f, ['0'],
-                                                 ('int',), [])
+                                                 ('int',), ANY, None)
+        self.assertEqual(list(write_parameters_mock.call_args[0][3]), [])
         expected_dep_check_code = '''
-        case 0:
-            {
 #if defined(DEP1)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 0 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
-#endif
-            }
-            break;'''
+    DEPENDENCY_NOT_SUPPORTED,   /* 0 */
+#endif'''
         func_mock1.assert_called_with(
             suite_dependencies, expected_dep_check_code, '')
 
@@ -1683,6 +1659,94 @@ func1:0
         self.assertRaises(GeneratorInputError, gen_from_test_data, data_f,
                           out_data_f, func_info, suite_dependencies)
 
+    def test_invalid_params(self):
+        """
+        Test that the invalid parameters of all test cases are reported
+        with file name and line number.
+        :return:
+        """
+        data = '''
+My test 1
+func1:"0":0
+
+My test 2
+func1:"00":0
+
+My test 3
+func1:"00":0x123456789
+'''
+        data_f = StringIOWrapper('test_suite_ut.data', data)
+        out_data_f = StringIOWrapper('test_suite_ut.datax', '')
+        func_info = {'test_func1': (0, ('hex', 'int'))}
+        with self.assertRaises(GeneratorInputError) as context:
+            gen_from_test_data(data_f, out_data_f, func_info, [])
+        self.assertEqual(str(context.exception),
+                         'test_suite_ut.data:3: My test 1: parameter 1: odd '
+                         'number of hex digits in: "0"\n'
+                         'test_suite_ut.data:9: My test 3: parameter 2: int '
+                         'value 0x123456789 out of range')
+
+    def test_used_functions(self):
+        """
+        Test that function Ids are allocated in order of first call
+        when the used functions are tracked.
+        :return:
+        """
+        data = '''
+My test 1
+func3:0
+
+My test 2
+depends_on:DEP1
+func2:0
+
+My test 3
+func1:0
+
+My test 4
+func3:1
+'''
+        data_f = StringIOWrapper('test_suite_ut.data', data)
+        out_data_f = StringIOWrapper('test_suite_ut.datax', '')
+        func_info = {'test_func1': (0, ('int',)),
+                     'test_func2': (1, ('int',)),
+                     'test_func3': (2, ('int',))}
+        used_functions = InternTable()
+        gen_from_test_data(data_f, out_data_f, func_info, [],
+                           DataOptions(config={'DEP1': False},
+                                       used_functions=used_functions))
+        self.assertEqual(list(used_functions), ['test_func3', 'test_func1'])
+        self.assertEqual(out_data_f.getvalue(), '''My test 1
+0:int:0
+
+My test 3
+1:int:0
+
+My test 4
+0:int:1
+
+''')
+
+    def test_invalid_params_binary(self):
+        """
+        Test that invalid parameters are reported in binary mode.
+        :return:
+        """
+        data = '''
+My test 1
+func1:"0g"
+'''
+        data_f = StringIOWrapper('test_suite_ut.data', data)
+        out_data_f = io.BytesIO()
+        func_info = {'test_func1': (0, ('hex',))}
+        with self.assertRaises(GeneratorInputError) as context:
+            gen_from_test_data(data_f, out_data_f, func_info, [],
+                               DataOptions(binary=True))
+        self.assertEqual(str(context.exception),
+                         'test_suite_ut.data:3: My test 1: parameter 1: '
+                         'invalid hex digits in: "0g"')
+        self.assertEqual(out_data_f.getvalue(), b'')
+
     def test_output(self):
         """
         Test that intermediate data file is written with expected data.
@@ -1706,24 +1770,16 @@ func2:"yahoo":88:MACRO1
             gen_from_test_data(data_f, out_data_f, func_info,
                                suite_dependencies)
         expected_dep_check_code = '''
-        case 0:
-            {
 #if defined(DEP1)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 0 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
+    DEPENDENCY_NOT_SUPPORTED,   /* 0 */
 #endif
-            }
-            break;
-        case 1:
-            {
 #if defined(DEP2)
-                ret = DEPENDENCY_SUPPORTED;
+    DEPENDENCY_SUPPORTED,       /* 1 */
 #else
-                ret = DEPENDENCY_NOT_SUPPORTED;
-#endif
-            }
-            break;'''
+    DEPENDENCY_NOT_SUPPORTED,   /* 1 */
+#endif'''
         expected_data = '''My test 1
 depends_on:0
 0:int:0:int:0xfa:exp:0:exp:1
@@ -1734,20 +1790,169 @@ depends_on:0:1
 
 '''
         expected_expression_code = '''
-        case 0:
-            {
-                *out_value = MACRO1;
-            }
-            break;
-        case 1:
-            {
-                *out_value = MACRO2;
-            }
-            break;'''
+    MACRO1,   /* 0 */
+    MACRO2,   /* 1 */'''
         self.assertEqual(dep_check_code, expected_dep_check_code)
         self.assertEqual(out_data_f.getvalue(), expected_data)
         self.assertEqual(expression_code, expected_expression_code)
 
+    def test_binary_output(self):
+        """
+        Test that binary intermediate data is written with the same
+        Ids as in the text format.
+        :return:
+        """
+        data = '''
+My test 1
+depends_on:DEP1
+func1:0:0xfa:MACRO1:MACRO2
+
+My test 2
+depends_on:DEP1:DEP2
+func2:"yahoo":88:MACRO1
+'''
+        data_f = StringIOWrapper('test_suite_ut.data', data)
+        out_data_f = io.BytesIO()
+        func_info = {'test_func1': (0, ('int', 'int', 'int', 'int')),
+                     'test_func2': (1, ('char*', 'int', 'int'))}
+        dep_check_code, expression_code = \
+            gen_from_test_data(data_f, out_data_f, func_info, [],
+                               DataOptions(binary=True))
+        expected_data = gen_binary_datax([
+            ('My test 1', [0], 0,
+             [encode_binary_parameter('int', '0'),
+              encode_binary_parameter('int', '0xfa'),
+              encode_binary_parameter('exp', 0),
+              encode_binary_parameter('exp', 1)]),
+            ('My test 2', [0, 1], 1,
+             [encode_binary_parameter('char*', '"yahoo"'),
+              encode_binary_parameter('int', '88'),
+              encode_binary_parameter('exp', 0)])])
+        self.assertEqual(out_data_f.getvalue(), expected_data)
+        self.assertIn('defined(DEP2)', dep_check_code)
+        self.assertIn('MACRO2', expression_code)
+
+    def test_manifest(self):
+        """
+        Test that a manifest entry is generated for each test case.
+        :return:
+        """
+        data = '''
+My test 1
+depends_on:DEP1
+func1:0:MACRO1
+
+My test 2
+func2:"yahoo":"abcdef00"
+'''
+        data_f = StringIOWrapper('test_suite_ut.data', data)
+        out_data_f = StringIOWrapper('test_suite_ut.datax', '')
+        func_info = {'test_func1': (0, ('int', 'int')),
+                     'test_func2': (1, ('char*', 'hex'))}
+        manifest = []
+        gen_from_test_data(data_f, out_data_f, func_info, [],
+                           DataOptions(manifest=manifest))
+        expected_manifest = [
+            {'name': 'My test 1', 'function': 'test_func1',
+             'function_id': 0, 'dependencies': ['DEP1'],
+             'arguments': ['int', 'exp'], 'parameter_sizes': [5, 5]},
+            {'name': 'My test 2', 'function': 'test_func2',
+             'function_id': 1, 'dependencies': [],
+             'arguments': ['char*', 'hex'], 'parameter_sizes': [11, 9]}]
+        self.assertEqual(manifest, expected_manifest)
+
+    def test_skip_tests(self):
+        """
+        Test that test cases are left out by index.
+        :return:
+        """
+        data = '''
+My test 1
+depends_on:DEP1
+func1:0
+
+My test 2
+depends_on:DEP2
+func1:1
+
+My test 3
+func1:2
+'''
+        data_f = StringIOWrapper('test_suite_ut.data', data)
+        out_data_f = StringIOWrapper('test_suite_ut.datax', '')
+        func_info = {'test_func1': (0, ('int',))}
+        dep_check_code, _ = gen_from_test_data(
+            data_f, out_data_f, func_info, [],
+            DataOptions(skip_tests=set([0])))
+        expected_data = '''My test 2
+depends_on:0
+0:int:1
+
+My test 3
+0:int:2
+
+'''
+        self.assertEqual(out_data_f.getvalue(), expected_data)
+        self.assertNotIn('DEP1', dep_check_code)
+
+    def test_config_pruning(self):
+        """
+        Test that test cases with known unmet dependencies are left out
+        and known met dependencies are not written.
+        :return:
+        """
+        data = '''
+My test 1
+depends_on:DEP1:DEP2
+func1:0
+
+My test 2
+depends_on:!DEP1:DEP3
+func1:1
+
+My test 3
+depends_on:DEP3
+func1:2
+'''
+        data_f = StringIOWrapper('test_suite_ut.data', data)
+        out_data_f = StringIOWrapper('test_suite_ut.datax', '')
+        func_info = {'test_func1': (0, ('int',))}
+        pruned = []
+        dep_check_code, _ = gen_from_test_data(
+            data_f, out_data_f, func_info, [],
+            DataOptions(config={'DEP1': True, 'DEP3': False},
+                        pruned=pruned))
+        expected_data = '''My test 1
+depends_on:0
+0:int:0
+
+'''
+        self.assertEqual(out_data_f.getvalue(), expected_data)
+        self.assertIn('DEP2', dep_check_code)
+        self.assertNotIn('DEP1', dep_check_code)
+        self.assertEqual(pruned, [('My test 2', ['!DEP1', 'DEP3']),
+                                  ('My test 3', ['DEP3'])])
+
+    def test_config_pruning_suite(self):
+        """
+        Test that all test cases are left out when a test suite
+        dependency is known to be unmet.
+        :return:
+        """
+        data = '''
+My test 1
+func1:0
+'''
+        data_f = StringIOWrapper('test_suite_ut.data', data)
+        out_data_f = StringIOWrapper('test_suite_ut.datax', '')
+        func_info = {'test_func1': (0, ('int',))}
+        pruned = []
+        gen_from_test_data(data_f, out_data_f, func_info, ['DEP1'],
+                           DataOptions(config={'DEP1': False},
+                                       pruned=pruned))
+        self.assertEqual(out_data_f.getvalue(), '')
+        self.assertEqual(pruned, [('My test 1', ['DEP1'])])
+
 
 if __name__ == '__main__':
     unittest_main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# Unit test for generate_test_code_binary.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for generate_test_code_binary.py
+"""
+
+
+import struct
+from unittest import TestCase, main as unittest_main
+from generate_test_code_files import GeneratorInputError
+from generate_test_code_data import unescape_string
+from generate_test_code_binary import encode_binary_parameter
+from generate_test_code_binary import gen_binary_test_case, gen_binary_datax
+
+
+class BinaryDatax(TestCase):
+    """
+    Test suite for binary intermediate data encoding.
+    """
+
+    def test_unescape_string(self):
+        """
+        Test that only '\\n', '\\:' and '\\?' are replaced.
+        :return:
+        """
+        self.assertEqual(unescape_string(r'"a\nb\:c\?d\e\\n"'),
+                         '"a\nb:c?d\\e\\\n"')
+
+    def test_record(self):
+        """
+        Test record layout.
+        :return:
+        """
+        record = gen_binary_test_case([2], 5, [b'i\x07\x00\x00\x00'])
+        self.assertEqual(record,
+                         b'\x15\x00\x00\x00'
+                         b'\x01\x00\x00\x00\x02\x00\x00\x00'
+                         b'\x05\x00\x00\x00'
+                         b'\x01\x00\x00\x00i\x07\x00\x00\x00')
+
+    def test_index(self):
+        """
+        Test header and index of test case names and record offsets.
+        :return:
+        """
+        param = encode_binary_parameter('int', '1')
+        record1 = gen_binary_test_case([], 0, [])
+        record2 = gen_binary_test_case([], 0, [param])
+        datax = gen_binary_datax([('T1', [], 0, []), ('T2', [], 0, [param])])
+        self.assertEqual(datax[:50],
+                         b'\x89DATAX\r\n'
+                         b'\x04\x00\x00\x00\x02\x00\x00\x00'
+                         b'\x00\x00\x00\x00\x00\x00\x00\x00'
+                         b'\x16\x00\x00\x00'
+                         b'\x32\x00\x00\x00\x02\x00\x00\x00T1\x00'
+                         b'\x42\x00\x00\x00\x02\x00\x00\x00T2\x00')
+        self.assertEqual(datax[50:66], record1)
+        self.assertEqual(datax[66:], record2)
+
+    def test_pool(self):
+        """
+        Test that only string and hex parameters repeated in test cases
+        and bigger than a reference are pooled.
+        :return:
+        """
+        key = encode_binary_parameter('hex', '"00112233"')
+        name = encode_binary_parameter('char*', '"abc"')
+        short = encode_binary_parameter('hex', '""')
+        num = encode_binary_parameter('int', '1234')
+        datax = gen_binary_datax([('T1', [], 0, [key, short, num]),
+                                  ('T2', [], 0, [name, key, short, num]),
+                                  ('T3', [], 0, [name])])
+        pool = key + name
+        ref0 = b'p\x00\x00\x00\x00'
+        ref1 = b'p\x01\x00\x00\x00'
+        records = [gen_binary_test_case([], 0, [ref0, short, num]),
+                   gen_binary_test_case([], 0, [ref1, ref0, short, num]),
+                   gen_binary_test_case([], 0, [ref1])]
+        index_size = 3 * 11
+        self.assertEqual(datax[8:28],
+                         struct.pack('<IIIII', 4, 3, 2, len(pool),
+                                     index_size))
+        offset = 28 + index_size + len(pool)
+        index = b''
+        for test_name, record in zip(['T1', 'T2', 'T3'], records):
+            index += struct.pack('<II', offset, 2) + test_name.encode() + \
+                b'\0'
+            offset += len(record)
+        self.assertEqual(datax[28:], index + pool + b''.join(records))
+
+    def test_empty_index(self):
+        """
+        Test index of a file without test cases.
+        :return:
+        """
+        self.assertEqual(gen_binary_datax([]),
+                         b'\x89DATAX\r\n'
+                         b'\x04\x00\x00\x00\x00\x00\x00\x00'
+                         b'\x00\x00\x00\x00\x00\x00\x00\x00'
+                         b'\x00\x00\x00\x00')
+
+    def test_int(self):
+        """
+        Test decimal and hex ints, wrapping values that exceed 32 bits.
+        :return:
+        """
+        self.assertEqual(encode_binary_parameter('int', '010'),
+                         b'i\x0a\x00\x00\x00')
+        self.assertEqual(encode_binary_parameter('int', '0X1234'),
+                         b'i\x34\x12\x00\x00')
+        self.assertEqual(encode_binary_parameter('int', '4294967295'),
+                         b'i\xff\xff\xff\xff')
+        self.assertEqual(encode_binary_parameter('exp', 3),
+                         b'e\x03\x00\x00\x00')
+
+    def test_string(self):
+        """
+        Test that strings are unescaped and NUL terminated.
+        :return:
+        """
+        self.assertEqual(encode_binary_parameter('char*', r'"a\:b"'),
+                         b's\x03\x00\x00\x00a:b\x00')
+        self.assertEqual(encode_binary_parameter('char*', '""'),
+                         b's\x00\x00\x00\x00\x00')
+
+    def test_hex(self):
+        """
+        Test that hex strings are decoded.
+        :return:
+        """
+        self.assertEqual(encode_binary_parameter('hex', '"00aBff"'),
+                         b'h\x03\x00\x00\x00\x00\xab\xff')
+        self.assertEqual(encode_binary_parameter('hex', '""'),
+                         b'h\x00\x00\x00\x00')
+
+    def test_invalid_params(self):
+        """
+        Test that invalid string and hex parameters are reported.
+        :return:
+        """
+        for typ, val in [('char*', 'abc'), ('char*', '"'),
+                         ('hex', '00'), ('hex', '"0"'), ('hex', '"0g"')]:
+            self.assertRaises(GeneratorInputError, encode_binary_parameter,
+                              typ, val)
+
+
+if __name__ == '__main__':
+    unittest_main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# Unit test for generate_test_code_cache.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for generate_test_code_cache.py
+"""
+
+
+import os
+from unittest import main as unittest_main
+from generate_test_code_cache import read_cache, write_cache
+from test_generate_test_code_files import TempDirTestCase
+
+
+class GenerationCache(TempDirTestCase):
+    """
+    Test suite for read_cache() and write_cache().
+    """
+
+    def setUp(self):
+        super(GenerationCache, self).setUp()
+        self.file_name = os.path.join(self.tmp_dir, 'cache')
+
+    def test_no_cache_file(self):
+        """
+        Test that cache is empty when there is no cache file.
+        :return:
+        """
+        self.assertEqual(read_cache(self.file_name), {})
+
+    def test_invalid_cache_file(self):
+        """
+        Test that an invalid cache file is ignored.
+        :return:
+        """
+        self.write_file('cache', '[1, 2')
+        self.assertEqual(read_cache(self.file_name), {})
+
+    def test_read_write(self):
+        """
+        Test that cache read back is same as written.
+        :return:
+        """
+        write_cache(self.file_name, {'test_suite_ut.c': 'abcd'})
+        self.assertEqual(read_cache(self.file_name),
+                         {'test_suite_ut.c': 'abcd'})
+
+
+if __name__ == '__main__':
+    unittest_main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# Unit test for generate_test_code_config.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for generate_test_code_config.py
+"""
+
+
+from unittest import main as unittest_main
+from generate_test_code_files import GeneratorInputError
+from generate_test_code_config import read_config, resolve_dependencies
+from test_generate_test_code_files import TempDirTestCase
+
+
+class ReadConfig(TempDirTestCase):
+    """
+    Test suite for read_config() and resolve_dependencies().
+    """
+
+    def test_config_file(self):
+        """
+        Test defined, commented out and conditional macros.
+        :return:
+        """
+        config_file = self.write_file('config.h', '''/* Header */
+#ifndef CONFIG_H
+#define CONFIG_H
+
+#if defined(_MSC_VER)
+#define CONDITIONAL
+#endif
+
+/**
+ * #define DOCUMENTED
+ */
+#define DEFINED
+//#define COMMENTED_OUT
+#define WITH_VALUE 3
+//#define COMMENTED_OUT_VALUE 3
+#  define INDENTED
+#undef UNDEFINED
+
+#endif /* CONFIG_H */
+''')
+        config = read_config(config_file, ['COMMENTED_OUT_VALUE=4',
+                                           'EXTRA'])
+        self.assertEqual(config, {'DEFINED': True, 'COMMENTED_OUT': False,
+                                  'WITH_VALUE': True,
+                                  'COMMENTED_OUT_VALUE': True,
+                                  'INDENTED': True, 'UNDEFINED': False,
+                                  'EXTRA': True})
+
+    def test_no_config_file(self):
+        """
+        Test only macro definitions.
+        :return:
+        """
+        self.assertEqual(read_config(None, ['A=1', 'B']),
+                         {'A': True, 'B': True})
+
+    def test_user_config_file(self):
+        """
+        Test that a user config file, that is not read, is an error.
+        :return:
+        """
+        self.assertRaises(GeneratorInputError, read_config, None,
+                          ['MBEDTLS_USER_CONFIG_FILE="user.h"'])
+
+    def test_resolve_dependencies(self):
+        """
+        Test resolution of met, unmet and unknown dependencies.
+        :return:
+        """
+        config = {'A': True, 'B': False}
+        self.assertEqual(resolve_dependencies(['A', '!B', 'C', '!D'],
+                                              config),
+                         ([], ['C', '!D']))
+        self.assertEqual(resolve_dependencies(['!A', 'B', 'C'], config),
+                         (['!A', 'B'], ['C']))
+
+
+if __name__ == '__main__':
+    unittest_main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Unit test for generate_test_code_data.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for generate_test_code_data.py
+"""
+
+
+from unittest import TestCase, main as unittest_main
+from generate_test_code_data import check_parameter
+from generate_test_code_data import parse_int_literal, InternTable
+
+
+class InternTableTest(TestCase):
+    """
+    Test suite for class InternTable.
+    """
+
+    def test_first_seen_ids(self):
+        """
+        Test that Ids are allocated in the order values are first seen.
+        :return:
+        """
+        table = InternTable()
+        self.assertEqual(table.intern('DEP2'), (0, True))
+        self.assertEqual(table.intern('DEP1'), (1, True))
+        self.assertEqual(table.intern('DEP2'), (0, False))
+        self.assertEqual(table.intern('DEP3'), (2, True))
+        self.assertEqual(table.intern('DEP1'), (1, False))
+        self.assertEqual(len(table), 3)
+        self.assertEqual(list(table), ['DEP2', 'DEP1', 'DEP3'])
+
+
+class ParseIntLiteral(TestCase):
+    """
+    Test Suite for testing parse_int_literal().
+    """
+
+    def test_literals(self):
+        """
+        Test signed decimal and hex literals.
+        :return:
+        """
+        for val, value in [('0', 0), ('0012', 12), ('0xfF', 255),
+                           ('-1', -1), ('+1', 1), (' - 0x10 ', -16)]:
+            self.assertEqual(parse_int_literal(val), value)
+
+    def test_expressions(self):
+        """
+        Test that expressions are not literals.
+        :return:
+        """
+        for val in ['', '-', 'MACRO1', '-MACRO1', '1 + 1', '--1', '0x']:
+            self.assertEqual(parse_int_literal(val), None)
+
+
+class CheckParameter(TestCase):
+    """
+    Test Suite for testing check_parameter().
+    """
+
+    def test_valid(self):
+        """
+        Test valid parameters.
+        :return:
+        """
+        for typ, val in [('int', '0'), ('int', '4294967295'),
+                         ('int', '0xFFFFFFFF'), ('int', '-1'),
+                         ('int', '-2147483648'), ('int', '-0x80000000'),
+                         ('int', '+4294967295'), ('int', ' - 0x80000000'),
+                         ('int', 'MACRO1 + 0x100000000'),
+                         ('char*', '""'), ('char*', '"a:b"'),
+                         ('hex', '""'), ('hex', '"00aBff"')]:
+            self.assertEqual(check_parameter(typ, val), None)
+
+    def test_invalid(self):
+        """
+        Test invalid parameters.
+        :return:
+        """
+        for typ, val in [('int', '4294967296'), ('int', '0x100000000'),
+                         ('int', '-2147483649'), ('int', '-0x80000001'),
+                         ('int', '+4294967296'), ('int', ' - 0x80000001'),
+                         ('char*', 'abc'), ('char*', '"'),
+                         ('hex', '00'), ('hex', '"0"'), ('hex', '"0g"'),
+                         ('hex', '"0x00"')]:
+            self.assertNotEqual(check_parameter(typ, val), None)
+
+
+if __name__ == '__main__':
+    unittest_main()
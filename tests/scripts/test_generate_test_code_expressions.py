@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# Unit test for generate_test_code_expressions.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for generate_test_code_expressions.py
+"""
+
+
+import os
+from unittest import main as unittest_main
+from generate_test_code import gen_shared_inputs, generate_suites
+from generate_test_code import generate_in_memory, gen_probe_header
+from generate_test_code import resolve_task_expressions
+from generate_test_code_files import GeneratorInputError
+from generate_test_code_expressions import evaluate_c_expression
+from generate_test_code_expressions import gen_expression_probe
+from test_generate_test_code import patch
+from test_generate_test_code_files import TempDirTestCase
+
+
+class ResolveExpressions(TempDirTestCase):
+    """
+    Test suite for the evaluation of expressions at generation time.
+    """
+
+    def test_evaluate(self):
+        """
+        Test supported expressions.
+        :return:
+        """
+        for exp, value in [('42', 42), (' -0x4080 ', -0x4080),
+                           ('( -0x4400 ) + ( -0x0010 )', -0x4410),
+                           ('010', 8), ('100L', 100), ('1 << 8', 256),
+                           ('2 + 3 * 4', 14), ('(2 + 3) * 4', 20),
+                           ('10 - 2 - 3', 5), ('-7 / 2', -3), ('-7 % 2', -1),
+                           ('~0', -1), ('!5', 0), ('3 - -2', 5),
+                           ('1 < 2 && 2 <= 2', 1), ('0 || 0', 0),
+                           ('6 & 3 | 8 ^ 1', 11), ('1 == 2', 0),
+                           ('0x7fffffff', 0x7fffffff)]:
+            self.assertEqual(evaluate_c_expression(exp), value, exp)
+
+    def test_not_evaluated(self):
+        """
+        Test expressions that are left to run time.
+        :return:
+        """
+        for exp in ['', 'MBEDTLS_ECP_DP_NONE', '(int) 5', 'sizeof( int )',
+                    '1 ? 2 : 3', '5U', '0x80000000', '1.5', '(1', '1)',
+                    '1 2', '1 / 0', '0x7fffffff + 1', '1 << 31', '-1 >> 1',
+                    '1 << 32', '"a"']:
+            self.assertEqual(evaluate_c_expression(exp), None, exp)
+
+    def test_invalid_octal(self):
+        """
+        Test that octal constants with digits 8 or 9 are errors.
+        :return:
+        """
+        for exp in ['08', '1 + 019']:
+            self.assertRaises(GeneratorInputError, evaluate_c_expression,
+                              exp)
+
+    def test_probe(self):
+        """
+        Test that expressions follow the code of their suite, guarded
+        by the suite dependencies.
+        :return:
+        """
+        shared_inputs = gen_shared_inputs(
+            ('main.function', '$test_common_helpers\n$functions_code\n'
+                              '$expression_code\n'),
+            ('host.function', 'PLATFORM'), ('helpers.function', 'HELPERS'))
+        code = gen_expression_probe(
+            gen_probe_header(shared_inputs),
+            [('a.data', [],
+              'CODE1\n#define A 1\n #  define F(x) x\n#define A 2\n',
+              ['A', 'B + 1']),
+             ('b.data', ['DEP'], 'CODE2\n', ['A'])])
+        self.assertEqual(code, '''HELPERS
+CODE1
+#define A 1
+ #  define F(x) x
+#define A 2
+
+__generate_test_code_expression 0 0 : A
+
+__generate_test_code_expression 0 1 : B + 1
+#undef A
+#undef F
+CODE2
+#if defined(DEP)
+
+__generate_test_code_expression 1 0 : A
+#endif /* DEP */
+''')
+
+    def test_resolve(self):
+        """
+        Test that expressions are resolved per suite from the
+        preprocessor output.
+        :return:
+        """
+        tasks = []
+        for name, arg_type, data in [
+                ('a', 'int', 'Test 1\nfunc1:A:0\n\nTest 2\nfunc1:B:C\n'),
+                ('b', 'char *', 'Test 1\nfunc1:A:"x"\n')]:
+            funcs_file = self.write_file(
+                name + '.function',
+                '/* BEGIN_CASE */\nvoid func1( int a, %s b )\n'
+                '{\n}\n/* END_CASE */\n' % arg_type)
+            data_file = self.write_file(name + '.data', data)
+            tasks.append({'funcs_file': funcs_file, 'data_file': data_file})
+        shared_inputs = gen_shared_inputs(('main.function',
+                                           '$functions_code\n'),
+                                          ('host.function', ''),
+                                          ('helpers.function', ''))
+        output = '''# 1 "probe.c"
+__generate_test_code_expression 0 0 : -0x10
+__generate_test_code_expression 0 1 : MBEDTLS_ENUM
+__generate_test_code_expression 0 2 : ( 1 << 4 )
+__generate_test_code_expression 1 0 : 2
+'''
+        with patch('generate_test_code_expressions.run_preprocessor',
+                   return_value=output) as run_mock:
+            resolve_task_expressions(tasks, shared_inputs, ['cc', '-E'])
+        self.assertEqual(run_mock.call_args[0][0], ['cc', '-E'])
+        self.assertEqual([task['resolved_expressions'] for task in tasks],
+                         [{'A': -16, 'C': 16}, {'A': 2}])
+
+    def test_generate(self):
+        """
+        Test that resolved expressions are written as int values.
+        :return:
+        """
+        functions = '''/* BEGIN_CASE */
+void func1( int a, int b )
+{
+}
+/* END_CASE */
+'''
+        data = 'Test 1\nfunc1:A:B\n'
+        suite = generate_in_memory(functions, data, '$expression_code',
+                                   '', '', resolved_expressions={'A': -5},
+                                   manifest=True)
+        self.assertEqual(suite['out_data'], 'Test 1\n0:int:-5:exp:0\n\n')
+        self.assertEqual(suite['c_code'], '''
+    B,   /* 0 */''')
+        self.assertEqual(suite['manifest']['test_cases'][0]['arguments'],
+                         ['int', 'exp'])
+        suite = generate_in_memory(functions, data, '', '', '',
+                                   resolved_expressions={'A': -5},
+                                   binary_datax=True)
+        self.assertIn(b'i\xfb\xff\xff\xffe\x00\x00\x00\x00',
+                      suite['out_data'])
+
+    def test_cached_suites(self):
+        """
+        Test that the preprocessor runs only for the suites to generate.
+        :return:
+        """
+        input_info = {'suites_dir': self.tmp_dir,
+                      'out_dir': os.path.join(self.tmp_dir, 'out'),
+                      'cache_file': os.path.join(self.tmp_dir, 'cache'),
+                      'preprocessor': ['cc', '-E']}
+        for key, content in [('template_file', '$expression_code\n'),
+                             ('platform_file', ''), ('helpers_file', '')]:
+            input_info[key] = self.write_file(key, content)
+        suites = []
+        for name in ['a', 'b']:
+            suites.append((self.write_file(name + '.function',
+                                           '/* BEGIN_CASE */\n'
+                                           'void func1( int a )\n'
+                                           '{\n}\n/* END_CASE */\n'),
+                           self.write_file(name + '.data',
+                                           'Test 1\nfunc1:A\n')))
+        with patch('generate_test_code_expressions.run_preprocessor',
+                   return_value='') as run_mock:
+            generate_suites(suites, **input_info)
+            generate_suites(suites, **input_info)
+            self.assertEqual(run_mock.call_count, 1)
+            self.write_file('b.data', '\nTest 2\nfunc1:B\n', 'a')
+            generate_suites(suites, **input_info)
+        self.assertEqual(run_mock.call_count, 2)
+        probe = run_mock.call_args[0][1]
+        self.assertIn('__generate_test_code_expression 0 1 : B', probe)
+        self.assertNotIn('__generate_test_code_expression 1 ', probe)
+
+
+if __name__ == '__main__':
+    unittest_main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# Unit test for generate_test_code_files.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for generate_test_code_files.py, and the temporary dir fixture
+of the unit tests of the other generator modules.
+"""
+
+
+import os
+import mmap
+import shutil
+import tempfile
+from unittest import TestCase, main as unittest_main
+from generate_test_code_files import open_atomic
+from generate_test_code_files import write_file_if_changed, FileWrapper
+from test_generate_test_code import patch
+
+
+class TempDirTestCase(TestCase):
+    """
+    Base class for test suites that work on files in a temporary dir.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_file(self, name, content, mode='w'):
+        """
+        Writes a file in the temporary dir.
+        :param name: File name relative to the temporary dir.
+        :param content: File content.
+        :param mode: File open mode.
+        :return: File name
+        """
+        file_name = os.path.join(self.tmp_dir, name)
+        with open(file_name, mode) as out_f:
+            out_f.write(content)
+        return file_name
+
+
+class FileWrapperTest(TempDirTestCase):
+    """
+    Test suite for FileWrapper.
+    """
+
+    def read_lines(self, content):
+        """
+        Writes content to a file and reads it back with FileWrapper.
+        :return: List of (line number, line) tuples.
+        """
+        file_name = self.write_file('test_suite_ut.data', content, 'wb')
+        with FileWrapper(file_name) as in_f:
+            self.assertEqual(in_f.name, file_name)
+            return [(in_f.line_no, line) for line in in_f]
+
+    def test_lines(self):
+        """
+        Test that lines are stripped, newline terminated and counted.
+        :return:
+        """
+        self.assertEqual(self.read_lines(b'a  \r\n\nb\tc\n'),
+                         [(1, 'a\n'), (2, '\n'), (3, 'b\tc\n')])
+
+    def test_last_line_without_newline(self):
+        """
+        Test that last line is read when there is no newline at the end.
+        :return:
+        """
+        self.assertEqual(self.read_lines(b'a\nb'),
+                         [(1, 'a\n'), (2, 'b\n')])
+
+    def test_empty_file(self):
+        """
+        Test that an empty file has no lines.
+        :return:
+        """
+        self.assertEqual(self.read_lines(b''), [])
+
+    @patch("generate_test_code_files.FileWrapper.BLOCK_SIZE", 3)
+    def test_lines_across_blocks(self):
+        """
+        Test lines longer than a block and lines split between blocks,
+        read from a mapped file and with read() calls.
+        :return:
+        """
+        for use_mmap in [True, False]:
+            with patch("generate_test_code_files.FileWrapper.USE_MMAP",
+                       use_mmap):
+                self.assertEqual(self.read_lines(b'abcdefg\nhi\n\njk'),
+                                 [(1, 'abcdefg\n'), (2, 'hi\n'), (3, '\n'),
+                                  (4, 'jk\n')])
+
+    @patch("generate_test_code_files.FileWrapper.BLOCK_SIZE", 3)
+    def test_mapped_files(self):
+        """
+        Test that only files larger than a block are mapped.
+        :return:
+        """
+        with patch("generate_test_code_files.mmap.mmap",
+                   wraps=mmap.mmap) as mmap_mock:
+            self.assertEqual(self.read_lines(b'ab'), [(1, 'ab\n')])
+            self.assertEqual(mmap_mock.call_count, 0)
+            self.assertEqual(self.read_lines(b'ab\ncd'),
+                             [(1, 'ab\n'), (2, 'cd\n')])
+            self.assertEqual(mmap_mock.call_count, 1)
+
+    @patch("generate_test_code_files.FileWrapper.BLOCK_SIZE", 3)
+    def test_mapping_error(self):
+        """
+        Test that a file that cannot be mapped is read.
+        :return:
+        """
+        with patch("generate_test_code_files.mmap.mmap",
+                   side_effect=EnvironmentError):
+            self.assertEqual(self.read_lines(b'ab\ncd'),
+                             [(1, 'ab\n'), (2, 'cd\n')])
+
+    def test_nested_iteration(self):
+        """
+        Test that nested loops share the position in the file, like
+        parse_functions() and parse_function_code() do.
+        :return:
+        """
+        file_name = self.write_file('test_suite_ut.data', b'1\n2\n3\n4\n',
+                                    'wb')
+        lines = []
+        with FileWrapper(file_name) as in_f:
+            for line in in_f:
+                lines.append(line)
+                for inner_line in in_f:
+                    lines.append(inner_line)
+                    break
+        self.assertEqual(lines, ['1\n', '2\n', '3\n', '4\n'])
+
+    def test_content(self):
+        """
+        Test that given content is read instead of the file.
+        :return:
+        """
+        file_name = os.path.join(self.tmp_dir, 'test_suite_ut.data')
+        for content in ['a\nb', b'a\nb']:
+            with FileWrapper(file_name, content) as in_f:
+                self.assertEqual(in_f.name, file_name)
+                self.assertEqual([(in_f.line_no, line) for line in in_f],
+                                 [(1, 'a\n'), (2, 'b\n')])
+
+
+class OpenAtomic(TempDirTestCase):
+    """
+    Test suite for open_atomic().
+    """
+
+    def setUp(self):
+        super(OpenAtomic, self).setUp()
+        self.file_name = os.path.join(self.tmp_dir, 'test_suite_ut.c')
+
+    def test_replace(self):
+        """
+        Test that file is replaced when written successfully.
+        :return:
+        """
+        self.write_file('test_suite_ut.c', 'old')
+        with open_atomic(self.file_name) as out_f:
+            out_f.write('new')
+        with open(self.file_name) as in_f:
+            self.assertEqual(in_f.read(), 'new')
+        self.assertEqual(os.listdir(self.tmp_dir), ['test_suite_ut.c'])
+
+    def test_error(self):
+        """
+        Test that file is left untouched when writing fails.
+        :return:
+        """
+        self.write_file('test_suite_ut.c', 'old')
+        with self.assertRaises(ValueError):
+            with open_atomic(self.file_name) as out_f:
+                out_f.write('partial')
+                raise ValueError()
+        with open(self.file_name) as in_f:
+            self.assertEqual(in_f.read(), 'old')
+        self.assertEqual(os.listdir(self.tmp_dir), ['test_suite_ut.c'])
+
+
+class WriteFileIfChanged(TempDirTestCase):
+    """
+    Test suite for write_file_if_changed().
+    """
+
+    def setUp(self):
+        super(WriteFileIfChanged, self).setUp()
+        self.file_name = os.path.join(self.tmp_dir, 'test_suite_ut.datax')
+
+    def test_new_file(self):
+        """
+        Test that a new file is written.
+        :return:
+        """
+        self.assertTrue(write_file_if_changed(self.file_name, 'data'))
+        with open(self.file_name) as in_f:
+            self.assertEqual(in_f.read(), 'data')
+
+    def test_unchanged_file(self):
+        """
+        Test that a file with same content is not written.
+        :return:
+        """
+        write_file_if_changed(self.file_name, 'data')
+        os.utime(self.file_name, (0, 0))
+        self.assertFalse(write_file_if_changed(self.file_name, 'data'))
+        self.assertEqual(os.path.getmtime(self.file_name), 0)
+
+    def test_changed_file(self):
+        """
+        Test that a file with different content is written.
+        :return:
+        """
+        write_file_if_changed(self.file_name, 'data')
+        self.assertTrue(write_file_if_changed(self.file_name, 'data2'))
+        with open(self.file_name) as in_f:
+            self.assertEqual(in_f.read(), 'data2')
+
+    def test_binary_file(self):
+        """
+        Test switching a file between binary and text content.
+        :return:
+        """
+        self.assertTrue(write_file_if_changed(self.file_name, b'\x89\xff',
+                                              binary=True))
+        self.assertFalse(write_file_if_changed(self.file_name, b'\x89\xff',
+                                               binary=True))
+        self.assertTrue(write_file_if_changed(self.file_name, 'data'))
+        with open(self.file_name) as in_f:
+            self.assertEqual(in_f.read(), 'data')
+
+
+if __name__ == '__main__':
+    unittest_main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# Unit test for generate_test_code_functions.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for generate_test_code_functions.py
+"""
+
+
+from unittest import TestCase, main as unittest_main
+from generate_test_code_functions import gen_function_names
+
+
+class GenFunctionNames(TestCase):
+    """
+    Test suite for testing gen_function_names()
+    """
+
+    def test_function_names(self):
+        """
+        Test that function names are generated in function Id order.
+        :return:
+        """
+        func_info = {'test_b': (1, ('int',)), 'test_a': (2, ()),
+                     'test_c': (0, ('hex',))}
+        expected = '''    "test_c",
+    "test_b",
+    "test_a",
+'''
+        self.assertEqual(gen_function_names(func_info), expected)
+
+    def test_no_functions(self):
+        """
+        Test empty function info.
+        :return:
+        """
+        self.assertEqual(gen_function_names({}), '')
+
+
+if __name__ == '__main__':
+    unittest_main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Unit test for generate_test_code_profile.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for generate_test_code_profile.py
+"""
+
+
+from unittest import TestCase, main as unittest_main
+from generate_test_code_profile import PhaseProfiler
+
+
+class PhaseProfilerTest(TestCase):
+    """
+    Test suite for class PhaseProfiler.
+    """
+
+    def test_records(self):
+        """
+        Test that a record is added for each phase, in order.
+        :return:
+        """
+        profiler = PhaseProfiler()
+        with profiler.phase('phase 1', 'file1'):
+            pass
+        with profiler.phase('phase 2', 'file2'):
+            pass
+        self.assertEqual([record[:2] for record in profiler.records],
+                         [('phase 1', 'file1'), ('phase 2', 'file2')])
+        for _, _, elapsed, _ in profiler.records:
+            self.assertTrue(elapsed >= 0)
+
+    def test_record_on_exception(self):
+        """
+        Test that a phase ending with an exception is recorded.
+        :return:
+        """
+        profiler = PhaseProfiler()
+        with self.assertRaises(ValueError):
+            with profiler.phase('phase', 'file'):
+                raise ValueError()
+        self.assertEqual(len(profiler.records), 1)
+
+    def test_disabled(self):
+        """
+        Test that a disabled profiler records nothing.
+        :return:
+        """
+        profiler = PhaseProfiler(False)
+        with profiler.phase('phase', 'file'):
+            pass
+        self.assertEqual(profiler.records, [])
+
+    def test_add_records(self):
+        """
+        Test that records of another profiler are added after the own
+        ones, and not to a disabled profiler.
+        :return:
+        """
+        profiler = PhaseProfiler()
+        with profiler.phase('phase 1', 'file1'):
+            pass
+        profiler.add_records([('phase 2', 'file2', 0.5, None)])
+        self.assertEqual([record[:2] for record in profiler.records],
+                         [('phase 1', 'file1'), ('phase 2', 'file2')])
+        profiler = PhaseProfiler(False)
+        profiler.add_records([('phase', 'file', 0.5, None)])
+        self.assertEqual(profiler.records, [])
+
+
+if __name__ == '__main__':
+    unittest_main()
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+# Unit test for the test suite generation of generate_test_code.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for the test suite generation of generate_test_code.py
+"""
+
+
+import os
+from unittest import TestCase, main as unittest_main
+from generate_test_code import get_functions_file, get_output_files
+from generate_test_code import parse_function_file, find_duplicate_test_cases
+from generate_test_code import gen_shared_inputs, DataOptions
+from generate_test_code import generate_intermediate_data_file
+from generate_test_code import write_test_source_file
+from generate_test_code import compile_template, render_template
+from generate_test_code import generate_in_memory, gen_merged_suite
+from generate_test_code import get_merged_c_file, merge_tasks
+from generate_test_code import get_task_output_files
+from generate_test_code import PARSED_FUNCTIONS
+from generate_test_code_files import file_digest
+from generate_test_code_functions import gen_functions_code
+from generate_test_code_binary import encode_binary_parameter
+from generate_test_code_binary import gen_binary_datax
+from test_generate_test_code import ANY, patch, StringIO, StringIOWrapper
+from test_generate_test_code_files import TempDirTestCase
+
+
+class TemplateRendering(TestCase):
+    """
+    Test suite for compile_template() and render_template().
+    """
+
+    def test_render(self):
+        """
+        Test that rendering gives the same result as string.Template.
+        :return:
+        """
+        template_lines = ['/* $name */\n', 'int a = ${value}1;\n',
+                          '$$ $name$name\n', 'no placeholders\n']
+        snippets = {'name': 'foo', 'value': 3}
+        template = compile_template(template_lines)
+        self.assertEqual(render_template(template, snippets),
+                         '/* foo */\nint a = 31;\n$ foofoo\n'
+                         'no placeholders\n')
+
+    def test_line_no(self):
+        """
+        Test that $line_no gives the number of the next line.
+        :return:
+        """
+        template_lines = ['a\n', '#line $line_no "x"\n', 'b\n',
+                          '#line ${line_no} "x"\n']
+        template = compile_template(template_lines)
+        self.assertEqual(render_template(template, {}),
+                         'a\n#line 3 "x"\nb\n#line 5 "x"\n')
+
+    def test_missing_snippet(self):
+        """
+        Test that KeyError is raised for a missing snippet.
+        :return:
+        """
+        template = compile_template(['$code\n'])
+        self.assertRaises(KeyError, render_template, template, {})
+
+    def test_invalid_placeholder(self):
+        """
+        Test that ValueError is raised for an invalid placeholder.
+        :return:
+        """
+        self.assertRaises(ValueError, compile_template, ['a\n', '$1\n'])
+
+
+class GetFunctionsFile(TestCase):
+    """
+    Test suite for get_functions_file().
+    """
+
+    def test_data_file(self):
+        """
+        Test functions file for a data file with the same base name.
+        :return:
+        """
+        self.assertEqual(get_functions_file('suites/test_suite_rsa.data',
+                                            'suites'),
+                         'suites/test_suite_rsa.function')
+
+    def test_sub_module_data_file(self):
+        """
+        Test functions file for a sub module data file.
+        :return:
+        """
+        self.assertEqual(get_functions_file('x/test_suite_aes.cbc.data',
+                                            'suites'),
+                         'suites/test_suite_aes.function')
+
+
+class GetOutputFiles(TestCase):
+    """
+    Test suite for get_output_files().
+    """
+
+    def test_output_files(self):
+        """
+        Test that output files have data file's base name.
+        :return:
+        """
+        c_file, out_data_file = get_output_files(
+            'suites/test_suite_aes.cbc.data', 'out')
+        self.assertEqual(c_file, 'out/test_suite_aes.cbc.c')
+        self.assertEqual(out_data_file, 'out/test_suite_aes.cbc.datax')
+
+
+class MergeTasks(TestCase):
+    """
+    Test suite for merge_tasks() and the output files of merged tasks.
+    """
+
+    def test_merged_c_file(self):
+        """
+        Test that merged C file has functions file's base name.
+        :return:
+        """
+        self.assertEqual(get_merged_c_file('suites/test_suite_gcm.function',
+                                           'out'),
+                         'out/test_suite_gcm.c')
+
+    def test_merge(self):
+        """
+        Test that tasks are merged per functions file, in order, and
+        that data file parameters are kept per data file.
+        :return:
+        """
+        tasks = []
+        for funcs_file, data_file in [('a.function', 'a.x.data'),
+                                      ('b.function', 'b.data'),
+                                      ('a.function', 'a.y.data')]:
+            name = os.path.splitext(data_file)[0]
+            tasks.append({'funcs_file': funcs_file, 'data_file': data_file,
+                          'c_file': name + '.c',
+                          'out_data_file': name + '.datax',
+                          'manifest_file': None, 'binary_datax': True})
+        merged = merge_tasks(tasks, 'out')
+        self.assertEqual([task['c_file'] for task in merged],
+                         [os.path.join('out', 'a.c'),
+                          os.path.join('out', 'b.c')])
+        self.assertEqual(merged[0]['siblings'], [tasks[0], tasks[2]])
+        self.assertEqual(merged[1]['siblings'], [tasks[1]])
+        self.assertTrue(merged[0]['binary_datax'])
+        self.assertNotIn('data_file', merged[0])
+        self.assertEqual(get_task_output_files(merged[0]),
+                         [os.path.join('out', 'a.c'),
+                          'a.x.datax', 'a.y.datax'])
+        self.assertEqual(get_task_output_files(tasks[1]),
+                         ['b.c', 'b.datax'])
+
+
+class GenerateInMemory(TestCase):
+    """
+    Test suite for generate_in_memory().
+    """
+
+    FUNCTIONS = '''/* BEGIN_HEADER */
+/* END_HEADER */
+
+/* BEGIN_DEPENDENCIES
+ * depends_on:SUITE_DEP
+ * END_DEPENDENCIES
+ */
+
+/* BEGIN_CASE */
+void func1( int a, char * s )
+{
+}
+/* END_CASE */
+'''
+
+    DATA = '''Test 1
+depends_on:DEP1
+func1:1:"abc"
+
+Test 2
+func1:MACRO:"def"
+'''
+
+    TEMPLATE = '''/* $test_case_file $test_case_data_file */
+$functions_code
+$dep_check_code
+$expression_code
+$dispatch_code
+$function_names_code
+$platform_code
+'''
+
+    def generate(self, **options):
+        """
+        Generates the test suite from strings.
+        :return: Dictionary returned by generate_in_memory()
+        """
+        return generate_in_memory(self.FUNCTIONS, self.DATA, self.TEMPLATE,
+                                  'open(DATA_FILE)', '/* helpers */',
+                                  **options)
+
+    def test_text(self):
+        """
+        Test C code, text intermediate data and metadata.
+        :return:
+        """
+        suite = self.generate(out_data_file='suite.datax')
+        self.assertEqual(suite['out_data'],
+                         'Test 1\ndepends_on:0\n0:int:1:char*:"abc"\n\n'
+                         'Test 2\n0:exp:0:char*:"def"\n\n')
+        self.assertIn('/* test_suite.function test_suite.data */',
+                      suite['c_code'])
+        self.assertIn('void test_func1(', suite['c_code'])
+        self.assertIn('MACRO', suite['c_code'])
+        self.assertIn('open(suite.datax)', suite['c_code'])
+        self.assertEqual(suite['suite_dependencies'], ['SUITE_DEP'])
+        self.assertEqual(suite['functions'], {'test_func1': 0})
+        self.assertEqual(suite['pruned'], [])
+        self.assertEqual(suite['manifest'], None)
+
+    def test_binary(self):
+        """
+        Test that binary intermediate data is bytes.
+        :return:
+        """
+        suite = self.generate(binary_datax=True)
+        self.assertTrue(isinstance(suite['out_data'], bytes))
+        self.assertTrue(suite['out_data'].startswith(b'\x89DATAX'))
+
+    def test_file_objects(self):
+        """
+        Test file-like inputs and that their names are used.
+        :return:
+        """
+        funcs = StringIOWrapper('test_suite_x.function', self.FUNCTIONS)
+        suite = generate_in_memory(funcs, StringIO(self.DATA),
+                                   StringIO(self.TEMPLATE),
+                                   StringIO(''), StringIO(''),
+                                   data_file='test_suite_x.data')
+        self.assertIn('/* test_suite_x.function test_suite_x.data */',
+                      suite['c_code'])
+        self.assertEqual(suite['out_data'], self.generate()['out_data'])
+
+    def test_manifest_and_config(self):
+        """
+        Test that manifest and pruned test cases are returned.
+        :return:
+        """
+        suite = self.generate(manifest=True,
+                              config={'SUITE_DEP': True, 'DEP1': False})
+        self.assertEqual(suite['pruned'], [('Test 1', ['DEP1'])])
+        self.assertEqual([test_case['name'] for test_case in
+                          suite['manifest']['test_cases']], ['Test 2'])
+        self.assertEqual(suite['manifest']['pruned_test_cases'],
+                         [{'name': 'Test 1',
+                           'unmet_dependencies': ['DEP1']}])
+
+
+class GenMergedSuite(TestCase):
+    """
+    Test suite for gen_merged_suite().
+    """
+
+    FUNCTIONS = '''/* BEGIN_HEADER */
+/* END_HEADER */
+
+/* BEGIN_CASE */
+void func1( int a )
+{
+}
+/* END_CASE */
+
+/* BEGIN_CASE */
+void func2( int a )
+{
+}
+/* END_CASE */
+
+/* BEGIN_CASE */
+void func3( int a )
+{
+}
+/* END_CASE */
+'''
+
+    DATA_X = '''Test 1
+depends_on:DEP1
+func2:MACRO1
+'''
+
+    DATA_Y = '''Test 2
+depends_on:DEP2:DEP1
+func1:MACRO2
+
+Test 3
+func2:MACRO1
+'''
+
+    TEMPLATE = '''/* $test_case_data_file */
+$dep_check_code
+$expression_code
+$dispatch_code
+$platform_code
+'''
+
+    def generate(self):
+        """
+        Generates the merged test suite of two data files.
+        :return: Dictionary returned by gen_merged_suite()
+        """
+        shared_inputs = gen_shared_inputs(
+            ('main_test.function', self.TEMPLATE),
+            ('host_test.function', '{ "DATA_FILE" }'),
+            ('helpers.function', ''))
+        return gen_merged_suite(
+            shared_inputs, funcs_file='test_suite_m.function',
+            funcs_content=self.FUNCTIONS, c_file='test_suite_m.c',
+            data_files=[{'data_file': 'test_suite_m.x.data',
+                         'out_data_file': 'test_suite_m.x.datax',
+                         'data_content': self.DATA_X},
+                        {'data_file': 'test_suite_m.y.data',
+                         'out_data_file': 'test_suite_m.y.datax',
+                         'data_content': self.DATA_Y}])
+
+    def test_shared_ids(self):
+        """
+        Test that function, dependency and expression Ids are shared
+        by the intermediate data of the data files.
+        :return:
+        """
+        suite = self.generate()
+        self.assertEqual([data['out_data'] for data in suite['data_files']],
+                         ['Test 1\ndepends_on:0\n0:exp:0\n\n',
+                          'Test 2\ndepends_on:1:0\n1:exp:1\n\n'
+                          'Test 3\n0:exp:0\n\n'])
+        self.assertEqual(suite['functions'], {'test_func2': 0,
+                                              'test_func1': 1})
+        self.assertEqual(suite['c_code'].count('defined(DEP1)'), 1)
+        self.assertEqual(suite['c_code'].count('MACRO1'), 1)
+        self.assertIn('MACRO2', suite['c_code'])
+        self.assertNotIn('func3', suite['c_code'])
+
+    @patch("generate_test_code.gen_functions_code",
+           wraps=gen_functions_code)
+    def test_functions_code_once(self, gen_mock):
+        """
+        Test that code is generated only for the functions called.
+        :return:
+        """
+        self.generate()
+        gen_mock.assert_called_once_with(ANY, ANY)
+        self.assertEqual(list(gen_mock.call_args[0][1]),
+                         ['test_func2', 'test_func1'])
+
+    def test_default_data_files(self):
+        """
+        Test that the test binary runs all the intermediate data files
+        by default and that the C file lists all the data files.
+        :return:
+        """
+        c_code = self.generate()['c_code']
+        self.assertIn('{ "test_suite_m.x.datax", "test_suite_m.y.datax" }',
+                      c_code)
+        self.assertIn('/* test_suite_m.x.data\n'
+                      ' *                            test_suite_m.y.data */',
+                      c_code)
+
+
+class WriteGeneratedFiles(TempDirTestCase):
+    """
+    Test suite for generate_intermediate_data_file() and
+    write_test_source_file().
+    """
+
+    def setUp(self):
+        super(WriteGeneratedFiles, self).setUp()
+        self.data_file = self.write_file(
+            'test_suite_ut.data', 'My test 1\ndepends_on:DEP1\nfunc1:MACRO1\n')
+        self.out_data_file = os.path.join(self.tmp_dir,
+                                          'test_suite_ut.datax')
+
+    def test_intermediate_data_file(self):
+        """
+        Test that the intermediate data file is written and the check
+        code is added to the snippets.
+        :return:
+        """
+        snippets = {}
+        generate_intermediate_data_file(
+            self.data_file, self.out_data_file,
+            ([], {'test_func1': (0, ('int',))}), snippets)
+        with open(self.out_data_file) as in_f:
+            self.assertEqual(in_f.read(),
+                             'My test 1\ndepends_on:0\n0:exp:0\n\n')
+        self.assertIn('defined(DEP1)', snippets['dep_check_code'])
+        self.assertIn('MACRO1', snippets['expression_code'])
+
+    def test_binary_data_file(self):
+        """
+        Test that the binary intermediate data file is written.
+        :return:
+        """
+        generate_intermediate_data_file(
+            self.data_file, self.out_data_file,
+            ([], {'test_func1': (0, ('int',))}), {},
+            DataOptions(binary=True))
+        with open(self.out_data_file, 'rb') as in_f:
+            self.assertEqual(in_f.read(), gen_binary_datax([
+                ('My test 1', [0], 0,
+                 [encode_binary_parameter('exp', 0)])]))
+
+    def test_source_file(self):
+        """
+        Test that the template is rendered into the source file.
+        :return:
+        """
+        c_file = os.path.join(self.tmp_dir, 'test_suite_ut.c')
+        write_test_source_file(compile_template(['$code $line_no\n']),
+                               c_file, {'code': 'int x;'})
+        with open(c_file) as in_f:
+            self.assertEqual(in_f.read(), 'int x; 2\n')
+
+
+class ParseFunctionFile(TempDirTestCase):
+    """
+    Test suite for parse_function_file().
+    """
+
+    def setUp(self):
+        super(ParseFunctionFile, self).setUp()
+        self.file_name = os.path.join(self.tmp_dir, 'test_suite_ut.function')
+
+    @patch("generate_test_code.parse_function_sections")
+    def test_memoised(self, parse_mock):
+        """
+        Test that a functions file is parsed again only when changed.
+        :return:
+        """
+        parse_mock.return_value = ([], ['code'], [('test_f', [], 'f',
+                                                   'dispatch\n')])
+        self.write_file('test_suite_ut.function',
+                        '/* BEGIN_HEADER */\n/* END_HEADER */\n')
+        snippets = {}
+        parse_function_file(self.file_name, snippets)
+        parse_function_file(self.file_name, snippets)
+        self.assertEqual(parse_mock.call_count, 1)
+        self.assertEqual(snippets['functions_code'], 'codef')
+        self.assertEqual(snippets['dispatch_code'],
+                         '/* Function Id: 0 */\ndispatch\n')
+        self.write_file('test_suite_ut.function', '\n', 'a')
+        parse_function_file(self.file_name, snippets)
+        self.assertEqual(parse_mock.call_count, 2)
+        self.assertEqual(PARSED_FUNCTIONS[self.file_name],
+                         (file_digest(self.file_name),
+                          parse_mock.return_value))
+
+    def test_used_functions(self):
+        """
+        Test that only the used functions are kept and numbered.
+        :return:
+        """
+        self.write_file('test_suite_ut.function', '''/* BEGIN_HEADER */
+#define HEADER
+/* END_HEADER */
+
+/* BEGIN_CASE */
+void func1( int a )
+{
+}
+/* END_CASE */
+
+/* BEGIN_CASE */
+void func2( char * s )
+{
+}
+/* END_CASE */
+''')
+        snippets = {}
+        suite_dependencies, func_info = parse_function_file(
+            self.file_name, snippets, used_functions=['test_func2'])
+        self.assertEqual(suite_dependencies, [])
+        self.assertEqual(func_info, {'test_func2': (0, ['char*'])})
+        self.assertIn('#define HEADER', snippets['functions_code'])
+        self.assertIn('void test_func2(', snippets['functions_code'])
+        self.assertNotIn('test_func1', snippets['functions_code'])
+        self.assertEqual(snippets['dispatch_code'], '''/* Function Id: 0 */
+
+    test_func2_wrapper,
+''')
+        self.assertEqual(snippets['function_names_code'],
+                         '    "test_func2",\n')
+        parse_function_file(self.file_name, snippets)
+        self.assertIn('test_func1', snippets['functions_code'])
+
+
+class FindDuplicateTestCases(TempDirTestCase):
+    """
+    Test suite for find_duplicate_test_cases().
+    """
+
+    def test_no_duplicates(self):
+        """
+        Test that test cases differing in arguments or dependencies
+        are not duplicates.
+        :return:
+        """
+        data_file = self.write_file('test_suite_ut.data', '''
+Test 1
+func1:0:"00"
+
+Test 2
+func1:1:"00"
+
+Test 3
+depends_on:DEP1
+func1:0:"00"
+
+Test 4
+func2:0:"00"
+''')
+        self.assertEqual(find_duplicate_test_cases([data_file]), [])
+
+    def test_duplicates(self):
+        """
+        Test duplicates within a data file and across data files.
+        :return:
+        """
+        data_file1 = self.write_file('test_suite_ut.a.data', '''
+Test 1
+depends_on:DEP1
+func1:0:"00"
+
+Test 2
+func1:1:"00"
+
+Test 1 again
+depends_on:DEP1
+func1:0:"00"
+''')
+        data_file2 = self.write_file('test_suite_ut.b.data', '''
+Test 2 again
+func1:1:"00"
+''')
+        duplicates = find_duplicate_test_cases([data_file1, data_file2])
+        self.assertEqual(duplicates,
+                         [((data_file1, 2, 11, 'Test 1 again'),
+                           (data_file1, 4, 'Test 1')),
+                          ((data_file2, 0, 3, 'Test 2 again'),
+                           (data_file1, 7, 'Test 2'))])
+
+
+if __name__ == '__main__':
+    unittest_main()
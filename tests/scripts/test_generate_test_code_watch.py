@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# Unit test for generate_test_code_watch.py
+#
+# Copyright (C) 2018, Arm Limited, All Rights Reserved
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# This file is part of Mbed TLS (https://tls.mbed.org)
+
+"""
+Unit tests for generate_test_code_watch.py
+"""
+
+
+import os
+from unittest import main as unittest_main
+from generate_test_code_watch import snapshot_files, find_affected_suites
+from generate_test_code_watch import make_watcher
+from test_generate_test_code_files import TempDirTestCase
+
+
+class Watch(TempDirTestCase):
+    """
+    Test suite for the change detection of --watch.
+    """
+
+    def setUp(self):
+        super(Watch, self).setUp()
+        self.file_name = os.path.join(self.tmp_dir, 'test_suite_ut.data')
+
+    def test_snapshot(self):
+        """
+        Test that changed and missing files are detected.
+        :return:
+        """
+        missing = os.path.join(self.tmp_dir, 'missing.data')
+        self.write_file('test_suite_ut.data', 'a')
+        before = snapshot_files([self.file_name, missing])
+        self.assertEqual(before[missing], None)
+        self.write_file('test_suite_ut.data', 'ab')
+        after = snapshot_files([self.file_name, missing])
+        self.assertNotEqual(before[self.file_name], after[self.file_name])
+        self.assertEqual(after[missing], None)
+
+    def test_affected_suites(self):
+        """
+        Test that only the suites using a changed file are affected,
+        and all suites when a shared file changes. All the data files
+        of a merged test suite are affected.
+        :return:
+        """
+        suites = [('a.function', 'a.data'), ('a.function', 'a.x.data'),
+                  ('b.function', 'b.data')]
+        shared = ['main_test.function', 'host_test.function']
+        self.assertEqual(find_affected_suites(suites, {'a.x.data'}, shared),
+                         [('a.function', 'a.x.data')])
+        self.assertEqual(find_affected_suites(suites, {'a.function'},
+                                              shared), suites[:2])
+        self.assertEqual(find_affected_suites(suites, {'host_test.function'},
+                                              shared), suites)
+        self.assertEqual(find_affected_suites(suites, set(), shared), [])
+        self.assertEqual(find_affected_suites(suites, {'a.x.data'}, shared,
+                                              True), suites[:2])
+
+    def test_watcher_wakes_up(self):
+        """
+        Test that the watcher returns after a file changes or after
+        the timeout, whichever watcher is available.
+        :return:
+        """
+        watcher = make_watcher([self.tmp_dir])
+        try:
+            self.write_file('test_suite_ut.data', 'a')
+            watcher.wait(0.01)
+            watcher.wait(0.01)
+        finally:
+            watcher.close()
+
+
+if __name__ == '__main__':
+    unittest_main()